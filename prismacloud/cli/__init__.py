@@ -5,42 +5,81 @@ import os
 import sys
 import warnings
 import re
-import textwrap
 import json
-import ast
+import sqlite3
+import importlib
+import itertools
+from collections.abc import Iterator
+from functools import lru_cache
 
 
 import click
-import click_completion
-import coloredlogs
-import pandas as pd
 from click_help_colors import HelpColorsMultiCommand
-from pydantic_settings import BaseSettings
-from typing import Optional
-from tabulate import tabulate
-from update_checker import UpdateChecker
 
 import prismacloud.cli.version as cli_version
+from prismacloud.cli.columnar import COLUMNAR_FORMATS
+from prismacloud.cli.commands import COMMANDS
+from prismacloud.cli.database import (
+    QUERY_TABLE,
+    REFERENCE_TABLES,
+    SQLITE_OUTPUT_PREFIX,
+    RecordTable,
+    get_reference_tables,
+    run_query,
+)
+from prismacloud.cli.dedupe import SeenKeys, drop_duplicate_rows
+from prismacloud.cli.files import FILE_FORMATS, get_file_format, open_output_file
+from prismacloud.cli.pagination import INCOMPLETE_OUTPUT
+from prismacloud.cli.records import get_columns_pattern, project_records
+from prismacloud.cli.render import render_frame
+from prismacloud.cli.timestamps import (
+    DEFAULT_TIME_FORMAT,
+    EPOCH_TIME_FORMAT,
+    convert_timestamps,
+    get_timestamp_units,
+    normalize_timestamps,
+)
+from prismacloud.cli.update_check import get_cached_available_version
+from prismacloud.cli.writers import (
+    STREAM_WRITERS,
+    ColumnarWriter,
+    CsvWriter,
+    JsonWriter,
+    NdjsonWriter,
+    get_output_format,
+    write_chunks,
+)
+
+# Heavy dependencies (pandas, tabulate, pydantic, coloredlogs, click_completion) are imported
+# in the code paths that need them, to keep startup fast for help, completion and raw output.
 
-click_completion.init()
+# Load shell completion only when the shell asks for completions.
+if "_PC_COMPLETE" in os.environ:
+    import click_completion  # pylint:disable=import-outside-toplevel
 
-# Set defaults
-pd.set_option("display.max_rows", None)
-pd.set_option("display.max_columns", 400)
-pd.set_option("display.width", 1000)
-pd.set_option("display.colheader_justify", "center")
-pd.set_option("display.precision", 3)
-warnings.simplefilter(action="ignore", category=FutureWarning)
+    click_completion.init()
+
+
+@lru_cache(maxsize=None)
+def get_pandas():
+    """Import pandas and set its defaults, once"""
+    import pandas as pd  # pylint:disable=import-outside-toplevel
+
+    # Set defaults
+    pd.set_option("display.max_rows", None)
+    pd.set_option("display.max_columns", 400)
+    pd.set_option("display.width", 1000)
+    pd.set_option("display.colheader_justify", "center")
+    pd.set_option("display.precision", 3)
+    warnings.simplefilter(action="ignore", category=FutureWarning)
+    return pd
 
 
 def get_available_version():
-    # Get available python package version
+    # Get available python package version, from the update check cached (and refreshed in the background) daily
     try:
-        checker = UpdateChecker()
-        result = checker.check("prismacloud-cli", cli_version.version)
-        # Show available version
-        logging.debug("Available version: %s", result.available_version)
-        update_available = result.available_version
+        update_available = get_cached_available_version()
+        logging.debug("Available version: %s", update_available)
     except Exception:  # pylint:disable=broad-except
         update_available = False
 
@@ -57,22 +96,35 @@ Run {} to update
     return update_available_text_block
 
 
-class Settings(BaseSettings):  # pylint:disable=too-few-public-methods
-    """Prisma Cloud CLI Settings"""
+@lru_cache(maxsize=None)
+def get_settings():
+    """Read the settings (from the environment), once"""
+    from typing import Optional  # pylint:disable=import-outside-toplevel
+    from pydantic_settings import BaseSettings  # pylint:disable=import-outside-toplevel
+
+    class Settings(BaseSettings):  # pylint:disable=too-few-public-methods
+        """Prisma Cloud CLI Settings"""
 
-    app_name: str = "Prisma Cloud CLI"
-    max_columns: int = 7
-    max_rows: int = 1000000
-    max_width: int = 25
-    max_levels: int = 2
-    max_lines: int = 10
+        app_name: str = "Prisma Cloud CLI"
+        max_columns: int = 7
+        max_rows: int = 1000000
+        max_width: int = 25
+        max_levels: int = 2
+        max_lines: int = 10
+        stream_page_size: int = 1000
 
-    url: Optional[str] = None
-    identity: Optional[str] = None
-    secret: Optional[str] = None
+        url: Optional[str] = None
+        identity: Optional[str] = None
+        secret: Optional[str] = None
 
+    return Settings()
 
-settings = Settings()
+
+def __getattr__(name):
+    """Provide the settings attribute of this module, read on first use"""
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 CONTEXT_SETTINGS = dict(auto_envvar_prefix="PC")
@@ -99,48 +151,52 @@ class Environment:
 
 
 pass_environment = click.make_pass_decorator(Environment, ensure=True)
-cwpp_folder = os.path.abspath(os.path.join(os.path.dirname(__file__), "cwpp"))
-cspm_folder = os.path.abspath(os.path.join(os.path.dirname(__file__), "cspm"))
-pccs_folder = os.path.abspath(os.path.join(os.path.dirname(__file__), "pccs"))
 
 
 class PrismaCloudCLI(HelpColorsMultiCommand):
-    """Collect commands"""
+    """Collect commands from the command manifest"""
 
     def list_commands(self, ctx):
-        """Read commands from command files"""
-        commands = []
-
-        # Iterate through cwpp commands
-        for filename in os.listdir(cwpp_folder):
-            if filename.endswith(".py") and filename.startswith("cmd_"):
-                commands.append(filename[4:-3])
-        # Iterate through cspm commands
-        for filename in os.listdir(cspm_folder):
-            if filename.endswith(".py") and filename.startswith("cmd_"):
-                commands.append(filename[4:-3])
-        # Iterate through pccs commands
-        for filename in os.listdir(pccs_folder):
-            if filename.endswith(".py") and filename.startswith("cmd_"):
-                commands.append(filename[4:-3])
-
-        commands.sort()
-        return commands
-
-    # pylint: disable=R1710
-    def get_command(self, ctx, cmd_name):
-        """Import command"""
+        """List the commands of the manifest"""
+        return sorted(COMMANDS)
 
-        # Find the command file and import it.
-        # This file can be in the cwpp folder, cspm folder, or pccs folder.
-        module_types = ["cwpp", "cspm", "pccs"]
-
-        for module_type in module_types:
-            try:
-                mod = __import__(f"prismacloud.cli.{module_type}.cmd_{cmd_name}", None, None, ["cli"])
-            except ImportError:
-                continue
-            return mod.cli
+    def get_command(self, ctx, cmd_name):
+        """Import the module of a command, and only that module"""
+        if cmd_name not in COMMANDS:
+            return None
+        module_name, _short_help = COMMANDS[cmd_name]
+        return importlib.import_module(module_name).cli
+
+    def format_commands(self, ctx, formatter):
+        """List the commands with the short help of the manifest, without importing them"""
+        rows = [(cmd_name, COMMANDS[cmd_name][1]) for cmd_name in self.list_commands(ctx)]
+        if rows:
+            with formatter.section("Commands"):
+                formatter.write_dl(rows)
+
+    def shell_complete(self, ctx, incomplete):
+        """Complete the command names with the manifest, without importing them"""
+        from click.shell_completion import CompletionItem  # pylint:disable=import-outside-toplevel
+
+        results = [
+            CompletionItem(cmd_name, help=COMMANDS[cmd_name][1])
+            for cmd_name in self.list_commands(ctx)
+            if cmd_name.startswith(incomplete)
+        ]
+        # Complete the options of the root command
+        results.extend(click.Command.shell_complete(self, ctx, incomplete))
+        return results
+
+
+class OutputFormat(click.Choice):
+    """An output format, or sqlite:PATH[:TABLE] to write the records to a table of a SQLite database"""
+
+    def convert(self, value, param, ctx):
+        if isinstance(value, str) and value.startswith(SQLITE_OUTPUT_PREFIX):
+            if len(value) == len(SQLITE_OUTPUT_PREFIX):
+                self.fail("sqlite output requires a database file, e.g. sqlite:pc.db or sqlite:pc.db:alerts", param, ctx)
+            return value
+        return super().convert(value, param, ctx)
 
 
 @click.command(
@@ -162,8 +218,15 @@ Prisma Cloud CLI (version: {0})
 @click.option(
     "-o",
     "--output",
-    type=click.Choice(["text", "csv", "json", "html", "clipboard", "markdown", "columns", "raw", "count"]),
+    type=OutputFormat(
+        ["text", "csv", "json", "ndjson", "html", "clipboard", "markdown", "columns", "raw", "count"] + COLUMNAR_FORMATS
+    ),
     default="text",
+    help=(
+        "Output format, or sqlite:PATH[:TABLE] to write the records to a table of a SQLite database. "
+        "CSV is written once all the records have arrived (a column can first appear in any page), "
+        "unless --columns is given"
+    ),
 )
 @click.option(
     "-c",
@@ -173,13 +236,52 @@ Prisma Cloud CLI (version: {0})
     default="credentials",
 )
 @click.option("--columns", "columns", help="Select columns for output", default=None)
+@click.option("--concurrency", default=8, show_default=True, help="Maximum number of concurrent API requests")
+@click.option("--max-connections", default=10, show_default=True, help="Maximum number of connections per API host")
+@click.option(
+    "--cache-ttl",
+    default=0,
+    show_default=True,
+    help="Cache the responses of read-only API requests for this many seconds (0 disables the cache)",
+)
+@click.option("--no-cache", is_flag=True, help="Do not use cached API responses")
+@click.option(
+    "--dedupe/--no-dedupe",
+    default=True,
+    show_default=True,
+    help="Remove duplicate records (with the same values)",
+)
+@click.option("--dedupe-key", help="Remove duplicate records by the value of this column instead, e.g. id")
+@click.option(
+    "--upsert-key",
+    help="With -o sqlite:PATH[:TABLE], replace the records of the table with the same value of this column, e.g. id, "
+    "instead of appending records",
+)
+@click.option(
+    "--time-format",
+    default=DEFAULT_TIME_FORMAT,
+    show_default=True,
+    help="Format of timestamps: a strftime format (in local time), iso (ISO 8601, in UTC) or epoch (unchanged)",
+)
+@click.option(
+    "--sql",
+    help="Query the records with SQL (SQLite), in a table named result, and output the result of the query",
+)
+@click.option(
+    "--output-file",
+    multiple=True,
+    help="Write the output to a file instead, in the format of its extension (csv, json, ndjson, parquet, feather, "
+    "arrows), compressed if it ends with .gz or .zst. Repeat to write several files",
+)
 @pass_environment
-# pylint: disable=W0613
-def cli(ctx, very_verbose, verbose, configuration, output, query_filter, columns=None):
+# pylint: disable=W0613,R0913
+def cli(ctx, very_verbose, verbose, configuration, output, query_filter, columns=None, **_options):
     """Define the command line"""
+    # The other options (e.g. --concurrency, --cache-ttl, --sql) are read from the parameters of the root context.
     ctx.configuration = configuration
     ctx.output = output
     log_format = "%(asctime)s - %(levelname)s - %(message)s"
+    import coloredlogs  # pylint:disable=import-outside-toplevel
 
     if verbose:
         coloredlogs.install(level="INFO", fmt=log_format)
@@ -206,6 +308,7 @@ def get_parameters():
 
 def log_settings():
     """Log settings"""
+    settings = get_settings()
     logging.debug("Settings:")
     logging.debug("  Max columns: %s", settings.max_columns)
     logging.debug("  Max rows: %s", settings.max_rows)
@@ -213,8 +316,24 @@ def log_settings():
     logging.debug("  Max levels: %s", settings.max_levels)
 
 
-def process_data_frame(data):
+# Columns used to calculate the used and usage columns (see process_data_frame)
+DERIVED_COLUMNS_SOURCES = re.compile(r"dataPoints.counts|workloadsPurchased")
+
+
+def process_data_frame(data, seen_keys=None, typed_timestamps=False):
+    pd = get_pandas()
     params, columns = get_parameters()
+    # Select the columns before building the data frame, so unselected (often large) values are not processed.
+    # Keep the columns that the filter mentions, and those used to calculate other columns.
+    if params["columns"]:
+        projected_data = project_records(
+            data,
+            get_columns_pattern(columns),
+            lambda key: DERIVED_COLUMNS_SOURCES.search(key) or (params["query_filter"] and key in params["query_filter"]),
+        )
+        if projected_data is not None:
+            data = projected_data
+
     # https://pandas.pydata.org/docs/reference/api/pandas.json_normalize.html
     # json_normalize() requires a dictionary or list of dictionaries
     # normalize = False
@@ -241,19 +360,17 @@ def process_data_frame(data):
             logging.error("Error converting data via DataFrame(): %s", _exc)
             sys.exit(1)
 
-    # If a column contains time, try convert it to datetime
-    for column in str(data_frame.columns):
-        if column.lower() in ["time", "lastmodified", "availableasof"]:
-            try:
-                data_frame[column] = pd.to_datetime(data_frame[column], unit="ms")
-            except Exception as _exc2:  # pylint:disable=broad-except
-                logging.debug("Error converting column to milliseconds: %s", _exc2)
-                try:
-                    data_frame[column] = pd.to_datetime(data_frame[column], unit="s")
-                except Exception as _exc3:  # pylint:disable=broad-except
-                    logging.debug("Error converting column to seconds: %s", _exc3)
+    # Format the columns of timestamps (epochs in seconds or milliseconds, in columns named as timestamps)
+    # Typed (columnar) output has datetimes instead, from the epochs, after filtering on the formatted timestamps.
+    epochs = {}
+    try:
+        if typed_timestamps and params["time_format"] != EPOCH_TIME_FORMAT:
+            epochs = {column: (data_frame[column], unit) for column, unit in get_timestamp_units(data_frame).items()}
+        data_frame = normalize_timestamps(data_frame, params["time_format"])
+    except Exception as _exc:  # pylint:disable=broad-except
+        logging.debug("Error formatting timestamps: %s", _exc)
 
-    data_frame.fillna("", inplace=True)
+    data_frame = data_frame.fillna("")
 
     # If a filter is set, try to apply it
     if params["query_filter"]:
@@ -299,13 +416,18 @@ def process_data_frame(data):
     if "index" in data_frame.columns:
         data_frame.drop(columns=["index"], inplace=True)
 
-    # Before we show the output, try to remove duplicate rows
-    try:
-        # Convert all columns to string
-        data_frame = data_frame.applymap(str)
-        data_frame = data_frame.drop_duplicates()
-    except Exception as _exc:  # pylint:disable=broad-except
-        logging.debug("Error dropping duplicates: %s", _exc)
+    # Before we show the output, try to remove duplicate rows (and rows written in previous pages of streaming output)
+    if params["dedupe"]:
+        try:
+            data_frame = drop_duplicate_rows(data_frame, seen_keys, params["dedupe_key"])
+        except Exception as _exc:  # pylint:disable=broad-except
+            logging.debug("Error dropping duplicates: %s", _exc)
+
+    if epochs:
+        try:
+            data_frame = convert_timestamps(data_frame, epochs)
+        except Exception as _exc:  # pylint:disable=broad-except
+            logging.debug("Error converting timestamps: %s", _exc)
 
     return data_frame
 
@@ -315,6 +437,42 @@ def cli_output(data, sort_values=False):
     """want to see raw json."""
     params = get_parameters()[0]
     log_settings()  # Log settings in debug level
+    write_output(data, params)
+    # Exit with an error after the output, if records are missing (e.g. pages of a forced request failed)
+    if click.get_current_context().meta.get(INCOMPLETE_OUTPUT):
+        sys.exit(1)
+
+
+def write_output(data, params):
+    """Write the output of a command, in the output format or to the output files or database"""
+    # Load the records into a SQLite database, a page at a time, to query them
+    if params["sql"]:
+        if not isinstance(data, Iterator):
+            data = iter(data if isinstance(data, list) else [data])
+        sql_output(data, params)
+        return
+
+    # Write files a page at a time, in the format of each file, from the same records
+    if params["output_file"]:
+        if not isinstance(data, Iterator):
+            data = iter(data if isinstance(data, list) else [data])
+        file_output(data, params)
+        return
+
+    # Write NDJSON record by record, without processing the records via a data frame,
+    # and columnar formats and SQLite tables a batch at a time
+    if params["output"] == "ndjson" or get_output_format(params["output"]) in COLUMNAR_FORMATS + ["sqlite"]:
+        if not isinstance(data, Iterator):
+            data = iter(data if isinstance(data, list) else [data])
+        stream_output(data, params)
+        return
+
+    # Write the records of an iterator page by page, if the output format allows it
+    if isinstance(data, Iterator):
+        if params["output"] in STREAM_WRITERS:
+            stream_output(data, params)
+            return
+        data = list(data)
 
     if params["output"] == "raw":
         click.secho(json.dumps(data))
@@ -327,49 +485,145 @@ def cli_output(data, sort_values=False):
     show_output(data_frame, params, data)
 
 
-def json_parse(json_data, level=0):
-    if isinstance(json_data, (dict, list)):
-        json_obj = json.loads(json.dumps(json_data))
-    else:
-        json_obj = json.loads(json_data)
-
-    output_str = ""
-    indent = "  " * level
-    if isinstance(json_obj, list):
-        for item in json_obj:
-            output_str += json_parse(item, level)
-    elif isinstance(json_obj, dict):
-        for key, value in json_obj.items():
-            if isinstance(value, (dict, list)):
-                output_str += f"{indent}{key}:\n"
-                output_str += json_parse(value, level + 1)
-            else:
-                output_str += f"{indent}{key}: {value}\n"
-
-    return output_str + "\n" * (level == 0)
+def stream_output(records, params):
+    """Process and write the records of an iterator, a page at a time, so memory use does not grow with the output"""
+    settings = get_settings()
+    writer = STREAM_WRITERS[get_output_format(params["output"])](params)
+    if params["output"] == "ndjson":
+        writer.write_records(records)
+        return
+    # Retrieve the first page before writing anything, so an API error does not leave a partial document
+    page = list(itertools.islice(records, settings.stream_page_size))
+    seen_keys = SeenKeys() if params["dedupe"] else None
+    typed_timestamps = isinstance(writer, ColumnarWriter)
+    writer.open()
+    while page:
+        if params["output"] == "raw":
+            writer.write_records(page)
+        else:
+            writer.write_frame(process_data_frame(page, seen_keys, typed_timestamps))
+        page = list(itertools.islice(records, settings.stream_page_size))
+    writer.close()
+    if params["output"] == "raw":
+        sys.exit(1)
 
 
-def wrap_text(text):
-    """Truncate a string to max_width characters"""
+def load_reference_table(connection, name, params):
+    """Load the records of a reference table (e.g. policies) from the API, for a --sql query to join them"""
+    from prismacloud.cli.api import pc_api  # pylint:disable=import-outside-toplevel
 
+    pd = get_pandas()
+    logging.debug("Loading reference table: %s", name)
     try:
-        data = json.loads(text)
-        if isinstance(data, (list, dict)):
-            text = json_parse(data)
-    except json.decoder.JSONDecodeError:
-        pass
-
+        records = getattr(pc_api, REFERENCE_TABLES[name])()
+    except Exception as _exc:  # pylint:disable=broad-except
+        logging.error("Error loading reference table %s: %s", name, _exc)
+        sys.exit(1)
+    table = RecordTable(connection, name)
+    if records:
+        table.insert(normalize_timestamps(pd.json_normalize(records), params["time_format"]))
+    table.create()
+    table.close()
+
+
+def sql_output(records, params):
+    """
+    Load the processed records, a page at a time, into the result table of an in-memory SQLite database,
+    with the reference tables that the query uses, then run the --sql query and output its result
+    """
+    settings = get_settings()
+    connection = sqlite3.connect(":memory:")
     try:
-        data = ast.literal_eval(text)
-        if isinstance(data, (list, dict)):
-            text = json_parse(data)
-    except (SyntaxError, ValueError):
-        pass
-    wrapped_text = textwrap.fill(text=text, width=settings.max_width, max_lines=settings.max_lines, replace_whitespace=False)
-    return wrapped_text
+        table = RecordTable(connection, QUERY_TABLE)
+        seen_keys = SeenKeys() if params["dedupe"] else None
+        page = list(itertools.islice(records, settings.stream_page_size))
+        while page:
+            table.insert(process_data_frame(page, seen_keys))
+            page = list(itertools.islice(records, settings.stream_page_size))
+        # Query a table without records, rather than no table
+        table.create(get_parameters()[1] or ("id",))
+        table.close()
+        for name in get_reference_tables(params["sql"]):
+            load_reference_table(connection, name, params)
+        result = run_query(connection, params["sql"])
+    except sqlite3.Error as _exc:
+        logging.error("Error running SQL query: %s", _exc)
+        sys.exit(1)
+    finally:
+        connection.close()
+
+    if params["output_file"]:
+        writers = open_file_writers(params)
+        for writer in writers:
+            writer.write_frame(result)
+        close_file_writers(writers, params)
+        return
+    output_format = get_output_format(params["output"])
+    if output_format in ["ndjson"] + COLUMNAR_FORMATS + ["sqlite"]:
+        writer = STREAM_WRITERS[output_format](params)
+        writer.open()
+        writer.write_frame(result)
+        writer.close()
+    else:
+        # The result of a query is processed records: output raw as JSON
+        show_output(result, dict(params, output="json") if output_format == "raw" else params, result)
+
+
+def open_file_writers(params):
+    """Open the --output-file files, and return a writer for each, in the format of its extension (or of -o)"""
+    writers = []
+    for path in params["output_file"]:
+        output_format = get_file_format(path, get_output_format(params["output"]))
+        if output_format not in FILE_FORMATS.values():
+            logging.error("Unsupported format of output file %s: %s", path, output_format)
+            logging.error("Output files are csv, json, ndjson, parquet, feather or arrows, optionally .gz or .zst")
+            sys.exit(1)
+        try:
+            output_file = open_output_file(path)
+        except OSError as _exc:
+            logging.error("Error opening output file %s: %s", path, _exc)
+            sys.exit(1)
+        writer = STREAM_WRITERS[output_format](dict(params, output=output_format), output_file)
+        writer.open()
+        writers.append(writer)
+    return writers
+
+
+def close_file_writers(writers, params):
+    """Write the end of each output file, and close it"""
+    for path, writer in zip(params["output_file"], writers):
+        writer.close()
+        writer.file.close()
+        logging.info("Wrote %s records to %s", writer.rows, path)
+
+
+def file_output(records, params):
+    """
+    Write the records of an iterator to the --output-file files, a page at a time, processing each page once
+    for all the files (except ndjson files, written record by record)
+    """
+    settings = get_settings()
+    # Retrieve the first page before creating files, so an API error does not leave partial files
+    page = list(itertools.islice(records, settings.stream_page_size))
+    writers = open_file_writers(params)
+    # Columnar files have typed timestamps, other files formatted timestamps: pages are processed once per kind
+    seen_keys = {typed: SeenKeys() if params["dedupe"] else None for typed in (False, True)}
+    while page:
+        data_frames = {}
+        for writer in writers:
+            if isinstance(writer, NdjsonWriter):
+                writer.write_records(page)
+                continue
+            typed = isinstance(writer, ColumnarWriter)
+            if typed not in data_frames:
+                data_frames[typed] = process_data_frame(page, seen_keys[typed], typed)
+            writer.write_frame(data_frames[typed])
+        page = list(itertools.islice(records, settings.stream_page_size))
+    close_file_writers(writers, params)
 
 
 def show_output(data_frame, params, data):
+    settings = get_settings()
     try:
         if params["output"] == "count":
             click.secho(data_frame.shape[0], fg="red")
@@ -380,20 +634,18 @@ def show_output(data_frame, params, data):
             # Drop all but first settings.max_columns columns from data_frame
             data_frame = data_frame.iloc[:, : settings.max_columns]
 
-            # Wrap all cells
-            data_frame_truncated = data_frame.applymap(wrap_text, na_action="ignore")
+            # Render and wrap the cells and the column names of the displayed rows and columns
+            data_frame_truncated = render_frame(data_frame, settings.max_width, settings.max_lines)
 
-            # Wrap column names
-            data_frame_truncated.columns = list(map(wrap_text, data_frame_truncated.columns))
+            from tabulate import tabulate  # pylint:disable=import-outside-toplevel
 
             table_output = tabulate(data_frame_truncated, headers="keys", tablefmt="fancy_grid", showindex=False)
             click.secho(table_output, fg="green")
+        # Serialize JSON and CSV a chunk of rows at a time, so a large frame is never copied into one string
         if params["output"] == "json":
-            # Cannot use 'index=False' here, otherwise '.to_json' returns a hash instead of an array of hashes.
-            # But '.to_json' does not output the index anyway.
-            click.secho(data_frame.to_json(orient="records"), fg="green")
+            write_chunks(JsonWriter(params), data_frame)
         if params["output"] == "csv":
-            click.secho(data_frame.to_csv(index=False), fg="green")
+            write_chunks(CsvWriter(params, columns=list(data_frame.columns)), data_frame)
         if params["output"] == "clipboard":
             click.secho(data_frame.to_clipboard(index=False), fg="green")
         if params["output"] == "markdown":
@@ -403,11 +655,8 @@ def show_output(data_frame, params, data):
             # Drop all but first settings.max_columns columns from data_frame
             data_frame = data_frame.iloc[:, : settings.max_columns]
 
-            # Wrap all cells
-            data_frame_truncated = data_frame.applymap(wrap_text, na_action="ignore")
-
-            # Wrap column names
-            data_frame_truncated.columns = list(map(wrap_text, data_frame_truncated.columns))
+            # Render and wrap the cells and the column names of the displayed rows and columns
+            data_frame_truncated = render_frame(data_frame, settings.max_width, settings.max_lines)
 
             click.secho(data_frame_truncated.to_markdown(index=False), fg="green")
         if params["output"] == "html":
@@ -1,10 +1,13 @@
 """ CLI Configuration and Prisma Cloud API Library Wrapper """
 
+import atexit
 import json
 import logging
 import os
 import sys
+import threading
 import types
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 try:
     from pathlib import Path
@@ -20,15 +23,33 @@ except Exception as _exc:  # pylint:disable=broad-except
 import click
 
 # pylint: disable=import-error,no-name-in-module
-from prismacloud.api import pc_api, PrismaCloudUtility as pc_util
+from prismacloud.api import pc_api as api_client, PrismaCloudUtility as pc_util
 import prismacloud.api.version as api_version
 import prismacloud.cli.version as cli_version
+from prismacloud.cli.pagination import iter_compute_pages
+from prismacloud.cli.response_cache import RequestMemo, ResponseCache, is_cacheable
+from prismacloud.cli.token_cache import TokenCache
+from prismacloud.cli.transport import SessionPool, install as install_session_pool
 
 
 """ CLI Configuration """
 
 # Set the User Agent for accessing the APIs
-pc_api.user_agent = f"PrismaCloudCLI/{cli_version.version}"  # Dynamically set default User-Agent
+api_client.user_agent = f"PrismaCloudCLI/{cli_version.version}"  # Dynamically set default User-Agent
+
+# Send requests through per-thread HTTP sessions, with keep-alive connection pooling
+session_pool = SessionPool()
+install_session_pool(session_pool, api_client)
+atexit.register(session_pool.log_stats)
+
+# Share API tokens between invocations, via ~/.prismacloud/tokens/
+token_cache = TokenCache(os.path.join(home_directory, ".prismacloud", "tokens"))
+
+# Cache the responses of read-only requests, via ~/.prismacloud/cache/, when enabled with --cache-ttl
+response_cache = ResponseCache(os.path.join(home_directory, ".prismacloud", "cache"))
+
+# Share the responses of identical GET requests within this process
+request_memo = RequestMemo()
 
 
 def community_supported():
@@ -232,17 +253,82 @@ def write_cli_config_file(config_file_name, config_file_settings):
     logging.debug("Configuration written to file: %s", config_file_name)
 
 
+""" Resolved Configuration """
+
+# Environment variables that can change the resolved configuration.
+CONFIG_ENVIRONMENT_VARIABLES = [
+    "PC_NAME",
+    "PC_URL",
+    "PC_SAAS_API_ENDPOINT",
+    "PC_COMPUTE_API_ENDPOINT",
+    "PC_IDENTITY",
+    "PC_ACCESS_KEY",
+    "PC_SECRET",
+    "PC_SECRET_KEY",
+    "PC_VERIFY",
+    "PC_CA_BUNDLE",
+]
+
+# Process-wide memo of the resolved configuration and of the settings last applied to the API client.
+resolved_config = {"key": None, "configuration": "credentials", "settings": None, "applied": None}
+resolved_config_lock = threading.RLock()
+
+
+def get_config_key():
+    """
+    Return the key that identifies the resolved configuration: the selected configuration and the environment.
+    Return None when there is no click context (for example, in a worker thread).
+    """
+    try:
+        params = click.get_current_context().find_root().params
+    except Exception:  # pylint:disable=broad-except
+        return None
+    configuration = params.get("configuration") or "credentials"
+    return (configuration, tuple(os.environ.get(variable) for variable in CONFIG_ENVIRONMENT_VARIABLES))
+
+
+def get_resolved_config():
+    """Return the API configuration, resolving it only when the selected configuration or the environment changes"""
+    with resolved_config_lock:
+        key = get_config_key()
+        settings = resolved_config["settings"]
+        if settings is None or (key is not None and key != resolved_config["key"]):
+            configuration = key[0] if key else "credentials"
+            logging.debug("Resolving configuration for: %s", configuration)
+            settings = map_cli_config_to_api_config()
+            resolved_config.update({"key": key, "configuration": configuration, "settings": settings})
+        return settings
+
+
+def configure_api():
+    """Configure the API client, but only when the resolved settings differ from the applied settings"""
+    with resolved_config_lock:
+        settings = get_resolved_config()
+        if settings != resolved_config["applied"]:
+            logging.debug("Configuring API client for: %s", settings.get("url"))
+            if resolved_config["applied"] is not None:
+                # A different tenant or identity invalidates the current token.
+                api_client.token = None
+                api_client.token_timer = 0
+            url = pc_util.normalize_url(settings.get("url", ""))
+            token_cache.select(resolved_config["configuration"], url, settings.get("identity"))
+            token_cache.load(api_client)
+            api_client.configure(settings)
+            session_pool.set_api_hosts(api_client.api, api_client.api_compute)
+            resolved_config["applied"] = dict(settings)
+
+
 """ Prisma Cloud API Library Wrapper """
 
 
 def get_endpoint(_self, endpoint, query_params=None, api="cwpp", request_type="GET"):
     """Make a request without using an endpoint-specific method"""
-    pc_api.configure(map_cli_config_to_api_config())
+    configure_api()
     logging.debug("Calling API Endpoint (%s): %s", request_type, endpoint)
     result = None
     if api == "cspm":
         try:
-            result = pc_api.execute(request_type, endpoint, query_params)
+            result = api_client.execute(request_type, endpoint, query_params)
         except Exception as exc:  # pylint:disable=broad-except
             logging.error(
                 "There was an error executing the request. Check if this API (CSPM) is available in your environment."
@@ -253,7 +339,7 @@ def get_endpoint(_self, endpoint, query_params=None, api="cwpp", request_type="G
         if not endpoint.startswith("api"):
             endpoint = "api/v1/%s" % endpoint
             try:
-                result = pc_api.execute_compute(request_type, endpoint, query_params)
+                result = api_client.execute_compute(request_type, endpoint, query_params)
             except Exception as exc:  # pylint:disable=broad-except
                 logging.error(
                     "There was an error executing the request. Check if this API (CWP) is available in your environment."
@@ -262,7 +348,7 @@ def get_endpoint(_self, endpoint, query_params=None, api="cwpp", request_type="G
                 sys.exit(1)
     if api == "code":
         try:
-            result = pc_api.execute_code_security(request_type, endpoint, query_params)
+            result = api_client.execute_code_security(request_type, endpoint, query_params)
         except Exception as exc:  # pylint:disable=broad-except
             logging.error(
                 "There was an error executing the request. Check if this API (CCS) is available in your environment."
@@ -272,8 +358,211 @@ def get_endpoint(_self, endpoint, query_params=None, api="cwpp", request_type="G
     return result
 
 
+def iter_compute_records(endpoint, query_params=None, force=False, limit=None):
+    """
+    Yield the records of a paginated Compute API GET request as its pages arrive,
+    for commands that pass the records to cli_output() without holding them all in memory.
+    Stop requesting pages after `limit` records, if given.
+    """
+    setup_api()
+    logging.debug("Streaming API Endpoint (GET): %s", endpoint)
+    pages = iter_compute_pages(api_client, session_pool.request, endpoint, query_params, force, get_concurrency())
+    records = 0
+    try:
+        for page in pages:
+            page = page if isinstance(page, list) else [page]
+            if limit is not None:
+                page = page[: max(0, limit - records)]
+            yield from page
+            records += len(page)
+            if limit is not None and records >= limit:
+                break
+    finally:
+        pages.close()
+
+
+def get_max_connections():
+    """Get the maximum number of concurrent connections per host from the command line"""
+    try:
+        max_connections = click.get_current_context().find_root().params.get("max_connections")
+    except Exception:  # pylint:disable=broad-except
+        max_connections = None
+    return max(1, max_connections or session_pool.max_connections_per_host)
+
+
+def get_concurrency():
+    """Get the maximum number of concurrent API requests from the command line"""
+    try:
+        concurrency = click.get_current_context().find_root().params.get("concurrency")
+    except Exception:  # pylint:disable=broad-except
+        concurrency = None
+    return max(1, concurrency or api_client.max_workers)
+
+
+def get_cache_ttl():
+    """
+    Get the time to live of cached responses from the command line, 0 if caching is disabled.
+    Without a click context (for example, in a worker thread) use the last value read.
+    """
+    try:
+        params = click.get_current_context().find_root().params
+    except Exception:  # pylint:disable=broad-except
+        return response_cache.ttl
+    response_cache.ttl = 0 if params.get("no_cache") else max(0, params.get("cache_ttl") or 0)
+    return response_cache.ttl
+
+
+def paginate_compute_requests(execute):
+    """Wrap the execute_compute method of the API library to request the pages of paginated GET requests concurrently"""
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def execute_compute(
+        action, endpoint, query_params=None, body_params=None, request_headers=None, force=False, paginated=False
+    ):
+        if not paginated or action.upper() != "GET" or body_params or request_headers:
+            return execute(action, endpoint, query_params, body_params, request_headers, force, paginated)
+        if query_params is not None and not isinstance(query_params, dict):
+            return execute(action, endpoint, query_params, body_params, request_headers, force, paginated)
+        results = []
+        for page in iter_compute_pages(api_client, session_pool.request, endpoint, query_params, force, get_concurrency()):
+            if not isinstance(page, list):
+                return page
+            results.extend(page)
+        return results
+
+    return execute_compute
+
+
+def cache_responses(execute, api_family):
+    """
+    Wrap an execute method of the API library to share the responses of identical GET requests within this process,
+    and to cache the responses of read-only requests on disk.
+    """
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def cached_execute(
+        _self, action, endpoint, query_params=None, body_params=None, request_headers=None, force=False, paginated=False
+    ):
+        if not is_cacheable(action, endpoint):
+            # A request that changes data may make the responses shared so far stale.
+            request_memo.clear()
+            return execute(action, endpoint, query_params, body_params, request_headers, force, paginated)
+        # Forced requests can return partial results, so they are not shared or cached.
+        if force:
+            return execute(action, endpoint, query_params, body_params, request_headers, force, paginated)
+        tenant = "%s|%s|%s" % (api_client.api, api_client.api_compute, api_client.identity)
+        key = response_cache.key(tenant, api_family, endpoint, action, query_params, body_params, paginated, request_headers)
+        ttl = get_cache_ttl()
+
+        def request():
+            if ttl:
+                found, result = response_cache.get(key, ttl)
+                if found:
+                    return result
+            result = execute(action, endpoint, query_params, body_params, request_headers, force, paginated)
+            if ttl:
+                response_cache.put(key, action, endpoint, result)
+            return result
+
+        # Paginated responses (all the records of a list) are too large to be shared.
+        if action.upper() == "GET" and not paginated:
+            return request_memo.call(key, request)
+        return request()
+
+    return cached_execute
+
+
+def fan_out(request_specs, concurrency=None, label=None):
+    """
+    Run a list of (method, kwargs) request specs with at most `concurrency` requests in flight.
+    Return the results in the order of the request specs, with None for each failed request,
+    and a list of (index, exception) tuples for the failed requests.
+    """
+    concurrency = concurrency or get_concurrency()
+    results = [None] * len(request_specs)
+    errors = []
+    logging.debug("Running %s API requests with a concurrency of %s", len(request_specs), concurrency)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(method, **kwargs): index for index, (method, kwargs) in enumerate(request_specs)}
+        with click.progressbar(length=len(futures), label=label, file=sys.stderr) as progress_bar:
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except (Exception, SystemExit) as exc:  # pylint:disable=broad-except
+                    logging.debug("Error executing request %s: %s", request_specs[index], exc)
+                    errors.append((index, exc))
+                progress_bar.update(1)
+    if errors:
+        logging.error("%s of %s API requests failed, the output is incomplete.", len(errors), len(request_specs))
+        logging.error("First error: %s", str(errors[0][1]).strip())
+    return results, errors
+
+
+def exit_on_errors(*errors):
+    """Exit with an error, after the output of a command, if any of its fan_out() requests failed"""
+    if any(errors):
+        sys.exit(1)
+
+
 """ Instance of the Prisma Cloud API """
 
-pc_api.configure(map_cli_config_to_api_config())
-# Add the get_endpoint method to this instance.
-pc_api.get_endpoint = types.MethodType(get_endpoint, pc_api)
+# Set up the API client once, when first used.
+api_client_ready = threading.Event()
+
+
+def setup_api():
+    """
+    Set up and configure the API client: on first use, wrap its methods; then reconfigure it
+    if the selected configuration or the environment has changed.
+    """
+    if not api_client_ready.is_set():
+        with resolved_config_lock:
+            if not api_client_ready.is_set():
+                session_pool.max_connections_per_host = get_max_connections()
+                token_cache.attach(api_client)
+                # Add the get_endpoint method to this instance.
+                api_client.get_endpoint = types.MethodType(get_endpoint, api_client)
+                # Cache the responses of read-only requests.
+                api_client.execute = types.MethodType(cache_responses(api_client.execute, "cspm"), api_client)
+                api_client.execute_compute = types.MethodType(
+                    cache_responses(paginate_compute_requests(api_client.execute_compute), "cwpp"), api_client
+                )
+                api_client.execute_code_security = types.MethodType(
+                    cache_responses(api_client.execute_code_security, "code"), api_client
+                )
+                atexit.register(response_cache.close)
+                atexit.register(request_memo.log_stats)
+                api_client_ready.set()
+    configure_api()
+    return api_client
+
+
+class LazyAPIClient:
+    """
+    Proxy to the API client that sets it up on first use of one of its attributes,
+    so that importing a command module does not read the configuration or prompt for it,
+    and help, completion and invalid arguments do not pay for it.
+    The client is set up again only when the configuration key (see get_config_key) changes.
+    """
+
+    def __init__(self):
+        object.__setattr__(self, "_client", None)
+        object.__setattr__(self, "_config_key", None)
+
+    def _get_client(self):
+        """Return the configured API client, setting it up on first use, or when the configuration key changed"""
+        key = get_config_key()
+        if self._client is None or (key is not None and key != self._config_key):
+            object.__setattr__(self, "_client", setup_api())
+            object.__setattr__(self, "_config_key", key)
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self._get_client(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._get_client(), name, value)
+
+
+pc_api = LazyAPIClient()
@@ -0,0 +1,204 @@
+""" Batch Mode: run the Commands of a Plan in one Process """
+
+import logging
+import os
+import re
+import shlex
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml
+
+from prismacloud.cli.commands import COMMANDS
+
+# The file extension of the output file of a command, by output format.
+# Raw output always exits with an error (see cli_output), so a plan uses json instead.
+OUTPUT_EXTENSIONS = {
+    "text": "txt",
+    "columns": "txt",
+    "count": "txt",
+    "csv": "csv",
+    "json": "json",
+    "ndjson": "ndjson",
+    "html": "html",
+    "markdown": "md",
+    "parquet": "parquet",
+    "feather": "feather",
+    "arrow": "arrows",
+}
+
+# The global options that a command of a plan can set, by key of the plan.
+ENTRY_OPTIONS = {"output": "-o", "columns": "--columns", "filter": "--filter"}
+ENTRY_KEYS = ["name", "command", "file"] + list(ENTRY_OPTIONS)
+ENTRY_PARAMETERS = ["output", "columns", "query_filter", "output_file"]
+
+# Commands that cannot run in a batch.
+EXCLUDED_COMMANDS = ["batch", "serve"]
+
+
+class ThreadLocalStream:
+    """Standard output that each thread can redirect to its own file, so commands running concurrently do not mix"""
+
+    def __init__(self, default):
+        self.default = default
+        self.local = threading.local()
+
+    def redirect(self, stream):
+        """Redirect the output of the current thread, or stop redirecting it with None"""
+        self.local.stream = stream
+
+    def target(self):
+        """Return the stream of the current thread"""
+        return getattr(self.local, "stream", None) or self.default
+
+    def write(self, text):
+        """Write to the stream of the current thread"""
+        return self.target().write(text)
+
+    def flush(self):
+        """Flush the stream of the current thread"""
+        return self.target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self.target(), name)
+
+
+def load_plan(plan_file_name, output_directory="."):
+    """
+    Read a batch plan: a list of commands, or a dictionary with a list of 'commands'. For example:
+
+        - name: policies
+          command: policy list
+          output: json
+        - command: alert list --status open
+          output: csv
+          columns: id,status,policy.name
+          filter: "`policy.severity` == 'high'"
+          file: reports/open-alerts.csv
+
+    Return the list of entries, each a dictionary with a name, the arguments of the command, and its output file.
+    Raise ValueError if the plan is not valid.
+    """
+    with open(plan_file_name, "r") as plan_file:
+        try:
+            plan = yaml.safe_load(plan_file)
+        except yaml.YAMLError as exc:
+            raise ValueError(exc) from exc
+    if isinstance(plan, dict):
+        plan = plan.get("commands")
+    if not isinstance(plan, list) or not plan:
+        raise ValueError("A plan is a list of commands, or a dictionary with a list of commands")
+    entries = []
+    names = set()
+    for index, item in enumerate(plan, start=1):
+        entry = load_entry(item, index, names, output_directory)
+        names.add(entry["name"])
+        entries.append(entry)
+    return entries
+
+
+def load_entry(item, index, names, output_directory):
+    """
+    Read a command of a batch plan, the command at `index`, and return its entry, with a name not in `names`.
+    Raise ValueError if the command is not valid.
+    """
+    if isinstance(item, str):
+        item = {"command": item}
+    if not isinstance(item, dict) or not item.get("command"):
+        raise ValueError("Command %s of the plan has no 'command'" % index)
+    unknown_keys = sorted(set(item) - set(ENTRY_KEYS))
+    if unknown_keys:
+        raise ValueError("Command %s of the plan has unknown keys: %s" % (index, ", ".join(unknown_keys)))
+    command = item["command"]
+    command = shlex.split(command) if isinstance(command, str) else [str(argument) for argument in command]
+    if not command or command[0] not in COMMANDS or command[0] in EXCLUDED_COMMANDS:
+        raise ValueError("Command %s of the plan is not supported: %s" % (index, item["command"]))
+    name = str(item.get("name") or re.sub(r"[^\w.-]+", "_", "_".join(command))[:100])
+    if name in names:
+        name = "%s_%s" % (name, index)
+    output = item.get("output", "text")
+    if output == "raw":
+        raise ValueError("Command %s of the plan has raw output, which a plan does not support: use json" % index)
+    if output not in OUTPUT_EXTENSIONS:
+        raise ValueError("Command %s of the plan has an unsupported output: %s" % (index, output))
+    arguments = []
+    for key, option in ENTRY_OPTIONS.items():
+        if item.get(key) is not None:
+            arguments += [option, str(item[key])]
+    file_name = item.get("file") or "%s.%s" % (name, OUTPUT_EXTENSIONS[output])
+    return {
+        "name": name,
+        "command": " ".join(command),
+        "arguments": arguments + command,
+        "file": os.path.join(output_directory, file_name),
+    }
+
+
+def get_global_arguments(root_command, params):
+    """
+    Return the global options given to the batch command, as arguments for each command of the plan,
+    except the output options that each command sets.
+    """
+    arguments = []
+    for param in root_command.params:
+        value = params.get(param.name)
+        if param.name in ENTRY_PARAMETERS or value is None or value == param.default or not param.opts:
+            continue
+        if getattr(param, "is_flag", False):
+            flag = param.opts[0] if value else (param.secondary_opts or [None])[0]
+            if flag:
+                arguments.append(flag)
+        elif getattr(param, "multiple", False):
+            for item in value:
+                arguments += [param.opts[0], str(item)]
+        else:
+            arguments += [param.opts[0], str(value)]
+    return arguments
+
+
+def run_entry(root_command, entry, global_arguments, stdout):
+    """Run a command of the plan, writing its output to its file, and return its result"""
+    start = time.time()
+    logging.info("Running: %s", entry["command"])
+    exit_code = 1
+    try:
+        directory = os.path.dirname(entry["file"])
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(entry["file"], "w", encoding="utf-8") as output_file:
+            stdout.redirect(output_file)
+            try:
+                root_command.main(args=global_arguments + entry["arguments"], prog_name="pc")
+                exit_code = 0
+            except SystemExit as exc:
+                exit_code = exc.code if isinstance(exc.code, int) else int(exc.code is not None)
+            finally:
+                stdout.redirect(None)
+    except Exception as exc:  # pylint:disable=broad-except
+        logging.error("Error running: %s: %s", entry["command"], exc)
+    seconds = round(time.time() - start, 2)
+    logging.info("Finished: %s, with exit code: %s, in %s seconds", entry["command"], exit_code, seconds)
+    return {
+        "name": entry["name"],
+        "command": entry["command"],
+        "file": entry["file"],
+        "exit_code": exit_code,
+        "seconds": seconds,
+    }
+
+
+def run_plan(root_command, entries, global_arguments, parallel=4):
+    """
+    Run the commands of a plan, at most `parallel` at the same time, sharing the API client, its token,
+    and the responses of identical requests. Return their results, in the order of the plan.
+    """
+    stdout = ThreadLocalStream(sys.stdout)
+    sys.stdout = stdout
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, parallel)) as executor:
+            futures = [executor.submit(run_entry, root_command, entry, global_arguments, stdout) for entry in entries]
+            return [future.result() for future in futures]
+    finally:
+        sys.stdout = stdout.default
@@ -0,0 +1,171 @@
+""" Typed Columns for Columnar Output: Parquet, Feather and Arrow IPC """
+
+import logging
+import re
+import sys
+
+from prismacloud.cli.records import infer_value_type, is_missing, to_text
+
+COLUMNAR_FORMATS = ["parquet", "feather", "arrow"]
+
+# The number of records of a batch (a row group in Parquet), which bounds memory use.
+ROWS_PER_BATCH = 100000
+
+# Text columns with few distinct values are dictionary encoded, as well as columns with these names.
+DICTIONARY_COLUMNS = re.compile(r"(?:^|\.)(?:severity|hostname|accountId|status|cloudType|region|policyType|type)$", re.I)
+DICTIONARY_RATIO = 0.5
+
+# The type of a column of datetimes.
+TIMESTAMP = "timestamp"
+
+
+def get_pyarrow():
+    """Import pyarrow, which the columnar output formats require"""
+    try:
+        import pyarrow  # pylint:disable=import-outside-toplevel
+    except ImportError:
+        logging.error("The parquet, feather and arrow output formats require pyarrow")
+        logging.error("Install it with: pip3 install -U 'prismacloud-cli[columnar]'")
+        sys.exit(1)
+    return pyarrow
+
+
+def get_value_type(series):
+    """
+    Return the type of the values of a column: bool, int, float or str (see infer_value_type), "timestamp" for
+    a column of datetimes, or None if all its values are missing
+    """
+    import pandas as pd  # pylint:disable=import-outside-toplevel
+
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return None if series.isna().all() else TIMESTAMP
+    values = series.tolist()
+    if all(is_missing(value) for value in values):
+        return None
+    return infer_value_type(values)
+
+
+def widen_type(value_type, other_type):
+    """Return a type for the values of two types: int and float widen to float, other different types to str"""
+    if value_type is None or value_type == other_type:
+        return other_type
+    if other_type is None:
+        return value_type
+    if {value_type, other_type} == {int, float}:
+        return float
+    return str
+
+
+def infer_type(values):
+    """Return the arrow type of a list of values: bool, int64 or float64 if all its values are, otherwise string"""
+    pa = get_pyarrow()
+    return {bool: pa.bool_(), int: pa.int64(), float: pa.float64()}.get(infer_value_type(values), pa.string())
+
+
+class ColumnarSchema:
+    """
+    The columns (and their types) of columnar output, inferred from all the batches of records: the type of a column
+    is the type of its values in every batch, widened when they differ (e.g. int to float, for 7 then 7.5), and
+    the columns that first appear in a later batch are empty in the previous ones. Datetimes are timestamps (in UTC).
+    Text columns that are dictionary encoded share one dictionary, which grows batch after batch.
+    """
+
+    def __init__(self, data_frame=None):
+        self.value_types = {}
+        self.dictionaries = {}
+        self.schema = None
+        if data_frame is not None:
+            self.add(data_frame)
+            self.build()
+
+    def add(self, data_frame):
+        """Add the columns, and the types of their values, of a batch of records"""
+        for index, name in enumerate(data_frame.columns):
+            series = data_frame.iloc[:, index]
+            value_type = get_value_type(series)
+            name = str(name)
+            if name not in self.dictionaries and value_type == str and self.use_dictionary(name, series.tolist()):
+                self.dictionaries[name] = {}
+            self.value_types[name] = widen_type(self.value_types.get(name), value_type)
+
+    def build(self):
+        """Set the schema, from the types of the columns of the batches added"""
+        pa = get_pyarrow()
+        types = {bool: pa.bool_(), int: pa.int64(), float: pa.float64(), TIMESTAMP: pa.timestamp("ms", tz="UTC")}
+        fields = []
+        for name, value_type in self.value_types.items():
+            if value_type in types:
+                fields.append(pa.field(name, types[value_type]))
+            elif name in self.dictionaries:
+                fields.append(pa.field(name, pa.dictionary(pa.int32(), pa.string())))
+            else:
+                fields.append(pa.field(name, pa.string()))
+        self.schema = pa.schema(fields)
+
+    @staticmethod
+    def use_dictionary(name, values):
+        """Return True if a text column repeats its values enough to be dictionary encoded"""
+        if isinstance(name, str) and DICTIONARY_COLUMNS.search(name):
+            return True
+        present_values = [value for value in values if value is not None]
+        return bool(present_values) and len(set(map(to_text, present_values))) <= len(present_values) * DICTIONARY_RATIO
+
+    def get_dictionary_indices(self, name, texts):
+        """Return the indices of texts in the dictionary of a column, adding the new ones, and -1 for None"""
+        dictionary = self.dictionaries[name]
+        indices = []
+        for text in texts:
+            if text is None:
+                indices.append(-1)
+                continue
+            if text not in dictionary:
+                dictionary[text] = len(dictionary)
+            indices.append(dictionary[text])
+        return indices
+
+    def to_array(self, field, series):
+        """Convert a column to an array of the type of the column. Raise ValueError if its values do not fit."""
+        import numpy as np  # pylint:disable=import-outside-toplevel
+        import pandas as pd  # pylint:disable=import-outside-toplevel
+
+        pa = get_pyarrow()
+        if pa.types.is_dictionary(field.type):
+            # Look up each distinct value once: missing values have the code -1, the last index.
+            try:
+                codes, uniques = pd.factorize(series)
+            except TypeError:
+                codes, uniques = pd.factorize(series.map(to_text))
+            texts = [to_text(value) for value in uniques.tolist()]
+            indices = np.asarray(self.get_dictionary_indices(field.name, texts) + [-1], dtype=np.int32)[codes]
+            dictionary = pa.array(list(self.dictionaries[field.name]), type=pa.string())
+            return pa.DictionaryArray.from_arrays(pa.array(indices, mask=indices < 0, type=pa.int32()), dictionary)
+        if pa.types.is_timestamp(field.type):
+            if not pd.api.types.is_datetime64_any_dtype(series):
+                series = pd.to_datetime(series.map(lambda value: None if is_missing(value) else value), utc=True)
+            return pa.array(series, from_pandas=True).cast(field.type)
+        if pa.types.is_string(field.type):
+            try:
+                return pa.array(series.to_numpy(dtype=object), type=pa.string(), from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                return pa.array([to_text(value) for value in series.tolist()], type=pa.string())
+        try:
+            if series.dtype != object:
+                return pa.array(series.to_numpy(), from_pandas=True).cast(field.type)
+            return pa.array([None if is_missing(value) else value for value in series.tolist()]).cast(field.type)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as exc:
+            raise ValueError("column %s has values that are not %s: %s" % (field.name, field.type, exc)) from exc
+
+    def to_batch(self, data_frame):
+        """Convert a batch of records to a record batch of the columns"""
+        import pandas as pd  # pylint:disable=import-outside-toplevel
+
+        pa = get_pyarrow()
+        arrays = []
+        columns = {str(name): index for index, name in enumerate(data_frame.columns)}
+        for field in self.schema:
+            if field.name in columns:
+                series = data_frame.iloc[:, columns[field.name]]
+            else:
+                series = pd.Series([None] * data_frame.shape[0], dtype=object)
+            arrays.append(self.to_array(field, series))
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
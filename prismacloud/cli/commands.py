@@ -0,0 +1,96 @@
+"""Command Manifest"""
+
+import importlib
+import os
+
+# The commands of the CLI, by name: the module defining the command (as 'cli'), and its short help.
+# Help and shell completion use this manifest, so they do not need to import any command module,
+# and running a command imports only its own module.
+# After adding or changing a command, regenerate it with: python -m prismacloud.cli.commands
+COMMANDS = {
+    "alert": (
+        "prismacloud.cli.cspm.cmd_alert",
+        "[CSPM] Returns a list of alerts that match the constraints specified in the query parameters.",
+    ),
+    "audits": ("prismacloud.cli.cwpp.cmd_audits", "[CWPP] Retrieve audits for Prisma Cloud"),
+    "batch": (
+        "prismacloud.cli.core.cmd_batch",
+        "[CLI] Run the commands of a plan (yaml format) in one process, each to its own file",
+    ),
+    "cache": ("prismacloud.cli.core.cmd_cache", "[CLI] Manage the cache of API responses (see --cache-ttl)"),
+    "check": ("prismacloud.cli.cspm.cmd_check", "[CSPM] Check and see if the Prisma Cloud API is up and running"),
+    "cloud": ("prismacloud.cli.cspm.cmd_cloud", "[CSPM] Lists all cloud accounts onboarded onto the Prisma Cloud platform"),
+    "compliance": (
+        "prismacloud.cli.cspm.cmd_compliance",
+        "[CSPM] Returns a list of alerts based on compliance related findings in Prisma Cloud.",
+    ),
+    "containers": ("prismacloud.cli.cwpp.cmd_containers", "[CWPP] Container scan reports."),
+    "credentials": ("prismacloud.cli.cwpp.cmd_credentials", "[CWPP] Returns the credentials"),
+    "current": ("prismacloud.cli.cspm.cmd_current", "[CSPM] Output details about the current user"),
+    "defenders": ("prismacloud.cli.cwpp.cmd_defenders", "[CWPP] Retrieves Defenders information."),
+    "discovery": ("prismacloud.cli.cwpp.cmd_discovery", "[CWPP] Returns a list of all cloud discovery scan results."),
+    "host_auto_deploy": ("prismacloud.cli.cwpp.cmd_host_auto_deploy", "[CSPM] Create host auto defend rules"),
+    "hosts": ("prismacloud.cli.cwpp.cmd_hosts", "[CWPP] Retrieves all host scan reports."),
+    "iam": ("prismacloud.cli.cspm.cmd_iam", "[IAM] Investiguate on the IAM Permissions."),
+    "images": ("prismacloud.cli.cwpp.cmd_images", "Deployed images scan reports"),
+    "incidents": ("prismacloud.cli.cwpp.cmd_incidents", "Retrieves a list of incidents that are not acknowledged."),
+    "intelligence": ("prismacloud.cli.cwpp.cmd_intelligence", "[CWPP] Output details about the intelligence stream"),
+    "inventory": (
+        "prismacloud.cli.cspm.cmd_inventory",
+        "[CSPM] Returns asset inventory pass/fail data for the specified time period.",
+    ),
+    "license": ("prismacloud.cli.cwpp.cmd_license", "[CWPP] Returns the license stats including the credit per defender"),
+    "licenses": ("prismacloud.cli.cspm.cmd_licenses", "[CSPM] Retrieve licences information"),
+    "logs": ("prismacloud.cli.cwpp.cmd_logs", "[CWPP] Retrieve logs for Prisma Cloud"),
+    "monitor": ("prismacloud.cli.cwpp.cmd_monitor", "[CWPP] Retrieves monitor data"),
+    "policies": ("prismacloud.cli.cwpp.cmd_policies", "[CWPP] Retrieve policies for the resources protected by Prisma Cloud"),
+    "policy": ("prismacloud.cli.cspm.cmd_policy", "[CSPM] Returns available policies, both system default and custom."),
+    "pov": ("prismacloud.cli.cspm.cmd_pov", "[CSPM] Set best practice settings for a project"),
+    "registry": ("prismacloud.cli.cwpp.cmd_registry", "[CWPP] Scan reports for images in your registry."),
+    "repositories": ("prismacloud.cli.pccs.cmd_repositories", "[APPSEC] Interact with repositories"),
+    "resource": (
+        "prismacloud.cli.cspm.cmd_resource",
+        "[CSPM] Returns detailed information for the resource with the given rrn.",
+    ),
+    "reviews": ("prismacloud.cli.pccs.cmd_reviews", "[APPSEC] Get Code review runs data"),
+    "rql": (
+        "prismacloud.cli.cspm.cmd_rql",
+        "[CSPM] Returns a list of alerts that match the constraints specified in the query parameters.",
+    ),
+    "saas_version": ("prismacloud.cli.cspm.cmd_saas_version", "[CSPM] Shows SaaS (CSPM and CWPP) version"),
+    "scans": (
+        "prismacloud.cli.cwpp.cmd_scans",
+        "[CWPP] Retrieves scan reports for images scanned by the Jenkins plugin or twistcli",
+    ),
+    "serve": ("prismacloud.cli.core.cmd_serve", "[CLI] Run a daemon that runs pc commands faster, in a long-lived process"),
+    "serverless_auto_deploy": ("prismacloud.cli.cwpp.cmd_serverless_auto_deploy", "[CSPM] Create serverless defend rules"),
+    "settings": ("prismacloud.cli.cwpp.cmd_settings", "[CWPP] Shows CWPP settings."),
+    "stats": ("prismacloud.cli.cwpp.cmd_stats", "[CWPP] Retrieve statistics for the resources protected by Prisma Cloud"),
+    "suppressions": ("prismacloud.cli.pccs.cmd_suppressions", "[APPSEC] List suppression rules"),
+    "tags": ("prismacloud.cli.cwpp.cmd_tags", "[CWPP] Retrieves a list of tags"),
+    "usage": ("prismacloud.cli.cspm.cmd_usage", "[CSPM] Retrieve credits usage information"),
+    "users": ("prismacloud.cli.cwpp.cmd_users", "[CWPP] Retrieves a list of all users"),
+    "version": ("prismacloud.cli.cwpp.cmd_version", "[CWPP] Shows CWPP version."),
+}
+
+COMMAND_FOLDERS = ["cwpp", "cspm", "pccs", "core"]
+
+
+def build_manifest():
+    """Build the manifest by importing every command module (cmd_*.py) of the command folders"""
+    manifest = {}
+    package_folder = os.path.dirname(os.path.abspath(__file__))
+    for folder in COMMAND_FOLDERS:
+        for filename in sorted(os.listdir(os.path.join(package_folder, folder))):
+            if filename.startswith("cmd_") and filename.endswith(".py"):
+                module_name = f"prismacloud.cli.{folder}.{filename[:-3]}"
+                command = importlib.import_module(module_name).cli
+                manifest[filename[4:-3]] = (module_name, command.get_short_help_str(limit=200))
+    return dict(sorted(manifest.items()))
+
+
+if __name__ == "__main__":
+    print("COMMANDS = {")
+    for name, (command_module, short_help) in build_manifest().items():
+        print(f"    {name!r}: ({command_module!r}, {short_help!r}),")
+    print("}")
@@ -0,0 +1,48 @@
+import logging
+import sys
+
+import click
+
+from prismacloud.cli import batch, cli_output
+from prismacloud.cli.api import setup_api
+
+
+@click.command("batch", short_help="[CLI] Run the commands of a plan (yaml format) in one process, each to its own file")
+@click.argument("plan", type=click.Path(exists=True, dir_okay=False))
+@click.option("--parallel", default=4, show_default=True, help="Number of commands to run at the same time")
+@click.option("--output-directory", "-d", default=".", help="Directory of the output files of the commands")
+def cli(plan, parallel, output_directory):
+    """
+    Run the commands of a plan in one process: they share the API client, its token, and the responses
+    of identical requests (such as policies), and run concurrently. Each writes its output to its own file.
+    The global options given before 'batch' (for example -c or --cache-ttl) apply to every command. Example plan:
+
+    \b
+    - name: policies
+      command: policy list
+      output: json
+    - command: alert list --status open
+      output: csv
+      columns: id,status,policy.name
+      filter: "`policy.severity` == 'high'"
+      file: reports/open-alerts.csv
+    - command: stats dashboard
+    """
+    try:
+        entries = batch.load_plan(plan, output_directory)
+    except (OSError, ValueError) as exc:
+        logging.error("Error reading the plan: %s", exc)
+        sys.exit(1)
+    root = click.get_current_context().find_root()
+    global_arguments = batch.get_global_arguments(root.command, root.params)
+    # Set up the API client (and accept the community supported message) before running the commands.
+    setup_api()
+    results = batch.run_plan(root.command, entries, global_arguments, parallel)
+    failed = [result["command"] for result in results if result["exit_code"]]
+    if failed:
+        logging.error("%s of %s commands failed: %s", len(failed), len(results), ", ".join(failed))
+    try:
+        cli_output(results)
+    finally:
+        if failed:
+            sys.exit(1)
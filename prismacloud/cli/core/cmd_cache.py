@@ -0,0 +1,33 @@
+import os
+from pathlib import Path
+
+import click
+
+from prismacloud.cli import cli_output, pass_environment
+from prismacloud.cli.response_cache import ResponseCache
+
+response_cache = ResponseCache(os.path.join(str(Path.home()), ".prismacloud", "cache"))
+
+
+@click.group("cache", short_help="[CLI] Manage the cache of API responses (see --cache-ttl)")
+@pass_environment
+def cli(ctx):
+    pass
+
+
+@click.command("stats", short_help="Show the number, size and age of cached API responses")
+def stats():
+    cli_output(response_cache.stats())
+
+
+@click.command("clear", short_help="Remove cached API responses")
+@click.option(
+    "--api", "api_family", type=click.Choice(["cspm", "cwpp", "code"]), help="Only remove the responses of this API"
+)
+def clear(api_family):
+    removed = response_cache.clear(api_family)
+    cli_output({"removed": removed})
+
+
+cli.add_command(stats)
+cli.add_command(clear)
@@ -0,0 +1,29 @@
+import logging
+import sys
+
+import click
+
+from prismacloud.cli import daemon
+
+
+@click.command("serve", short_help="[CLI] Run a daemon that runs pc commands faster, in a long-lived process")
+@click.option(
+    "--socket", "socket_path", help="Path of the daemon socket, defaults to ~/.prismacloud/daemon.sock (or PC_DAEMON_SOCKET)"
+)
+@click.option("--stop", is_flag=True, help="Stop the running daemon")
+def cli(socket_path, stop):
+    """
+    Run a daemon that keeps the API client, its token, the command modules and their dependencies loaded,
+    listening on a Unix domain socket. While it runs, pc forwards commands to it, with their arguments,
+    environment and standard streams. Set PC_NO_DAEMON=1 to run a command in its own process.
+    """
+    if stop:
+        if not daemon.stop(socket_path):
+            logging.error("No daemon is running.")
+            sys.exit(1)
+        return
+    try:
+        daemon.serve(socket_path)
+    except (OSError, RuntimeError) as exc:
+        logging.error("Error running the daemon: %s", exc)
+        sys.exit(1)
@@ -12,11 +12,6 @@ def convert_epoch_to_datetime(epoch_ms):
     return datetime.datetime.fromtimestamp(int(epoch_ms) / 1000)
 
 
-# Helper function to convert datetime to human-readable format
-def datetime_to_readable(dt):
-    return dt.strftime("%Y-%m-%d %H:%M:%S")
-
-
 @click.group(
     "alert", short_help="[CSPM] Returns a list of alerts that match the constraints specified in the query parameters."
 )
@@ -78,17 +73,24 @@ def list_alerts(
             if "dismissalUntilTs" in alert and convert_epoch_to_datetime(alert["dismissalUntilTs"]) < future_date
         ]
 
-    # Try to add a new column with a url to the alert investigate page
+    # We want to get the related policy information so fetch the policies
+    policies = pc_api.policy_list_read()
+
+    # Stream the alerts to the output, adding the url and policy information to each alert
+    cli_output(add_alert_details(alerts, policies))
+
+
+def add_alert_details(alerts, policies):
+    """Yield each alert with a url to the alert investigate page and the policy information"""
     base_url = f"https://{pc_api.api.replace('api', 'app')}/alerts/overview?viewId=default"
+    policies_by_id = {policy["policyId"]: policy for policy in policies}
 
+    logging.debug("Iterating through alerts and adding policy information")
     for alert in alerts:
+        # Try to add a new column with a url to the alert investigate page
         try:
             alert_id = alert["id"]
 
-            for key in ["firstSeen", "lastSeen", "alertTime", "lastUpdated", "eventOccurred", "dismissalUntilTs"]:
-                if key in alert:
-                    alert[key] = datetime_to_readable(convert_epoch_to_datetime(alert[key]))
-
             # Correctly using double braces for literal curly braces in f-string
             filters = (
                 f'{{"timeRange":{{"type":"to_now","value":"epoch"}},'
@@ -104,20 +106,14 @@ def list_alerts(
         except Exception:  # pylint:disable=broad-except
             pass
 
-    # We want to get the related policy information so fetch the policies
-    policies = pc_api.policy_list_read()
-
-    # Iterate through alerts and add the policy description
-    logging.debug("Iterating through alerts and adding policy information")
-    for alert in alerts:
-        for policy in policies:
-            if policy["policyId"] == alert["policyId"]:
-                alert["policy.name"] = policy["name"]
-                alert["policy.severity"] = policy["severity"]
-                alert["policy.description"] = policy["description"]
+        # Add the policy description
+        policy = policies_by_id.get(alert["policyId"])
+        if policy:
+            alert["policy.name"] = policy["name"]
+            alert["policy.severity"] = policy["severity"]
+            alert["policy.description"] = policy["description"]
+        yield alert
     logging.debug("Done iterating through alerts and adding policy information")
 
-    cli_output(alerts)
-
 
 cli.add_command(list_alerts)
@@ -2,7 +2,7 @@ import logging
 import click
 
 from prismacloud.cli import cli_output, pass_environment
-from prismacloud.cli.api import pc_api
+from prismacloud.cli.api import pc_api, exit_on_errors, fan_out
 
 
 class ComplianceHelper:
@@ -50,7 +50,6 @@ def cli(ctx):
 @click.option("--account-group", help="Account Group ID, e.g.: 'MyAccountGroup'")
 def compliance_exporter(compliance_standard, account_group):
     """Returns a list of alerts based on compliance related findings in Prisma Cloud."""
-    data = []
     helper = ComplianceHelper()
 
     logging.info("API - Starting compliance exporter ...")
@@ -62,39 +61,64 @@ def compliance_exporter(compliance_standard, account_group):
     # Get all requirements from compliance standard
     requirements = pc_api.compliance_standard_requirement_list_read(compliance_standard_id=standard["id"])
     logging.info("API - Requirements collected: %s", requirements)
-    for requirement in requirements:
-        # Get all sections from compliance standard
-        sections = pc_api.compliance_standard_requirement_section_list_read(compliance_requirement_id=requirement["id"])
-        logging.info("API - Sections collected: %s", sections)
-        for section in sections:
-
-            def get_results(requirement, section, scan_status: str):
-                """Helper function to get compliance findings"""
-                func_data = []
-                findings = helper.get_compliance_finding(
-                    standard["name"], requirement["name"], section["sectionId"], scan_status, account_group
-                )
-                for resource in findings:
-                    func_data = func_data + [
-                        {
-                            "standard_name": standard["name"],
-                            "requirement_name": requirement["name"],
-                            "requirement_id": requirement["requirementId"],
-                            "section_id": section["sectionId"],
-                            "account_name": resource["accountName"],
-                            "account_id": resource["accountId"],
-                            "cloud_type": resource["cloudType"],
-                            "rrn": resource.get("rrn", resource["id"]),
-                            "status": scan_status,
-                        }
-                    ]
-                return func_data
-
-            # Get finding results for given section of compliance standard
-            data = data + get_results(requirement, section, "failed")
-            data = data + get_results(requirement, section, "passed")
-
-    cli_output(data)
+
+    # Get all sections from compliance standard
+    sections_per_requirement, section_errors = fan_out(
+        [
+            (pc_api.compliance_standard_requirement_section_list_read, {"compliance_requirement_id": requirement["id"]})
+            for requirement in requirements
+        ],
+        label="Sections",
+    )
+    logging.info("API - Sections collected: %s", sections_per_requirement)
+
+    # Get failed and passed findings for each section of compliance standard
+    findings_specs = [
+        (requirement, section, scan_status)
+        for requirement, sections in zip(requirements, sections_per_requirement)
+        for section in sections or []
+        for scan_status in ["failed", "passed"]
+    ]
+    findings_per_spec, finding_errors = fan_out(
+        [
+            (
+                helper.get_compliance_finding,
+                {
+                    "standard": standard["name"],
+                    "compliance_requirement": requirement["name"],
+                    "compliance_section": section["sectionId"],
+                    "scan_status": scan_status,
+                    "account_group": account_group,
+                },
+            )
+            for requirement, section, scan_status in findings_specs
+        ],
+        label="Findings",
+    )
+
+    cli_output(get_finding_records(standard, findings_specs, findings_per_spec))
+    exit_on_errors(section_errors, finding_errors)
+
+
+def get_finding_records(standard, findings_specs, findings_per_spec):
+    """Return a record per resource of the findings of each (requirement, section, scan status)"""
+    data = []
+    for (requirement, section, scan_status), findings in zip(findings_specs, findings_per_spec):
+        for resource in findings or []:
+            data.append(
+                {
+                    "standard_name": standard["name"],
+                    "requirement_name": requirement["name"],
+                    "requirement_id": requirement["requirementId"],
+                    "section_id": section["sectionId"],
+                    "account_name": resource["accountName"],
+                    "account_id": resource["accountId"],
+                    "cloud_type": resource["cloudType"],
+                    "rrn": resource.get("rrn", resource["id"]),
+                    "status": scan_status,
+                }
+            )
+    return data
 
 
 cli.add_command(compliance_exporter)
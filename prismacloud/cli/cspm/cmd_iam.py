@@ -3,7 +3,7 @@ import logging
 import click
 
 from prismacloud.cli import cli_output, pass_environment
-from prismacloud.cli.api import pc_api
+from prismacloud.cli.api import pc_api, exit_on_errors, fan_out
 
 
 @click.group("iam", short_help="[IAM] Investiguate on the IAM Permissions.")
@@ -37,6 +37,8 @@ def azure_guest(details, amount, unit):
 
     config_result_list = pc_api.search_config_read(search_params=search_params)
 
+    # Get the permissions of each guest account concurrently
+    iam_specs = []
     for result in config_result_list:
         asset_id = result["assetId"]
         query = f"config from iam where source.cloud.resource.uai = '{asset_id}'"
@@ -45,8 +47,11 @@ def azure_guest(details, amount, unit):
         search_params["limit"] = 1000
         search_params["searchType"] = "iam"
         search_params["query"] = query
-        user_permissions = pc_api.search_iam_granter_to_dest(search_params=search_params)
-        for permission in user_permissions:
+        iam_specs.append((pc_api.search_iam_granter_to_dest, {"search_params": search_params}))
+    permissions_per_result, errors = fan_out(iam_specs)
+
+    for result, user_permissions in zip(config_result_list, permissions_per_result):
+        for permission in user_permissions or []:
             if permission["destCloudResourceName"] == "*":
                 data_entry = {
                     "name": result["name"],
@@ -63,6 +68,7 @@ def azure_guest(details, amount, unit):
                 data += [data_entry]
 
     cli_output(data)
+    exit_on_errors(errors)
 
 
 cli.add_command(azure_guest)
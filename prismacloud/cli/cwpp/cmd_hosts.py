@@ -2,7 +2,7 @@ import click
 import re
 
 from prismacloud.cli import cli_output, pass_environment
-from prismacloud.cli.api import pc_api
+from prismacloud.cli.api import pc_api, iter_compute_records
 
 
 @click.group("hosts", short_help="[CWPP] Retrieves all host scan reports.")
@@ -18,7 +18,7 @@ def report(compliance_ids=""):
     query_param = {"sort": "complianceRiskScore", "reverse": "true"}
     if compliance_ids:
         query_param = {"complianceIDs": compliance_ids, "sort": "complianceRiskScore", "reverse": "true"}
-    result = pc_api.hosts_list_read(query_param)
+    result = iter_compute_records("api/v1/hosts", query_param)
     cli_output(result)
 
 
@@ -1,7 +1,7 @@
 import click
 
 from prismacloud.cli import cli_output, pass_environment
-from prismacloud.cli.api import pc_api
+from prismacloud.cli.api import pc_api, iter_compute_records
 
 
 @click.group("images", short_help="Deployed images scan reports")
@@ -11,10 +11,10 @@ def cli(ctx):
 
 
 @click.command(name="list")
-@click.option("-l", "--limit")
-def list_(limit=50):
+@click.option("-l", "--limit", default=50, help="Limit the number of images to return. Default limit is 50")
+def list_(limit):
     """Deployed images scan reports"""
-    result = pc_api.images_list_read(query_params={"limit": limit})
+    result = iter_compute_records("api/v1/images", limit=limit)
     cli_output(result)
 
 
@@ -1,7 +1,7 @@
 import click
 import logging
 from prismacloud.cli import cli_output, pass_environment
-from prismacloud.cli.api import pc_api
+from prismacloud.cli.api import pc_api, iter_compute_records
 
 
 @click.group("incidents", short_help="Retrieves a list of incidents that are not acknowledged.")
@@ -46,9 +46,8 @@ def list_incidents(
         "to": to_date,
     }
 
-    result = pc_api.execute_compute("GET", "api/v1/audits/incidents", query_params=query_params, paginated=True)
-
-    logging.debug(f"Retrieved {len(result)} incidents")
+    # Stream the incidents to the output as they are retrieved
+    result = iter_compute_records("api/v1/audits/incidents", query_params=query_params)
     cli_output(result)
 
 
@@ -3,7 +3,7 @@ import logging
 import click
 
 from prismacloud.cli import cli_output, pass_environment
-from prismacloud.cli.api import pc_api
+from prismacloud.cli.api import pc_api, exit_on_errors, fan_out
 
 
 @click.group("stats", short_help="[CWPP] Retrieve statistics for the resources protected by Prisma Cloud")
@@ -90,43 +90,60 @@ def vulnerabilities(cve, collection, severity, cvss, resource_type, limit):
         results = pc_api.stats_vulnerabilities_read(
             {"limit": limit, "offset": 0, "severityThreshold": severity, "cvssThreshold": cvss}
         )
-        return cli_output(process_vulnerability_results(results, resource_type))
+        return output_vulnerability_results(results, resource_type)
 
     elif not cve and cvss:
         logging.debug("CVSS to search for: {cvss}")
         results = pc_api.stats_vulnerabilities_read({"limit": limit, "offset": 0, "cvssThreshold": cvss})
 
-        return cli_output(process_vulnerability_results(results, resource_type))
+        return output_vulnerability_results(results, resource_type)
 
     elif not cve and severity:
         logging.debug("Severity to search for: {severity}")
         results = pc_api.stats_vulnerabilities_read({"limit": limit, "offset": 0, "severityThreshold": severity})
-        return cli_output(process_vulnerability_results(results, resource_type))
+        return output_vulnerability_results(results, resource_type)
 
     elif cve:
         logging.debug("CVE to search for: {cve}")
         results = pc_api.stats_vulnerabilities_read({"limit": limit, "offset": 0, "cve": cve})
-        return cli_output(process_vulnerability_results(results, resource_type))
+        return output_vulnerability_results(results, resource_type)
+
+
+def output_vulnerability_results(results, resource_type):
+    """Output the impacted resources of the vulnerabilities, and exit with an error if they are incomplete"""
+    image_data, errors = process_vulnerability_results(results, resource_type)
+    cli_output(image_data)
+    exit_on_errors(errors)
 
 
 def process_vulnerability_results(results, resource_type):
     image_data = []
     tags = pc_api.tags_list_read()
+    vulnerabilities = []
     for result in results:
         for key in resource_type:
             if key in result and "vulnerabilities" in result[key]:
-                vulnerabilities = result[key]["vulnerabilities"]
-                with click.progressbar(vulnerabilities) as vulnerabilities_bar:
-                    for vulnerability in vulnerabilities_bar:
-                        logging.debug(f"Found CVE {vulnerability['cve']} from {vulnerability['impactedResourceType']}")
-                        image_data = search_impacted_resource_per_cve(vulnerability, tags, image_data)
-    return image_data
+                for vulnerability in result[key]["vulnerabilities"]:
+                    logging.debug(f"Found CVE {vulnerability['cve']} from {vulnerability['impactedResourceType']}")
+                    vulnerabilities.append(vulnerability)
 
-
-def search_impacted_resource_per_cve(vulnerability, tags, image_data):
-    resources = pc_api.stats_vulnerabilities_impacted_resoures_read(
-        {"cve": vulnerability["cve"], "resourceType": vulnerability["impactedResourceType"]}
+    # Search the impacted resources for each CVE concurrently
+    impacted_resources, errors = fan_out(
+        [
+            (
+                pc_api.stats_vulnerabilities_impacted_resoures_read,
+                {"query_params": {"cve": vulnerability["cve"], "resourceType": vulnerability["impactedResourceType"]}},
+            )
+            for vulnerability in vulnerabilities
+        ]
     )
+    for vulnerability, resources in zip(vulnerabilities, impacted_resources):
+        if resources:
+            image_data = search_impacted_resource_per_cve(vulnerability, resources, tags, image_data)
+    return image_data, errors
+
+
+def search_impacted_resource_per_cve(vulnerability, resources, tags, image_data):
 
     # Function to create image_info with optional tag name
     def add_prisma_cloud_tags(base_info, tags):
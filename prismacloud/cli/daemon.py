@@ -0,0 +1,264 @@
+""" Command Daemon, and the Front-End forwarding Commands to it """
+
+import atexit
+import importlib
+import json
+import logging
+import os
+import signal
+import socket
+import sys
+import traceback
+from pathlib import Path
+
+import prismacloud.cli.version as cli_version
+
+# Set this environment variable to run commands in process, even when a daemon is running.
+DAEMON_DISABLE_VARIABLE = "PC_NO_DAEMON"
+
+# Set this environment variable to use another socket than ~/.prismacloud/daemon.sock
+DAEMON_SOCKET_VARIABLE = "PC_DAEMON_SOCKET"
+
+# The maximum size of a forwarded command (arguments, environment and working directory).
+MAX_REQUEST_SIZE = 1024 * 1024
+
+
+def get_socket_path():
+    """Return the path of the daemon socket"""
+    return os.environ.get(DAEMON_SOCKET_VARIABLE) or os.path.join(str(Path.home()), ".prismacloud", "daemon.sock")
+
+
+def daemon_supported():
+    """Return True if this platform supports the daemon: Unix domain sockets, passing file descriptors, and fork"""
+    return hasattr(socket, "AF_UNIX") and hasattr(socket, "send_fds") and hasattr(os, "fork")
+
+
+def connect(socket_path):
+    """Return a socket connected to the daemon, or None if no daemon is running"""
+    if not os.path.exists(socket_path):
+        return None
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(socket_path)
+    except OSError:
+        connection.close()
+        return None
+    return connection
+
+
+def read_messages(connection):
+    """Yield the messages (one JSON document per line) sent on a connection"""
+    with connection.makefile("r", encoding="utf-8") as reader:
+        for line in reader:
+            yield json.loads(line)
+
+
+def send_message(connection, message):
+    """Send a message (one JSON document per line) on a connection"""
+    connection.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+
+""" Front-End """
+
+
+def forward(argv):
+    """
+    Run a command in the daemon, with the environment, working directory and standard streams of this process.
+    Return the exit code of the command, or None if there is no daemon and the command must run in this process.
+    """
+    if not daemon_supported() or os.environ.get(DAEMON_DISABLE_VARIABLE) or "serve" in argv:
+        return None
+    connection = connect(get_socket_path())
+    if connection is None:
+        return None
+    request = {"version": cli_version.version, "argv": argv, "env": dict(os.environ), "cwd": os.getcwd()}
+    pid = None
+    with connection:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            # Pass the standard streams themselves, so the command writes directly to them.
+            socket.send_fds(connection, [json.dumps(request).encode("utf-8") + b"\n"], [0, 1, 2])
+            for message in read_messages(connection):
+                if "error" in message:
+                    logging.debug("The daemon did not run the command: %s", message["error"])
+                    return None
+                pid = message.get("pid", pid)
+                if "exit" in message:
+                    return message["exit"]
+        except KeyboardInterrupt:
+            if pid:
+                os.kill(pid, signal.SIGINT)
+            return 130
+        except (OSError, ValueError) as exc:
+            logging.debug("Error forwarding the command to the daemon: %s", exc)
+    # Once the daemon has started the command, running it again in this process could repeat its changes.
+    return None if pid is None else 1
+
+
+def main():
+    """Entry point of pc: run the command in the daemon if one is running, otherwise in this process"""
+    exit_code = forward(sys.argv[1:])
+    if exit_code is not None:
+        sys.exit(exit_code)
+    from prismacloud.cli import cli  # pylint:disable=import-outside-toplevel
+
+    cli()  # pylint:disable=no-value-for-parameter
+
+
+""" Daemon """
+
+
+def preload():
+    """Import the command modules and heavy dependencies, and set up and log in the API client, once"""
+    # pylint:disable=import-outside-toplevel
+    from prismacloud.cli import api, get_pandas, get_settings
+    from prismacloud.cli.commands import COMMANDS
+
+    get_pandas()
+    get_settings()
+    for module_name in ["coloredlogs", "tabulate"]:
+        importlib.import_module(module_name)
+    for module_name, _short_help in COMMANDS.values():
+        importlib.import_module(module_name)
+    client = api.setup_api()
+    try:
+        if not client.token:
+            if client.api:
+                client.login()
+            else:
+                client.login_compute()
+    except (Exception, SystemExit) as exc:  # pylint:disable=broad-except
+        logging.warning("Error logging in, commands will log in when they run: %s", exc)
+
+
+def run_command(request):
+    """Run a forwarded command in this (forked) process, and return its exit code"""
+    # pylint:disable=import-outside-toplevel
+    from prismacloud.cli import api, cli, get_settings
+
+    os.chdir(request["cwd"])
+    os.environ.clear()
+    os.environ.update(request["env"])
+    get_settings.cache_clear()
+    # The standard streams are the ones of the front-end now.
+    sys.stdin = open(0, "r", encoding="utf-8", closefd=False)  # pylint:disable=consider-using-with
+    sys.stdout = open(1, "w", encoding="utf-8", buffering=1 if os.isatty(1) else -1, closefd=False)  # pylint:disable=R1732
+    sys.stderr = open(2, "w", encoding="utf-8", buffering=1, closefd=False)  # pylint:disable=consider-using-with
+    api.session_pool.reset()
+    # Use the latest token, another command may have refreshed it.
+    api.token_cache.load(api.api_client)
+    try:
+        cli.main(args=request["argv"], prog_name="pc")  # pylint:disable=no-value-for-parameter,unexpected-keyword-arg
+        exit_code = 0
+    except SystemExit as exc:
+        if exc.code is None or isinstance(exc.code, int):
+            exit_code = exc.code or 0
+        else:
+            sys.stderr.write(f"{exc.code}\n")
+            exit_code = 1
+    except Exception:  # pylint:disable=broad-except
+        traceback.print_exc()
+        exit_code = 1
+    # Run the exit handlers (cache and statistics) of the command, as the interpreter would.
+    atexit._run_exitfuncs()  # pylint:disable=protected-access
+    sys.stdout.flush()
+    sys.stderr.flush()
+    return exit_code
+
+
+def handle(connection):
+    """
+    Handle a connection: fork a process to run the forwarded command, and let it report its exit code.
+    Return False if the daemon was asked to stop.
+    """
+    data, fds, _flags, _address = socket.recv_fds(connection, MAX_REQUEST_SIZE, 3)
+    while data and not data.endswith(b"\n") and len(data) < MAX_REQUEST_SIZE:
+        chunk = connection.recv(MAX_REQUEST_SIZE)
+        if not chunk:
+            break
+        data += chunk
+    try:
+        request = json.loads(data)
+        if request.get("stop"):
+            send_message(connection, {"exit": 0})
+            return False
+        if request.get("version") != cli_version.version:
+            send_message(connection, {"error": "version %s, expected %s" % (request.get("version"), cli_version.version)})
+            return True
+        if len(fds) != 3:
+            send_message(connection, {"error": "expected the standard streams of the command"})
+            return True
+        if os.fork():
+            return True
+        # Forked process: run the command with the standard streams of the front-end, then report its exit code.
+        exit_code = 1
+        try:
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            for target, fd in enumerate(fds):
+                os.dup2(fd, target)
+            send_message(connection, {"pid": os.getpid()})
+            exit_code = run_command(request)
+            send_message(connection, {"exit": exit_code})
+        finally:
+            os._exit(exit_code)  # pylint:disable=protected-access
+    except (OSError, ValueError) as exc:
+        logging.error("Error handling a command: %s", exc)
+    finally:
+        for fd in fds:
+            os.close(fd)
+    return True
+
+
+def stop(socket_path=None):
+    """Ask the daemon to stop, return False if no daemon is running"""
+    connection = connect(socket_path or get_socket_path())
+    if connection is None:
+        return False
+    with connection:
+        send_message(connection, {"stop": True})
+        for _message in read_messages(connection):
+            break
+    return True
+
+
+def serve(socket_path=None):
+    """Listen on the daemon socket, and run the forwarded commands in forked processes, until stopped"""
+    socket_path = socket_path or get_socket_path()
+    if not daemon_supported():
+        raise RuntimeError("The daemon is not supported on this platform")
+    connection = connect(socket_path)
+    if connection is not None:
+        connection.close()
+        raise RuntimeError("A daemon is already listening on: %s" % socket_path)
+    if os.path.exists(socket_path):
+        # Left by a daemon that did not stop cleanly.
+        os.unlink(socket_path)
+    preload()
+    os.makedirs(os.path.dirname(socket_path), mode=0o700, exist_ok=True)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # Only this user can connect to the socket, and run commands with its credentials.
+    umask = os.umask(0o177)
+    try:
+        server.bind(socket_path)
+    finally:
+        os.umask(umask)
+    server.listen(64)
+    # Forked processes are reaped automatically, and a stop signal removes the socket.
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda _signal, _frame: sys.exit(0))
+    logging.info("Listening on: %s", socket_path)
+    try:
+        running = True
+        while running:
+            connection, _address = server.accept()
+            with connection:
+                running = handle(connection)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        os.unlink(socket_path)
+        logging.info("Stopped listening on: %s", socket_path)
@@ -0,0 +1,200 @@
+""" SQLite Tables of Records """
+
+import logging
+import re
+import sqlite3
+
+from prismacloud.cli.records import infer_value_type, is_missing, to_text
+
+SQLITE_OUTPUT_PREFIX = "sqlite:"
+
+# Columns (the last part of a flattened name) that are indexed, to look records up quickly.
+INDEXED_COLUMNS = ["id", "policyid", "cve", "hostname", "accountid"]
+
+# The number of records inserted in a transaction.
+ROWS_PER_TRANSACTION = 100000
+
+SQL_TYPES = {bool: "INTEGER", int: "INTEGER", float: "REAL", str: "TEXT"}
+
+# The table of the records of a command, in a --sql query.
+QUERY_TABLE = "result"
+
+# Tables that a --sql query can join with the records of a command, by the method of the API client listing their
+# records. They are loaded only when the query uses them (FROM or JOIN the table).
+REFERENCE_TABLES = {
+    "policies": "policy_list_read",
+    "cloud_accounts": "cloud_accounts_list_read",
+    "tags": "tags_list_read",
+}
+
+
+def parse_sqlite_output(output):
+    """Return the path and the table (or None) of a sqlite:PATH[:TABLE] output"""
+    target = output.partition(":")[2]
+    match = re.fullmatch(r"(.+):(\w+)", target)
+    # A single letter before a colon is a Windows drive, e.g. sqlite:C:\data\pc.db
+    if match and len(match.group(1)) > 1:
+        return match.group(1), match.group(2)
+    return target, None
+
+
+def get_table_name(text):
+    """Return a table name for a text, such as the command, e.g. alert_list"""
+    return re.sub(r"\W+", "_", text).strip("_") or "records"
+
+
+def quote_identifier(name):
+    """Quote the name of a table, a column or an index"""
+    return '"%s"' % str(name).replace('"', '""')
+
+
+def connect(path):
+    """Open a SQLite database, set up for bulk inserts"""
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+def to_sql_values(values, sql_type):
+    """Convert the values of a column: lists and dictionaries to JSON, and missing numbers to NULL"""
+    if sql_type == "TEXT":
+        return [to_text(value) for value in values]
+    return [None if is_missing(value) else value if isinstance(value, (int, float)) else to_text(value) for value in values]
+
+
+class RecordTable:
+    """
+    A table of records in a SQLite database, with a column per (flattened) field, created or extended as fields appear.
+    Records are inserted in batches inside transactions, and appended, or with a key (a column, with a unique index),
+    a record replaces the record with the same key, so that exporting again updates the table.
+    """
+
+    def __init__(self, connection, name, key=None):
+        self.connection = connection
+        self.name = name
+        self.columns = {row[1]: row[2] for row in connection.execute("PRAGMA table_info(%s)" % quote_identifier(name))}
+        self.key_name = key
+        self.key = None
+        self.key_checked = False
+        self.pending_rows = 0
+
+    def get_column_values(self, data_frame):
+        """
+        Return the values of the columns of a data frame, by the name of their column in the table.
+        As SQLite column names are case-insensitive, columns that differ only in case (e.g. Name and name) are one column:
+        the column of the table if it exists, and their values are merged (the value of the first column, if set).
+        """
+        table_columns = {column.lower(): column for column in self.columns}
+        column_values = {}
+        for index, column in enumerate(data_frame.columns):
+            name = table_columns.setdefault(str(column).lower(), str(column))
+            values = data_frame.iloc[:, index].tolist()
+            if name in column_values:
+                values = [value if is_missing(other) else other for other, value in zip(column_values[name], values)]
+            column_values[name] = values
+        return column_values
+
+    def add_columns(self, column_values):
+        """Create the table, or add the columns it does not have yet, with the type of their values"""
+        new_columns = {}
+        for column, values in column_values.items():
+            if column not in self.columns:
+                new_columns[column] = SQL_TYPES[infer_value_type(values)]
+        if not new_columns:
+            return
+        definitions = ["%s %s" % (quote_identifier(column), sql_type) for column, sql_type in new_columns.items()]
+        if not self.columns:
+            self.connection.execute("CREATE TABLE %s (%s)" % (quote_identifier(self.name), ", ".join(definitions)))
+        else:
+            for definition in definitions:
+                self.connection.execute("ALTER TABLE %s ADD COLUMN %s" % (quote_identifier(self.name), definition))
+        self.columns.update(new_columns)
+
+    def create(self, columns=("id",)):
+        """Create the table if it does not exist yet (when there are no records), with these columns (at least one)"""
+        if not self.columns:
+            definitions = ", ".join(quote_identifier(column) for column in columns)
+            self.connection.execute("CREATE TABLE IF NOT EXISTS %s (%s)" % (quote_identifier(self.name), definitions))
+            self.columns = {column: "" for column in columns}
+
+    def set_key(self):
+        """
+        Use the key column as the key of the records, with a unique index.
+        Raise sqlite3.IntegrityError if the table already has records with the same key.
+        """
+        self.key_checked = True
+        if self.key_name is None:
+            return
+        # Column names are case-insensitive.
+        key = next((column for column in self.columns if column.lower() == self.key_name.lower()), None)
+        if key is None:
+            logging.warning("Records have no column %s, they are appended to table %s", self.key_name, self.name)
+            return
+        try:
+            self.connection.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS %s ON %s (%s)"
+                % (
+                    quote_identifier("%s_%s_key" % (self.name, key)),
+                    quote_identifier(self.name),
+                    quote_identifier(key),
+                )
+            )
+        except sqlite3.IntegrityError as exc:
+            raise sqlite3.IntegrityError("table has records with the same %s: %s" % (key, exc)) from exc
+        self.key = key
+
+    def insert(self, data_frame):
+        """Insert (or replace, by key) the records of a data frame"""
+        if data_frame.shape[1] == 0:
+            return
+        column_values = self.get_column_values(data_frame)
+        self.add_columns(column_values)
+        if data_frame.shape[0] == 0:
+            return
+        if not self.key_checked:
+            self.set_key()
+        columns = list(column_values)
+        values = [to_sql_values(column_values[column], self.columns[column]) for column in columns]
+        statement = "INSERT INTO %s (%s) VALUES (%s)" % (
+            quote_identifier(self.name),
+            ", ".join(quote_identifier(column) for column in columns),
+            ", ".join("?" for _column in columns),
+        )
+        if self.key in columns:
+            updates = ["%s = excluded.%s" % (quote_identifier(column), quote_identifier(column)) for column in columns]
+            statement += " ON CONFLICT (%s) DO UPDATE SET %s" % (quote_identifier(self.key), ", ".join(updates))
+        self.connection.executemany(statement, zip(*values))
+        self.pending_rows += data_frame.shape[0]
+        if self.pending_rows >= ROWS_PER_TRANSACTION:
+            self.connection.commit()
+            self.pending_rows = 0
+
+    def create_indexes(self):
+        """Index the columns of common keys, e.g. policyId or resource.accountId"""
+        for column in self.columns:
+            if column != self.key and column.split(".")[-1].lower() in INDEXED_COLUMNS:
+                self.connection.execute(
+                    "CREATE INDEX IF NOT EXISTS %s ON %s (%s)"
+                    % (quote_identifier("%s_%s" % (self.name, column)), quote_identifier(self.name), quote_identifier(column))
+                )
+
+    def close(self):
+        """Index the table, and commit the last records"""
+        self.create_indexes()
+        self.connection.commit()
+
+
+def get_reference_tables(query):
+    """Return the reference tables that a query selects from or joins"""
+    names = {name.lower() for name in re.findall(r"\b(?:from|join)\s+[\"`\[]?(\w+)", query, re.I)}
+    return [name for name in REFERENCE_TABLES if name in names]
+
+
+def run_query(connection, query):
+    """Run a query, and return its result as a data frame"""
+    import pandas as pd  # pylint:disable=import-outside-toplevel
+
+    cursor = connection.execute(query)
+    columns = [column[0] for column in cursor.description or []]
+    return pd.DataFrame.from_records(cursor.fetchall(), columns=columns)
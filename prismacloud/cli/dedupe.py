@@ -0,0 +1,82 @@
+""" Removal of Duplicate Records, by Row Hash or by Key """
+
+import json
+from collections import OrderedDict
+
+# The maximum number of keys remembered to remove duplicates from streaming output, so memory use is bounded.
+MAX_SEEN_KEYS = 100000
+
+NESTED_TYPES = (dict, list, tuple)
+
+
+class SeenKeys:
+    """The keys of the records written so far, forgetting the oldest ones beyond max_size"""
+
+    def __init__(self, max_size=MAX_SEEN_KEYS):
+        self.max_size = max_size
+        self.keys = OrderedDict()
+
+    def add(self, key):
+        """Remember a key, and return True if it was seen before"""
+        if key in self.keys:
+            return True
+        self.keys[key] = None
+        if len(self.keys) > self.max_size:
+            self.keys.popitem(last=False)
+        return False
+
+
+def get_key_column(data_frame, key):
+    """Return the column of a key, if every row has a (scalar) value in it, otherwise None"""
+    if key not in data_frame.columns or data_frame[key].ndim != 1:
+        return None
+    values = data_frame[key]
+    if values.dtype == object and any(isinstance(value, NESTED_TYPES) for value in values.tolist()):
+        return None
+    if (values.isna() | (values == "")).any():
+        return None
+    return values
+
+
+def get_row_keys(data_frame, key=None):
+    """
+    Return a key for each row of a data frame: the hash of its values (as they are, without converting them to text,
+    except lists and dictionaries, which are hashed as text), or the value of the key column, if one is given.
+    """
+    import pandas as pd  # pylint:disable=import-outside-toplevel
+
+    if key is not None:
+        key_column = get_key_column(data_frame, key)
+        if key_column is not None:
+            return key_column
+    hashable_columns = {}
+    for index in range(data_frame.shape[1]):
+        series = data_frame.iloc[:, index]
+        if series.dtype == object and any(isinstance(value, NESTED_TYPES) for value in series.tolist()):
+            series = series.map(lambda value: str(value) if isinstance(value, NESTED_TYPES) else value)
+        hashable_columns[index] = series
+    return pd.util.hash_pandas_object(pd.DataFrame(hashable_columns, index=data_frame.index), index=False)
+
+
+def drop_duplicate_rows(data_frame, seen_keys=None, key=None):
+    """
+    Drop the rows of a data frame that duplicate a previous row, or (with seen_keys) a row of a previous page
+    of streaming output. Rows are compared by the hash of their values, or by the key column, if one is given
+    (as IDs do not always identify records: rows of compliance checks share the ID of the check, for example).
+    """
+    if data_frame.shape[1] == 0 or data_frame.shape[0] == 0:
+        return data_frame
+    keys = get_row_keys(data_frame, key)
+    if seen_keys is None:
+        return data_frame[~keys.duplicated().to_numpy()]
+    duplicated = [seen_keys.add(key) for key in keys.tolist()]
+    return data_frame[[not duplicate for duplicate in duplicated]]
+
+
+def get_record_key(record, key=None):
+    """Return a key for a (flattened) record of streaming output: the hash of its values, or its value of the key"""
+    if key is not None:
+        value = record.get(key)
+        if value not in (None, "") and not isinstance(value, NESTED_TYPES):
+            return (key, value)
+    return hash(json.dumps(record, sort_keys=True, default=str))
@@ -0,0 +1,72 @@
+""" Output Files, Compressed by Extension """
+
+import gzip
+import io
+import logging
+import os
+import sys
+
+# The output format of a file, by extension (after a compression extension, e.g. alerts.csv.gz).
+# .arrow is the Arrow IPC file format (Feather), and .arrows the Arrow IPC streaming format.
+FILE_FORMATS = {
+    ".csv": "csv",
+    ".json": "json",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    ".parquet": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather",
+    ".arrows": "arrow",
+}
+
+# The compression of a file, by extension.
+COMPRESSIONS = {".gz": "gzip", ".zst": "zstd"}
+
+# Write (and compress) output in large chunks, rather than line by line.
+BUFFER_SIZE = 1024 * 1024
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def split_extensions(path):
+    """Return the format extension and the compression extension (or None) of a path, e.g. .csv and .gz"""
+    root, extension = os.path.splitext(path.lower())
+    if extension in COMPRESSIONS:
+        return os.path.splitext(root)[1], extension
+    return extension, None
+
+
+def get_file_format(path, default=None):
+    """Return the output format of a file from its extension, or the default format if the extension is unknown"""
+    return FILE_FORMATS.get(split_extensions(path)[0], default)
+
+
+def get_zstandard():
+    """Import zstandard, which zstd compressed output files require"""
+    try:
+        import zstandard  # pylint:disable=import-outside-toplevel
+    except ImportError:
+        logging.error("Output files compressed with zstd (.zst) require zstandard")
+        logging.error("Install it with: pip3 install -U 'prismacloud-cli[zstd]'")
+        sys.exit(1)
+    return zstandard
+
+
+def open_output_file(path):
+    """
+    Open an output file for writing, compressed with gzip (.gz) or zstd (.zst) according to its extension.
+    Return a buffered text stream, whose buffer attribute is the binary stream (for binary formats).
+    """
+    compression = COMPRESSIONS.get(split_extensions(path)[1])
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if compression == "gzip":
+        stream = io.BufferedWriter(gzip.GzipFile(path, "wb", compresslevel=GZIP_LEVEL), buffer_size=BUFFER_SIZE)
+    elif compression == "zstd":
+        compressor = get_zstandard().ZstdCompressor(level=ZSTD_LEVEL)
+        stream = io.BufferedWriter(compressor.stream_writer(open(path, "wb")), buffer_size=BUFFER_SIZE)
+    else:
+        stream = open(path, "wb", buffering=BUFFER_SIZE)  # pylint:disable=consider-using-with
+    return io.TextIOWrapper(stream, encoding="utf-8", newline="")
@@ -0,0 +1,134 @@
+""" Concurrent Pagination of the Prisma Cloud Compute API """
+
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import click
+
+# The maximum page size of the Compute API.
+COMPUTE_PAGE_LIMIT = 50
+
+# The key of the click context meta that marks the output of a command as incomplete.
+INCOMPLETE_OUTPUT = "prismacloud.cli.incomplete_output"
+
+
+class PageError(Exception):
+    """A page request of a forced (best effort) request failed"""
+
+
+def request_compute_page(client, request, endpoint, query_params, offset, force=False):
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """Request one page of results, return (page, total count), where the total count is None if unknown"""
+    if not client.token:
+        client.login_compute()
+    if int(time.time() - client.token_timer) > client.token_limit:
+        client.extend_login_compute()
+    url = "https://%s/%s" % (client.api_compute, endpoint)
+    request_headers = {"Content-Type": "application/json", "User-Agent": client.user_agent}
+    if client.api:
+        # Authenticate via CSPM
+        request_headers["x-redlock-auth"] = client.token
+    else:
+        # Authenticate via CWP
+        request_headers["Authorization"] = "Bearer %s" % client.token
+    params = dict(query_params or {})
+    params.update({"limit": COMPUTE_PAGE_LIMIT, "offset": offset})
+    logging.debug("API URL: %s, Offset: %s", url, offset)
+    api_response = request("GET", url, headers=request_headers, params=params, verify=client.verify, timeout=client.timeout)
+    if not api_response.ok:
+        logging.error(
+            "API: (%s) responded with a status of: (%s), with query: (%s)", url, api_response.status_code, query_params
+        )
+        if force:
+            raise PageError("status %s" % api_response.status_code)
+        client.error_and_exit(
+            api_response.status_code,
+            "API: (%s) with query params: (%s) responded with an error and this response:\n%s"
+            % (url, query_params, api_response.text),
+        )
+    if not api_response.content:
+        return None, None
+    try:
+        page = json.loads(api_response.content)
+    except ValueError:
+        if force:
+            raise PageError("invalid JSON, status %s" % api_response.status_code)  # pylint:disable=raise-missing-from
+        client.error_and_exit(api_response.status_code, "JSON raised ValueError, API: (%s) parsing response" % url)
+    total_count = api_response.headers.get("Total-Count")
+    return page, int(total_count) if total_count is not None else None
+
+
+def iter_compute_pages(client, request, endpoint, query_params=None, force=False, concurrency=8):
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """
+    Yield the pages of a paginated Compute API GET request, in order.
+    Use the Total-Count of the first page to request the other pages concurrently,
+    or request the pages one after another when the total count is unknown.
+    With force, stop at the first page that fails, and mark the output as incomplete.
+    """
+    endpoint = endpoint.rstrip("?")
+    request_page = partial(request_compute_page, client, request, endpoint, query_params, force=force)
+    try:
+        page, total_count = request_page(0)
+        if page is None:
+            return
+        yield page
+        if not isinstance(page, list):
+            return
+        if total_count is not None:
+            yield from iter_concurrent_pages(request_page, total_count, concurrency)
+        else:
+            yield from iter_sequential_pages(request_page, page)
+    except PageError as exc:
+        mark_incomplete_output(endpoint, exc)
+
+
+def iter_concurrent_pages(request_page, total_count, concurrency):
+    """Yield the pages after the first page, in order, requesting them concurrently"""
+    offsets = range(COMPUTE_PAGE_LIMIT, total_count, COMPUTE_PAGE_LIMIT)
+    logging.debug(
+        "Requesting %s more pages (Total-Count: %s) with a concurrency of %s", len(offsets), total_count, concurrency
+    )
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # Keep a bounded window of pages in flight, so results are yielded in order without holding them all.
+        futures = []
+        offsets = iter(offsets)
+        for offset in offsets:
+            futures.append(executor.submit(request_page, offset))
+            if len(futures) >= concurrency * 2:
+                break
+        try:
+            while futures:
+                page, _total_count = futures.pop(0).result()
+                offset = next(offsets, None)
+                if offset is not None:
+                    futures.append(executor.submit(request_page, offset))
+                if page:
+                    yield page
+        finally:
+            # Do not request the pages of the window if a page failed, or if the caller stopped (e.g. at a limit).
+            for future in futures:
+                future.cancel()
+
+
+def iter_sequential_pages(request_page, page):
+    """Yield the pages after the first page, continuing while pages are full, and stopping if the endpoint does not page"""
+    offset = 0
+    while len(page) == COMPUTE_PAGE_LIMIT:
+        offset += COMPUTE_PAGE_LIMIT
+        previous_page = page
+        page, _total_count = request_page(offset)
+        if not isinstance(page, list) or not page or page == previous_page:
+            return
+        yield page
+
+
+def mark_incomplete_output(endpoint, error):
+    """Log that the pages of a forced request are incomplete, and make the command exit with an error after its output"""
+    logging.error("Requesting the pages of %s failed (%s), the output is incomplete.", endpoint, error)
+    context = click.get_current_context(silent=True)
+    if context is not None:
+        context.meta[INCOMPLETE_OUTPUT] = True
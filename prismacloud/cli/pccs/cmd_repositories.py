@@ -3,7 +3,7 @@ import logging
 import click
 
 from prismacloud.cli import cli_output, pass_environment
-from prismacloud.cli.api import pc_api
+from prismacloud.cli.api import pc_api, exit_on_errors, fan_out
 
 
 class MyHelper:
@@ -136,40 +136,63 @@ def global_search(integration_type, details, repo, max, full_details):
     else:
         repositories = pc_api.repositories_list_read_v2(query_params={"errorsCount": "true"})
 
-    i = 1
-    with click.progressbar(repositories["repositories"]) as repositories_bar:
-        for repository in repositories_bar:
-            logging.debug(f"API - Search across all repositories ...{repository}")
-            if repository["lastScanDate"] is not None and repository["source"] in integration_type:
-                logging.info(
-                    "ID for the repository %s, Name of the Repository to scan: %s, Type=%s, \
-                        default branch=%s, repo_full_name=%s",
-                    repository["id"],
-                    repository["repository"],
-                    repository["source"],
-                    repository["defaultBranch"],
-                    repository["fullRepositoryName"],
-                )
-
-                parameters = {
-                    "filters": {
-                        "repositories": [repository["id"]],
-                        "branch": repository["scannedBranch"],
-                        "checkStatus": "Error",
-                    },
-                    "offset": 0,
-                    "search": {"scopes": [], "term": ""},
-                    "sortBy": [{"key": "Count", "direction": "DESC"}, {"key": "Severity", "direction": "DESC"}],
-                }
+    candidates = repositories["repositories"][:max] if max > 0 else repositories["repositories"]
+    scanned_repositories = []
+    for repository in candidates:
+        logging.debug(f"API - Search across all repositories ...{repository}")
+        if repository["lastScanDate"] is not None and repository["source"] in integration_type:
+            logging.info(
+                "ID for the repository %s, Name of the Repository to scan: %s, Type=%s, \
+                    default branch=%s, repo_full_name=%s",
+                repository["id"],
+                repository["repository"],
+                repository["source"],
+                repository["defaultBranch"],
+                repository["fullRepositoryName"],
+            )
+            scanned_repositories.append(repository)
 
-                impacted_resources = pc_api.resources_list(body_params=parameters)
+    # Get the impacted resources of each repository concurrently
+    impacted_resources_per_repository, repository_errors = fan_out(
+        [
+            (
+                pc_api.resources_list,
+                {
+                    "body_params": {
+                        "filters": {
+                            "repositories": [repository["id"]],
+                            "branch": repository["scannedBranch"],
+                            "checkStatus": "Error",
+                        },
+                        "offset": 0,
+                        "search": {"scopes": [], "term": ""},
+                        "sortBy": [{"key": "Count", "direction": "DESC"}, {"key": "Severity", "direction": "DESC"}],
+                    }
+                },
+            )
+            for repository in scanned_repositories
+        ],
+        label="Repositories",
+    )
+    impacted_resources = [
+        (repository, resource)
+        for repository, repository_resources in zip(scanned_repositories, impacted_resources_per_repository)
+        if repository_resources
+        for resource in repository_resources["data"]
+    ]
 
-                for resource in impacted_resources["data"]:
-                    logging.info("API - resource impacted: %s", resource["filePath"])
-                    # if details and resource["codeCategory"] in types:
-                    if details or full_details:
-                        logging.info("API - Imapcted resource: %s", resource)
-                        parameters = {
+    # Get the details of each impacted resource concurrently
+    with_details = details or full_details
+    details_per_resource = [None] * len(impacted_resources)
+    resource_errors = []
+    if with_details:
+        details_per_resource, resource_errors = fan_out(
+            [
+                (
+                    pc_api.policies_list,
+                    {
+                        "resource_uuid": resource["resourceUuid"],
+                        "body_params": {
                             "filters": {
                                 "repositories": [repository["id"]],
                                 "branch": repository["scannedBranch"],
@@ -179,185 +202,141 @@ def global_search(integration_type, details, repo, max, full_details):
                             "offset": 0,
                             "sortBy": [],
                             "search": {"scopes": [], "term": ""},
+                        },
+                    },
+                )
+                for repository, resource in impacted_resources
+            ],
+            label="Resources",
+        )
+
+    for (repository, resource), impacted_resources_with_details in zip(impacted_resources, details_per_resource):
+        logging.info("API - resource impacted: %s", resource["filePath"])
+        if with_details:
+            logging.info("API - Imapcted resource: %s", resource)
+            for details in (impacted_resources_with_details or {}).get("data", []):
+                # logging.debug("======= details  %s", details)
+                if resource["codeCategory"] == "Vulnerabilities":
+                    data = data + [
+                        {
+                            "repository": repository["fullRepositoryName"],
+                            "repositoryId": repository["id"],
+                            "source": repository["source"],
+                            "branch": repository["defaultBranch"],
+                            "scannedBranch": repository["scannedBranch"],
+                            "isPublic": repository["isPublic"],
+                            "owner": repository["owner"],
+                            "sourceType": resource["sourceType"],
+                            "frameworkType": resource["frameworkType"],
+                            "resourceName": resource["resourceName"],
+                            "filePath": resource["filePath"],
+                            "codeCategory": resource["codeCategory"],
+                            "counter": resource["counter"],
+                            "fixableIssuesCount": resource["fixableIssuesCount"],
+                            "violationId": details["violationId"],
+                            "policy": details["policy"],
+                            "severity": details["severity"],
+                            "firstDetected": details["firstDetected"],
+                            "fixVersion": details["fixVersion"],
+                            "causePackageName": details["causePackageName"],
+                            "cvss": details["cvss"],
+                            "riskFactors": ", ".join(details["riskFactors"]),
                         }
-                        impacted_resources_with_details = pc_api.policies_list(
-                            resource_uuid=resource["resourceUuid"], body_params=parameters
-                        )
+                    ]
+                elif resource["codeCategory"] == "Licenses":
+                    data = data + [
+                        {
+                            "repository": repository["fullRepositoryName"],
+                            "repositoryId": repository["id"],
+                            "source": repository["source"],
+                            "branch": repository["defaultBranch"],
+                            "scannedBranch": repository["scannedBranch"],
+                            "isPublic": repository["isPublic"],
+                            "owner": repository["owner"],
+                            "sourceType": resource["sourceType"],
+                            "frameworkType": resource["frameworkType"],
+                            "resourceName": resource["resourceName"],
+                            "filePath": resource["filePath"],
+                            "codeCategory": resource["codeCategory"],
+                            "counter": resource["counter"],
+                            "fixableIssuesCount": resource["fixableIssuesCount"],
+                            "policy": details["policy"],
+                            "license": details["license"],
+                            "isIndirectPackage": details["isIndirectPackage"],
+                            "causePackageName": details["causePackageName"],
+                            "severity": details["severity"],
+                            "firstDetected": details["firstDetected"],
+                            "violationId": details["violationId"],
+                        }
+                    ]
+                elif resource["codeCategory"] == "Secrets":
+                    data = data + [
+                        {
+                            "repository": repository["fullRepositoryName"],
+                            "repositoryId": repository["id"],
+                            "source": repository["source"],
+                            "branch": repository["defaultBranch"],
+                            "scannedBranch": repository["scannedBranch"],
+                            "isPublic": repository["isPublic"],
+                            "owner": repository["owner"],
+                            "sourceType": resource["sourceType"],
+                            "frameworkType": resource["frameworkType"],
+                            "resourceName": resource["resourceName"],
+                            "filePath": resource["filePath"],
+                            "codeCategory": resource["codeCategory"],
+                            "counter": resource["counter"],
+                            "fixableIssuesCount": resource["fixableIssuesCount"],
+                            "policy": details["policy"],
+                            "resourceId": details["resourceId"],
+                            "severity": details["severity"],
+                            "firstDetected": details["firstDetected"],
+                            "violationId": details["violationId"],
+                        }
+                    ]
+                elif resource["codeCategory"] == "IacMisconfiguration":
+                    if full_details:
+                        policy = pc_api.code_policies_list_read(policy_id=details["violationId"])
+                        # Assuming policy["benchmarkChecks"] is your input list of dictionaries
+                        benchmark_checks = policy["benchmarkChecks"]
 
-                        for details in impacted_resources_with_details["data"]:
-                            # logging.debug("======= details  %s", details)
-                            if resource["codeCategory"] == "Vulnerabilities":
-                                data = data + [
-                                    {
-                                        "repository": repository["fullRepositoryName"],
-                                        "repositoryId": repository["id"],
-                                        "source": repository["source"],
-                                        "branch": repository["defaultBranch"],
-                                        "scannedBranch": repository["scannedBranch"],
-                                        "isPublic": repository["isPublic"],
-                                        "owner": repository["owner"],
-                                        "sourceType": resource["sourceType"],
-                                        "frameworkType": resource["frameworkType"],
-                                        "resourceName": resource["resourceName"],
-                                        "filePath": resource["filePath"],
-                                        "codeCategory": resource["codeCategory"],
-                                        "counter": resource["counter"],
-                                        "fixableIssuesCount": resource["fixableIssuesCount"],
-                                        "violationId": details["violationId"],
-                                        "policy": details["policy"],
-                                        "severity": details["severity"],
-                                        "firstDetected": details["firstDetected"],
-                                        "fixVersion": details["fixVersion"],
-                                        "causePackageName": details["causePackageName"],
-                                        "cvss": details["cvss"],
-                                        "riskFactors": ", ".join(details["riskFactors"]),
-                                    }
-                                ]
-                            elif resource["codeCategory"] == "Licenses":
-                                data = data + [
-                                    {
-                                        "repository": repository["fullRepositoryName"],
-                                        "repositoryId": repository["id"],
-                                        "source": repository["source"],
-                                        "branch": repository["defaultBranch"],
-                                        "scannedBranch": repository["scannedBranch"],
-                                        "isPublic": repository["isPublic"],
-                                        "owner": repository["owner"],
-                                        "sourceType": resource["sourceType"],
-                                        "frameworkType": resource["frameworkType"],
-                                        "resourceName": resource["resourceName"],
-                                        "filePath": resource["filePath"],
-                                        "codeCategory": resource["codeCategory"],
-                                        "counter": resource["counter"],
-                                        "fixableIssuesCount": resource["fixableIssuesCount"],
-                                        "policy": details["policy"],
-                                        "license": details["license"],
-                                        "isIndirectPackage": details["isIndirectPackage"],
-                                        "causePackageName": details["causePackageName"],
-                                        "severity": details["severity"],
-                                        "firstDetected": details["firstDetected"],
-                                        "violationId": details["violationId"],
-                                    }
-                                ]
-                            elif resource["codeCategory"] == "Secrets":
-                                data = data + [
-                                    {
-                                        "repository": repository["fullRepositoryName"],
-                                        "repositoryId": repository["id"],
-                                        "source": repository["source"],
-                                        "branch": repository["defaultBranch"],
-                                        "scannedBranch": repository["scannedBranch"],
-                                        "isPublic": repository["isPublic"],
-                                        "owner": repository["owner"],
-                                        "sourceType": resource["sourceType"],
-                                        "frameworkType": resource["frameworkType"],
-                                        "resourceName": resource["resourceName"],
-                                        "filePath": resource["filePath"],
-                                        "codeCategory": resource["codeCategory"],
-                                        "counter": resource["counter"],
-                                        "fixableIssuesCount": resource["fixableIssuesCount"],
-                                        "policy": details["policy"],
-                                        "resourceId": details["resourceId"],
-                                        "severity": details["severity"],
-                                        "firstDetected": details["firstDetected"],
-                                        "violationId": details["violationId"],
-                                    }
-                                ]
-                            elif resource["codeCategory"] == "IacMisconfiguration":
-                                if full_details:
-                                    policy = pc_api.code_policies_list_read(policy_id=details["violationId"])
-                                    # Assuming policy["benchmarkChecks"] is your input list of dictionaries
-                                    benchmark_checks = policy["benchmarkChecks"]
-
-                                    # Extract unique benchmark.id values
-                                    unique_benchmark_ids = list({check["benchmark"]["id"] for check in benchmark_checks})
-
-                                    data = data + [
-                                        {
-                                            "repository": repository["fullRepositoryName"],
-                                            "repositoryId": repository["id"],
-                                            "source": repository["source"],
-                                            "branch": repository["defaultBranch"],
-                                            "scannedBranch": repository["scannedBranch"],
-                                            "isPublic": repository["isPublic"],
-                                            "owner": repository["owner"],
-                                            "sourceType": resource["sourceType"],
-                                            "frameworkType": resource["frameworkType"],
-                                            "resourceName": resource["resourceName"],
-                                            "filePath": resource["filePath"],
-                                            "codeCategory": resource["codeCategory"],
-                                            "counter": resource["counter"],
-                                            "fixableIssuesCount": resource["fixableIssuesCount"],
-                                            "author": details["author"],
-                                            "violationId": details["violationId"],
-                                            "policy": details["policy"],
-                                            "resourceScanType": details["resourceScanType"],
-                                            "severity": details["severity"],
-                                            "labels": ", ".join(details["labels"]),
-                                            "title": policy["title"],
-                                            "isCustom": policy["isCustom"],
-                                            "checkovCheckId": policy["checkovCheckId"],
-                                            "provider": policy["provider"],
-                                            "frameworks": ", ".join(policy["frameworks"]),
-                                            "pcGuidelines": policy["pcGuidelines"],
-                                            "benchmarkChecks": ", ".join(unique_benchmark_ids),
-                                        }
-                                    ]
-                                else:
-                                    for policy in policies:
-                                        if details["violationId"] == policy["incidentId"]:
-                                            break
-                                    data = data + [
-                                        {
-                                            "repository": repository["fullRepositoryName"],
-                                            "repositoryId": repository["id"],
-                                            "source": repository["source"],
-                                            "branch": repository["defaultBranch"],
-                                            "scannedBranch": repository["scannedBranch"],
-                                            "isPublic": repository["isPublic"],
-                                            "owner": repository["owner"],
-                                            "sourceType": resource["sourceType"],
-                                            "frameworkType": resource["frameworkType"],
-                                            "resourceName": resource["resourceName"],
-                                            "filePath": resource["filePath"],
-                                            "codeCategory": resource["codeCategory"],
-                                            "counter": resource["counter"],
-                                            "fixableIssuesCount": resource["fixableIssuesCount"],
-                                            "author": details["author"],
-                                            "violationId": details["violationId"],
-                                            "policy": details["policy"],
-                                            "resourceScanType": details["resourceScanType"],
-                                            "severity": details["severity"],
-                                            "labels": ", ".join(details["labels"]),
-                                            "title": policy["title"],
-                                            "isCustom": policy["isCustom"],
-                                            "checkovCheckId": policy["checkovCheckId"],
-                                            "provider": policy["provider"],
-                                            "frameworks": ", ".join(policy["frameworks"]),
-                                            "pcGuidelines": policy["pcGuidelines"],
-                                        }
-                                    ]
-                            else:
-                                data = data + [
-                                    {
-                                        "repository": repository["fullRepositoryName"],
-                                        "repositoryId": repository["id"],
-                                        "source": repository["source"],
-                                        "branch": repository["defaultBranch"],
-                                        "scannedBranch": repository["scannedBranch"],
-                                        "isPublic": repository["isPublic"],
-                                        "owner": repository["owner"],
-                                        "sourceType": resource["sourceType"],
-                                        "frameworkType": resource["frameworkType"],
-                                        "resourceName": resource["resourceName"],
-                                        "filePath": resource["filePath"],
-                                        "severity": resource["severity"],
-                                        "codeCategory": resource["codeCategory"],
-                                        "counter": resource["counter"],
-                                        "fixableIssuesCount": resource["fixableIssuesCount"],
-                                    }
-                                ]
+                        # Extract unique benchmark.id values
+                        unique_benchmark_ids = list({check["benchmark"]["id"] for check in benchmark_checks})
+
+                        data = data + [
+                            {
+                                "repository": repository["fullRepositoryName"],
+                                "repositoryId": repository["id"],
+                                "source": repository["source"],
+                                "branch": repository["defaultBranch"],
+                                "scannedBranch": repository["scannedBranch"],
+                                "isPublic": repository["isPublic"],
+                                "owner": repository["owner"],
+                                "sourceType": resource["sourceType"],
+                                "frameworkType": resource["frameworkType"],
+                                "resourceName": resource["resourceName"],
+                                "filePath": resource["filePath"],
+                                "codeCategory": resource["codeCategory"],
+                                "counter": resource["counter"],
+                                "fixableIssuesCount": resource["fixableIssuesCount"],
+                                "author": details["author"],
+                                "violationId": details["violationId"],
+                                "policy": details["policy"],
+                                "resourceScanType": details["resourceScanType"],
+                                "severity": details["severity"],
+                                "labels": ", ".join(details["labels"]),
+                                "title": policy["title"],
+                                "isCustom": policy["isCustom"],
+                                "checkovCheckId": policy["checkovCheckId"],
+                                "provider": policy["provider"],
+                                "frameworks": ", ".join(policy["frameworks"]),
+                                "pcGuidelines": policy["pcGuidelines"],
+                                "benchmarkChecks": ", ".join(unique_benchmark_ids),
+                            }
+                        ]
                     else:
+                        for policy in policies:
+                            if details["violationId"] == policy["incidentId"]:
+                                break
                         data = data + [
                             {
                                 "repository": repository["fullRepositoryName"],
@@ -371,17 +350,66 @@ def global_search(integration_type, details, repo, max, full_details):
                                 "frameworkType": resource["frameworkType"],
                                 "resourceName": resource["resourceName"],
                                 "filePath": resource["filePath"],
-                                "severity": resource["severity"],
                                 "codeCategory": resource["codeCategory"],
                                 "counter": resource["counter"],
                                 "fixableIssuesCount": resource["fixableIssuesCount"],
+                                "author": details["author"],
+                                "violationId": details["violationId"],
+                                "policy": details["policy"],
+                                "resourceScanType": details["resourceScanType"],
+                                "severity": details["severity"],
+                                "labels": ", ".join(details["labels"]),
+                                "title": policy["title"],
+                                "isCustom": policy["isCustom"],
+                                "checkovCheckId": policy["checkovCheckId"],
+                                "provider": policy["provider"],
+                                "frameworks": ", ".join(policy["frameworks"]),
+                                "pcGuidelines": policy["pcGuidelines"],
                             }
                         ]
-            if max > 0 and i == max:
-                break
-            i = i + 1
+                else:
+                    data = data + [
+                        {
+                            "repository": repository["fullRepositoryName"],
+                            "repositoryId": repository["id"],
+                            "source": repository["source"],
+                            "branch": repository["defaultBranch"],
+                            "scannedBranch": repository["scannedBranch"],
+                            "isPublic": repository["isPublic"],
+                            "owner": repository["owner"],
+                            "sourceType": resource["sourceType"],
+                            "frameworkType": resource["frameworkType"],
+                            "resourceName": resource["resourceName"],
+                            "filePath": resource["filePath"],
+                            "severity": resource["severity"],
+                            "codeCategory": resource["codeCategory"],
+                            "counter": resource["counter"],
+                            "fixableIssuesCount": resource["fixableIssuesCount"],
+                        }
+                    ]
+        else:
+            data = data + [
+                {
+                    "repository": repository["fullRepositoryName"],
+                    "repositoryId": repository["id"],
+                    "source": repository["source"],
+                    "branch": repository["defaultBranch"],
+                    "scannedBranch": repository["scannedBranch"],
+                    "isPublic": repository["isPublic"],
+                    "owner": repository["owner"],
+                    "sourceType": resource["sourceType"],
+                    "frameworkType": resource["frameworkType"],
+                    "resourceName": resource["resourceName"],
+                    "filePath": resource["filePath"],
+                    "severity": resource["severity"],
+                    "codeCategory": resource["codeCategory"],
+                    "counter": resource["counter"],
+                    "fixableIssuesCount": resource["fixableIssuesCount"],
+                }
+            ]
 
     cli_output(data)
+    exit_on_errors(repository_errors, resource_errors)
 
 
 @click.command("count-git-authors", short_help="Count number of unique git authors")
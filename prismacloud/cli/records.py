@@ -0,0 +1,221 @@
+""" Record Processing without Pandas, for Streaming Output """
+
+import json
+import math
+import operator
+import re
+
+COMPARISONS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">=": operator.ge,
+    "<=": operator.le,
+    ">": operator.gt,
+    "<": operator.lt,
+}
+
+FILTER_TOKEN = re.compile(
+    r"""\s*(?:
+        (?P<name>`[^`]+`)|
+        (?P<string>"[^"]*"|'[^']*')|
+        (?P<comparison>==|!=|>=|<=|>|<)|
+        (?P<boolean>&|\|)|
+        (?P<word>[^\s=!<>&|`'"]+)
+    )""",
+    re.VERBOSE,
+)
+
+
+def flatten_record(record, prefix=""):
+    """Flatten nested dictionaries into keys separated by a dot, as pandas.json_normalize() does"""
+    flat_record = {}
+    for key, value in record.items():
+        key = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            flat_record.update(flatten_record(value, f"{key}."))
+        else:
+            flat_record[key] = value
+    return flat_record
+
+
+def get_columns_pattern(columns):
+    """Return the pattern matching the keys that contain one of the columns (case-insensitive), as --columns does"""
+    return re.compile("(" + "|".join(columns) + ")", re.I)
+
+
+def project_record(record, columns_pattern):
+    """Keep the keys of a (flattened) record that match the columns pattern"""
+    return {key: value for key, value in record.items() if columns_pattern.search(key)}
+
+
+def project_nested(value, path, node, is_selected, projected_record):
+    """
+    Add the selected values of a nested dictionary to a projected record, with keys separated by a dot.
+    A node caches, for each key, its path, whether it is selected, and the node of its own keys.
+    """
+    for key, child_value in value.items():
+        child = node.get(key)
+        if child is None:
+            # As json_normalize() does, no dot follows an empty path.
+            child_path = f"{path}.{key}" if path else str(key)
+            child = node[key] = (child_path, is_selected(child_path), {})
+        if isinstance(child_value, dict):
+            project_nested(child_value, child[0], child[2], is_selected, projected_record)
+        elif child[1]:
+            projected_record[child[0]] = child_value
+
+
+def project_records(records, columns_pattern, is_required=None):
+    """
+    Normalize records (a record or a list of records) as pandas.json_normalize() does, keeping only the keys
+    that match the columns pattern, or that are required (for example by a filter), so that a data frame
+    is built with only these columns. Return None if the records are not dictionaries.
+    As with json_normalize(), the top level values come first, then the values of nested dictionaries.
+    """
+    if isinstance(records, dict):
+        records = [records]
+    if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+        return None
+
+    def is_selected(key):
+        return bool(columns_pattern.search(key)) or bool(is_required and is_required(key))
+
+    # Records of the same kind share their keys: decide once per key, and build each key once.
+    root = {}
+    projected_records = []
+    for record in records:
+        projected_record = {}
+        for key, value in record.items():
+            if not isinstance(value, dict):
+                child = root.get(key)
+                if child is None:
+                    child = root[key] = (key, is_selected(str(key)), {})
+                if child[1]:
+                    projected_record[key] = value
+        for key, value in record.items():
+            if isinstance(value, dict):
+                child = root.get(key)
+                if child is None:
+                    child = root[key] = (key, is_selected(str(key)), {})
+                project_nested(value, str(key), child[2], is_selected, projected_record)
+        projected_records.append(projected_record)
+    return projected_records
+
+
+def is_missing(value):
+    """Return True if a value is missing: None, NaN, or the empty text of a missing value in a data frame"""
+    return value is None or (isinstance(value, float) and math.isnan(value)) or (isinstance(value, str) and value == "")
+
+
+def infer_value_type(values):
+    """Return the type of a list of values: bool, int (64-bit) or float if all its set values are, otherwise str"""
+    kinds = set()
+    for value in values:
+        if is_missing(value):
+            continue
+        if isinstance(value, bool):
+            kinds.add(bool)
+        elif isinstance(value, int):
+            if not -(2**63) <= value < 2**63:
+                return str
+            kinds.add(int)
+        elif isinstance(value, float):
+            kinds.add(float)
+        else:
+            return str
+    if kinds in ({bool}, {int}):
+        return kinds.pop()
+    if kinds and kinds <= {int, float}:
+        return float
+    return str
+
+
+def to_text(value):
+    """Return the text of a value of a text column: lists and dictionaries in JSON, and None if it is missing"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, default=str)
+    return str(value)
+
+
+def parse_value(text):
+    """Parse a literal value of a filter"""
+    if text[0] in "\"'":
+        return text[1:-1]
+    if text in ["True", "true"]:
+        return True
+    if text in ["False", "false"]:
+        return False
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def parse_filter(query_filter):
+    """
+    Parse a simple --filter expression into a list of alternatives (or), each a list of conditions (and),
+    each condition a tuple of (column, comparison, value). For example:
+
+        severity == 'high' and `cloudMetadata.provider` != "aws" or riskScore > 7
+
+    Raise ValueError if the expression is not supported.
+    """
+    tokens = []
+    position = 0
+    query_filter = query_filter.strip()
+    while position < len(query_filter):
+        match = FILTER_TOKEN.match(query_filter, position)
+        if not match or match.end() == position:
+            raise ValueError("Unsupported filter at: %s" % query_filter[position:])
+        tokens.append(match)
+        position = match.end()
+    alternatives = [[]]
+    index = 0
+    while index < len(tokens):
+        if index + 2 >= len(tokens) or not tokens[index + 1].group("comparison"):
+            raise ValueError("Expected: column comparison value, at: %s" % tokens[index].group().strip())
+        column = tokens[index].group("name") or tokens[index].group("word")
+        if not column:
+            raise ValueError("Expected a column name, at: %s" % tokens[index].group().strip())
+        value = tokens[index + 2].group("string") or tokens[index + 2].group("word")
+        if value is None:
+            raise ValueError("Expected a value, at: %s" % tokens[index + 2].group().strip())
+        alternatives[-1].append((column.strip("`"), COMPARISONS[tokens[index + 1].group("comparison")], parse_value(value)))
+        index += 3
+        if index < len(tokens):
+            boolean = tokens[index].group("boolean") or tokens[index].group("word")
+            if boolean in ["or", "|"]:
+                alternatives.append([])
+            elif boolean not in ["and", "&"]:
+                raise ValueError("Expected 'and' or 'or', at: %s" % tokens[index].group().strip())
+            index += 1
+            if index == len(tokens):
+                raise ValueError("Expected a condition after: %s" % boolean)
+    return alternatives
+
+
+def compare(value, comparison, expected):
+    """Compare a record value with a filter value, as numbers if both are numbers, otherwise as strings"""
+    if isinstance(expected, bool) or isinstance(value, bool):
+        return comparison(str(value).lower(), str(expected).lower())
+    if isinstance(value, (int, float)) and isinstance(expected, (int, float)):
+        return comparison(value, expected)
+    return comparison(str(value), str(expected))
+
+
+def match_record(record, alternatives):
+    """Return True if a (flattened) record matches a parsed filter"""
+    for conditions in alternatives:
+        if all(
+            column in record and compare(record[column], comparison, expected) for column, comparison, expected in conditions
+        ):
+            return True
+    return False
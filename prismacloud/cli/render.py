@@ -0,0 +1,126 @@
+""" Rendering of Cells for Text and Markdown Output """
+
+import ast
+import json
+import textwrap
+
+NESTED_TYPES = (dict, list, tuple)
+
+
+def render_nested(value):
+    """
+    Render a nested value (dictionaries and lists) as indented 'key: value' lines, in a single iterative pass.
+    Lists are rendered item after item, at the same level, and each value at the top level is followed by an empty line.
+    Return None if a list contains a scalar value, which has no key to render it with.
+    """
+    lines = []
+    # A stack of values to render, with their level, and of lines already rendered (level None).
+    stack = [(value, 0)]
+    while stack:
+        item, level = stack.pop()
+        if level is None:
+            lines.append(item)
+            continue
+        if level == 0 and isinstance(item, NESTED_TYPES):
+            stack.append(("\n", None))
+        if isinstance(item, (list, tuple)):
+            stack.extend((element, level) for element in reversed(item))
+        elif isinstance(item, dict):
+            indent = "  " * level
+            entries = []
+            for key, element in item.items():
+                if isinstance(element, NESTED_TYPES):
+                    entries.append((f"{indent}{key}:\n", None))
+                    entries.append((element, level + 1))
+                else:
+                    entries.append((f"{indent}{key}: {element}\n", None))
+            stack.extend(reversed(entries))
+        else:
+            return None
+    return "".join(lines)
+
+
+def parse_literal(text):
+    """Parse text that looks like a list or a dictionary, in JSON or Python notation, or return None"""
+    if text.lstrip()[:1] not in ["[", "{"]:
+        return None
+    try:
+        value = json.loads(text)
+        if isinstance(value, (list, dict)):
+            return value
+    except ValueError:
+        pass
+    try:
+        value = ast.literal_eval(text)
+        if isinstance(value, (list, dict)):
+            return value
+    except (SyntaxError, ValueError, TypeError, MemoryError, RecursionError):
+        pass
+    return None
+
+
+def render_value(value):
+    """Render a value as text: nested values (or text representing them) as indented lines, others as they are"""
+    if isinstance(value, str):
+        nested_value = parse_literal(value)
+        if nested_value is None:
+            return value
+        rendered = render_nested(nested_value)
+        return value if rendered is None else rendered
+    if isinstance(value, NESTED_TYPES):
+        rendered = render_nested(value)
+        if rendered is not None:
+            return rendered
+    return str(value)
+
+
+def wrap(text, width, max_lines):
+    """Wrap text to lines of width characters, and truncate it to max_lines lines"""
+    # Short text without line breaks, tabs, or surrounding whitespace, is not changed by wrapping.
+    if len(text) <= width and text.isprintable() and text == text.strip():
+        return text
+    return textwrap.fill(text=text, width=width, max_lines=max_lines, replace_whitespace=False)
+
+
+def render_column(series, width, max_lines):
+    """
+    Render the cells of a column as wrapped text. Each distinct value is rendered once, and missing values are empty.
+    Columns of scalar values are factorized; columns holding lists or dictionaries are rendered cell by cell,
+    reusing the text of repeated values.
+    """
+    import numpy as np  # pylint:disable=import-outside-toplevel
+    import pandas as pd  # pylint:disable=import-outside-toplevel
+
+    values = series.tolist() if series.dtype == object else []
+    if any(isinstance(value, NESTED_TYPES) for value in values):
+        rendered_values = {}
+        rendered_cells = []
+        for value in values:
+            if isinstance(value, NESTED_TYPES):
+                key = (type(value), repr(value))
+            elif value is None or pd.isna(value):
+                rendered_cells.append("")
+                continue
+            else:
+                key = (type(value), value)
+            if key not in rendered_values:
+                rendered_values[key] = wrap(render_value(value), width, max_lines)
+            rendered_cells.append(rendered_values[key])
+        return pd.Series(rendered_cells, index=series.index, dtype=object)
+    codes, uniques = pd.factorize(series)
+    rendered_uniques = [wrap(render_value(value), width, max_lines) for value in uniques.tolist()]
+    # Missing values have the code -1, the last (empty) rendered value.
+    rendered_uniques.append("")
+    return pd.Series(np.asarray(rendered_uniques, dtype=object)[codes], index=series.index, dtype=object)
+
+
+def render_frame(data_frame, width, max_lines):
+    """Render the cells and the column names of a data frame (of the displayed rows and columns) as wrapped text"""
+    import pandas as pd  # pylint:disable=import-outside-toplevel
+
+    rendered = pd.DataFrame(
+        {index: render_column(data_frame.iloc[:, index], width, max_lines) for index in range(data_frame.shape[1])},
+        index=data_frame.index,
+    )
+    rendered.columns = [wrap(render_value(str(column)), width, max_lines) for column in data_frame.columns]
+    return rendered
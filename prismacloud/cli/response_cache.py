@@ -0,0 +1,320 @@
+""" Persistent API Response Cache shared across CLI invocations """
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover (Windows)
+    fcntl = None
+
+# Bound the size of the cache, evicting the least recently used responses first.
+MAX_CACHE_SIZE = 256 * 1024 * 1024
+
+# Only GET requests, and POST requests to these (read-only) search endpoints, are cached.
+CACHEABLE_POST_ENDPOINTS = [
+    r"alert",
+    r"v2/alert",
+    r"v2/inventory",
+    r"v3/inventory",
+    r"resource",
+    r"license/api/v[12]/usage",
+    r"license/api/v[12]/(usage/)?time_series",
+    r"code/api/v1/errors/files?",
+    r"code/api/v1/repositories/query",
+    r"code/api/v2/errors/branch_scan/resources(/[^/]+/policies)?",
+]
+CACHEABLE_POST_PATTERN = re.compile(r"^(%s)$" % "|".join(CACHEABLE_POST_ENDPOINTS))
+
+CACHE_FILE_SUFFIX = ".json.z"
+
+# Headers that authenticate a request, rather than change its response (the tenant and identity are in the key).
+AUTHENTICATION_HEADERS = ["authorization", "x-redlock-auth"]
+
+# Bound the memory of the responses shared within a process, evicting the least recently used responses first.
+# Larger responses (such as long lists of records) are not shared.
+MAX_MEMO_SIZE = 64 * 1024 * 1024
+MAX_MEMO_RESPONSE_SIZE = 4 * 1024 * 1024
+
+
+def is_cacheable(action, endpoint):
+    """Return True if the response of a request can be cached"""
+    action = action.upper()
+    if action == "GET":
+        return True
+    return action == "POST" and bool(CACHEABLE_POST_PATTERN.match(endpoint.strip("/")))
+
+
+def normalize_params(params):
+    """Normalize request parameters (dropping empty values) so that equivalent requests share a cache key"""
+    if isinstance(params, dict):
+        return {str(key): normalize_params(value) for key, value in params.items() if value is not None}
+    if isinstance(params, (list, tuple)):
+        return [normalize_params(value) for value in params]
+    return params
+
+
+def normalize_headers(headers):
+    """Normalize request headers that may change a response: lowercase names, without authentication headers"""
+    return {
+        str(name).lower(): str(value)
+        for name, value in (headers or {}).items()
+        if str(name).lower() not in AUTHENTICATION_HEADERS and value is not None
+    }
+
+
+class ResponseCache:
+    """Store API responses, compressed, in a file per request, shared by concurrent processes"""
+
+    def __init__(self, directory, max_size=MAX_CACHE_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        self.ttl = 0
+        self.hits = 0
+        self.misses = 0
+        self.written = False
+        self.thread_lock = threading.Lock()
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    @staticmethod
+    def key(tenant, api_family, endpoint, action, query_params=None, body_params=None, paginated=False, headers=None):
+        """
+        Return the cache key of a request: a paginated request (all the pages) and a request of the first page,
+        or requests with different headers (other than authentication), have different keys
+        """
+        request = [
+            tenant,
+            api_family,
+            endpoint.strip("/"),
+            action.upper(),
+            normalize_params(query_params),
+            normalize_params(body_params),
+            bool(paginated),
+            normalize_headers(headers),
+        ]
+        digest = hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        return f"{api_family}-{digest}"
+
+    def file_name(self, key):
+        """Return the cache file of a key"""
+        return os.path.join(self.directory, key + CACHE_FILE_SUFFIX)
+
+    @contextmanager
+    def lock(self):
+        """Hold an exclusive lock on the cache directory, within this process and across processes"""
+        with self.thread_lock:
+            if fcntl is None:
+                yield
+                return
+            try:
+                os.makedirs(self.directory, mode=0o700, exist_ok=True)
+                lock_file = os.open(os.path.join(self.directory, ".lock"), os.O_RDWR | os.O_CREAT, 0o600)
+            except OSError as exc:
+                logging.debug("Error opening response cache lock file: %s", exc)
+                yield
+                return
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                os.close(lock_file)
+
+    def get(self, key, ttl):
+        """Return (True, response) for a cached response younger than ttl seconds, or (False, None)"""
+        file_name = self.file_name(key)
+        try:
+            with open(file_name, "rb") as cache_file:
+                entry = json.loads(zlib.decompress(cache_file.read()))
+        except (OSError, ValueError, zlib.error):
+            self.misses += 1
+            return False, None
+        if time.time() - entry.get("created", 0) > ttl:
+            self.misses += 1
+            return False, None
+        try:
+            # The modification time of a cache file is the time it was last used.
+            os.utime(file_name)
+        except OSError:
+            pass
+        self.hits += 1
+        age = int(time.time() - entry["created"])
+        logging.debug("Using cached response (%s %s), %s seconds old", entry["action"], entry["endpoint"], age)
+        return True, entry["response"]
+
+    def put(self, key, action, endpoint, response):
+        """Cache a response, readable only by the current user"""
+        entry = {"created": time.time(), "action": action.upper(), "endpoint": endpoint, "response": response}
+        try:
+            data = zlib.compress(json.dumps(entry).encode("utf-8"))
+        except (TypeError, ValueError) as exc:
+            logging.debug("Response (%s %s) cannot be cached: %s", action, endpoint, exc)
+            return
+        file_name = self.file_name(key)
+        temporary_file_name = f"{file_name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            file_descriptor = os.open(temporary_file_name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(file_descriptor, "wb") as cache_file:
+                cache_file.write(data)
+            os.replace(temporary_file_name, file_name)
+        except OSError as exc:
+            logging.debug("Error writing response cache file: %s", exc)
+            return
+        self.written = True
+
+    def entries(self):
+        """Return a list of (file name, size, modification time) of the cache files, least recently used first"""
+        entries = []
+        try:
+            file_names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for file_name in file_names:
+            if not file_name.endswith(CACHE_FILE_SUFFIX):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, file_name))
+            except OSError:
+                continue
+            entries.append((file_name, stat.st_size, stat.st_mtime))
+        entries.sort(key=lambda entry: entry[2])
+        return entries
+
+    def evict(self):
+        """Remove the least recently used responses until the cache fits within its maximum size"""
+        with self.lock():
+            entries = self.entries()
+            size = sum(entry[1] for entry in entries)
+            for file_name, file_size, _mtime in entries:
+                if size <= self.max_size:
+                    break
+                try:
+                    os.remove(os.path.join(self.directory, file_name))
+                    logging.debug("Evicted cached response: %s", file_name)
+                except OSError:
+                    pass
+                size -= file_size
+
+    def close(self):
+        """Evict responses, if any were cached, and log the cache counters"""
+        if self.written:
+            self.evict()
+        if self.hits or self.misses:
+            logging.info("Response cache hits: %s, misses: %s", self.hits, self.misses)
+
+    def clear(self, api_family=None):
+        """Remove all cached responses, or those of an API family; return the number removed"""
+        removed = 0
+        with self.lock():
+            for file_name, _size, _mtime in self.entries():
+                if api_family and not file_name.startswith(api_family + "-"):
+                    continue
+                try:
+                    os.remove(os.path.join(self.directory, file_name))
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def stats(self):
+        """Return statistics about the cache, per API family"""
+        stats = {}
+        for file_name, size, mtime in self.entries():
+            api_family = file_name.split("-", 1)[0]
+            family_stats = stats.setdefault(
+                api_family, {"api": api_family, "entries": 0, "size": 0, "oldest": mtime, "newest": mtime}
+            )
+            family_stats["entries"] += 1
+            family_stats["size"] += size
+            family_stats["oldest"] = min(family_stats["oldest"], mtime)
+            family_stats["newest"] = max(family_stats["newest"], mtime)
+        for family_stats in stats.values():
+            family_stats["oldest"] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(family_stats["oldest"]))
+            family_stats["newest"] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(family_stats["newest"]))
+        return list(stats.values())
+
+
+class RequestMemo:
+    """
+    Share the response of identical requests within this process: a request waits for an identical request
+    in flight (single flight), and a completed request is answered from memory. Responses are kept serialized
+    (so each caller gets its own copy), up to a maximum size, and the least recently used are evicted first.
+    """
+
+    def __init__(self, max_size=MAX_MEMO_SIZE, max_response_size=MAX_MEMO_RESPONSE_SIZE):
+        self.max_size = max_size
+        self.max_response_size = max_response_size
+        self.responses = OrderedDict()
+        self.size = 0
+        self.in_flight = {}
+        self.hits = 0
+        self.lock = threading.Lock()
+
+    def call(self, key, request):
+        """
+        Return the response of request(), calling it only if no identical request is in flight or done.
+        The caller of request() gets its response, the following callers a copy.
+        """
+        while True:
+            with self.lock:
+                if key in self.responses:
+                    self.hits += 1
+                    self.responses.move_to_end(key)
+                    data = self.responses[key]
+                    break
+                event = self.in_flight.get(key)
+                if event is None:
+                    event = self.in_flight[key] = threading.Event()
+                    data = None
+                    break
+            # Wait for the identical request, and try again if it failed (or its response was not kept).
+            event.wait()
+        if data is not None:
+            return pickle.loads(data)
+        try:
+            response = request()
+            self.remember(key, response)
+            return response
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+            event.set()
+
+    def remember(self, key, response):
+        """Keep a response, serialized, unless it is too large, and evict responses to fit within the maximum size"""
+        try:
+            data = pickle.dumps(response, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError) as exc:
+            logging.debug("Response cannot be shared: %s", exc)
+            return
+        if len(data) > self.max_response_size:
+            logging.debug("Response of %s bytes is too large to be shared", len(data))
+            return
+        with self.lock:
+            if key in self.responses:
+                self.size -= len(self.responses.pop(key))
+            self.responses[key] = data
+            self.size += len(data)
+            while self.size > self.max_size:
+                self.size -= len(self.responses.popitem(last=False)[1])
+
+    def clear(self):
+        """Forget the responses, as a request that changes data may have made them stale"""
+        with self.lock:
+            self.responses.clear()
+            self.size = 0
+
+    def log_stats(self):
+        """Log the number of requests answered from memory"""
+        if self.hits:
+            logging.info("Duplicate API requests avoided: %s", self.hits)
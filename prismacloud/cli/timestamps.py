@@ -0,0 +1,152 @@
+""" Detection and Formatting of Timestamp Columns """
+
+import datetime
+import re
+import time
+
+# The default format of timestamps, in local time.
+DEFAULT_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Formats with a special meaning: ISO 8601 in UTC, and epoch to leave timestamps as they are.
+ISO_TIME_FORMAT = "iso"
+EPOCH_TIME_FORMAT = "epoch"
+
+# Not a format of text: timestamps as datetimes in UTC, for the typed columns of columnar output.
+DATETIME_TIME_FORMAT = "datetime"
+
+# Names of timestamp columns (the last part of a flattened name): a few plain names, and camelCase suffixes,
+# e.g. time, lastModified, availableAsOf, firstSeen, alertTime, dismissalUntilTs, lastModifiedOn
+TIMESTAMP_NAME = re.compile(
+    r"(?:^|\.)(?:time|timestamp|date|created|modified|updated|lastmodified|availableasof|"
+    r"[a-z]\w*(?:Time|Timestamp|Ts|Date|Seen|At|On|AsOf|Occurred|Modified|Updated|Created))$"
+)
+
+# Epochs of timestamps between 2000 and 2100, in seconds. Values out of range are not timestamps of these units.
+EPOCH_RANGE = (946684800, 4102444800)
+EPOCH_UNITS = {"s": 1, "ms": 1000}
+
+QUARTER_HOUR = 15 * 60 * 1000
+
+
+def is_timestamp_name(name):
+    """Return True if the name of a column is the name of a timestamp"""
+    return isinstance(name, str) and bool(TIMESTAMP_NAME.search(name))
+
+
+def get_epoch_unit(value):
+    """Return the unit of an epoch (s or ms) in the range of timestamps, or None"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    for unit, factor in EPOCH_UNITS.items():
+        if EPOCH_RANGE[0] * factor <= value <= EPOCH_RANGE[1] * factor:
+            return unit
+    return None
+
+
+def get_column_epoch_unit(series):
+    """
+    Return the unit of a column of epochs (s or ms): a numeric column whose values (except missing values,
+    and zero or negative values, which mean unset) are all timestamps of the same unit. Otherwise return None.
+    """
+    import pandas as pd  # pylint:disable=import-outside-toplevel
+
+    if series.ndim != 1 or not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return None
+    values = series[series > 0]
+    if values.empty:
+        return None
+    for unit, factor in EPOCH_UNITS.items():
+        if values.between(EPOCH_RANGE[0] * factor, EPOCH_RANGE[1] * factor).all():
+            return unit
+    return None
+
+
+def get_local_offsets(milliseconds):
+    """
+    Return the offset (in milliseconds) of the local time zone from UTC at each epoch (in milliseconds).
+    Offsets change at most every quarter of an hour, so they are calculated once per quarter of an hour.
+    """
+    quarters = milliseconds // QUARTER_HOUR
+    offsets = {
+        quarter: time.localtime(quarter * QUARTER_HOUR / 1000).tm_gmtoff * 1000 for quarter in quarters.dropna().unique()
+    }
+    return quarters.map(offsets)
+
+
+def format_timestamp_column(series, unit, time_format=DEFAULT_TIME_FORMAT):
+    """
+    Format a column of epochs, in one pass. Unset (zero or negative) and missing values are not changed,
+    except as datetimes, where they are missing (NaT).
+    """
+    import pandas as pd  # pylint:disable=import-outside-toplevel
+
+    milliseconds = series.where(series > 0) * (1000 // EPOCH_UNITS[unit])
+    if time_format == DATETIME_TIME_FORMAT:
+        return pd.to_datetime(milliseconds, unit="ms", utc=True).astype("datetime64[ms, UTC]")
+    # The default and ISO formats are the text of times (without fractions of seconds), much faster than strftime.
+    if time_format == ISO_TIME_FORMAT:
+        text = pd.to_datetime(milliseconds, unit="ms").dt.floor("s").astype(str)
+        formatted = text.str.replace(" ", "T", regex=False) + "Z"
+    elif "%z" in time_format or "%Z" in time_format:
+        from dateutil.tz import tzlocal  # pylint:disable=import-outside-toplevel
+
+        formatted = pd.to_datetime(milliseconds, unit="ms", utc=True).dt.tz_convert(tzlocal()).dt.strftime(time_format)
+    else:
+        # Formatting times without a time zone is much faster: shift them to local time instead.
+        timestamps = pd.to_datetime(milliseconds + get_local_offsets(milliseconds), unit="ms")
+        if time_format == DEFAULT_TIME_FORMAT:
+            formatted = timestamps.dt.floor("s").astype(str)
+        else:
+            formatted = timestamps.dt.strftime(time_format)
+    return formatted.astype(object).where(series > 0, series)
+
+
+def get_timestamp_units(data_frame):
+    """Return the timestamp columns of a data frame (columns named as timestamps, holding epochs) and their units"""
+    units = {}
+    for column in data_frame.columns:
+        if is_timestamp_name(column):
+            unit = get_column_epoch_unit(data_frame[column])
+            if unit:
+                units[column] = unit
+    return units
+
+
+def normalize_timestamps(data_frame, time_format=DEFAULT_TIME_FORMAT):
+    """Format the timestamp columns of a data frame: columns named as timestamps, holding epochs (in s or ms)"""
+    if time_format == EPOCH_TIME_FORMAT:
+        return data_frame
+    for column, unit in get_timestamp_units(data_frame).items():
+        data_frame[column] = format_timestamp_column(data_frame[column], unit, time_format)
+    return data_frame
+
+
+def convert_timestamps(data_frame, epochs):
+    """
+    Replace the (formatted) timestamp columns of a data frame with datetimes in UTC, from their epochs and units,
+    for the rows (of the index) and columns left in the data frame
+    """
+    for column, (series, unit) in epochs.items():
+        if column in data_frame.columns:
+            data_frame[column] = format_timestamp_column(series.loc[data_frame.index], unit, DATETIME_TIME_FORMAT)
+    return data_frame
+
+
+def format_timestamp(value, unit, time_format=DEFAULT_TIME_FORMAT):
+    """Format an epoch (in s or ms)"""
+    seconds = value / EPOCH_UNITS[unit]
+    if time_format == ISO_TIME_FORMAT:
+        return datetime.datetime.fromtimestamp(seconds, tz=datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return datetime.datetime.fromtimestamp(seconds).astimezone().strftime(time_format)
+
+
+def normalize_record_timestamps(record, time_format=DEFAULT_TIME_FORMAT):
+    """Format the timestamps of a (flattened) record, as normalize_timestamps() does for a data frame"""
+    if time_format == EPOCH_TIME_FORMAT:
+        return record
+    for key, value in record.items():
+        if is_timestamp_name(key):
+            unit = get_epoch_unit(value)
+            if unit:
+                record[key] = format_timestamp(value, unit, time_format)
+    return record
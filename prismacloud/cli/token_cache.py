@@ -0,0 +1,127 @@
+""" Persistent API Token Cache shared across CLI invocations """
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import types
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover (Windows)
+    fcntl = None
+
+# API tokens are valid for ten minutes: refresh them one minute before they expire.
+TOKEN_LIFETIME = 600
+TOKEN_REFRESH_MARGIN = 60
+
+
+class TokenCache:
+    """Store the API token and its expiry in a file per configuration and URL, shared by concurrent processes"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.file_name = None
+        self.thread_lock = threading.RLock()
+
+    def select(self, configuration, url, identity):
+        """Select the cache file for a configuration, URL and identity"""
+        digest = hashlib.sha256(f"{url}|{identity}".encode("utf-8")).hexdigest()[:16]
+        self.file_name = os.path.join(self.directory, f"{configuration}-{digest}.json")
+        logging.debug("Using token cache file: %s", self.file_name)
+
+    @contextmanager
+    def lock(self):
+        """Hold an exclusive lock on the cache file, within this process and across processes"""
+        with self.thread_lock:
+            if not self.file_name or fcntl is None:
+                yield
+                return
+            try:
+                os.makedirs(self.directory, mode=0o700, exist_ok=True)
+                lock_file = os.open(self.file_name + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+            except OSError as exc:
+                logging.debug("Error opening token cache lock file: %s", exc)
+                yield
+                return
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                os.close(lock_file)
+
+    def read(self):
+        """Return the cached token entry, or None if there is none or it is about to expire"""
+        if not self.file_name:
+            return None
+        try:
+            with open(self.file_name, "r") as cache_file:
+                entry = json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+        if not entry.get("token") or time.time() > entry.get("expires", 0) - TOKEN_REFRESH_MARGIN:
+            return None
+        return entry
+
+    def write(self, token, issued):
+        """Write the token and its expiry, readable only by the current user"""
+        if not self.file_name or not token:
+            return
+        entry = {"token": token, "issued": issued, "expires": issued + TOKEN_LIFETIME}
+        temporary_file_name = f"{self.file_name}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            file_descriptor = os.open(temporary_file_name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(file_descriptor, "w") as cache_file:
+                json.dump(entry, cache_file)
+            os.replace(temporary_file_name, self.file_name)
+        except OSError as exc:
+            logging.debug("Error writing token cache file: %s", exc)
+
+    @staticmethod
+    def apply(client, entry):
+        """Use a cached token, and make the client refresh it shortly before it expires"""
+        client.token = entry["token"]
+        client.token_timer = entry["expires"] - TOKEN_REFRESH_MARGIN - client.token_limit
+
+    def load(self, client):
+        """Load a cached token into the client, if there is a valid one"""
+        entry = self.read()
+        if entry:
+            logging.debug("Using cached API token, expires in %s seconds", int(entry["expires"] - time.time()))
+            self.apply(client, entry)
+        return entry
+
+    def refresh(self, client, login):
+        """Adopt a token refreshed by another process, or call login() and cache the new token"""
+        with self.lock():
+            entry = self.read()
+            # Adopt the cached token if another process refreshed it, or if another thread of this process
+            # refreshed it while this thread waited for the lock (the token of the client is valid again).
+            if entry and (entry["token"] != client.token or time.time() - client.token_timer <= client.token_limit):
+                logging.debug("Using API token refreshed by another process or thread")
+                self.apply(client, entry)
+                return
+            login()
+            self.write(client.token, client.token_timer)
+            entry = self.read()
+            if entry:
+                self.apply(client, entry)
+
+    def attach(self, client):
+        """Route the login methods of the client through this cache"""
+        original_login = client.login
+        original_extend_login = client.extend_login
+
+        def login(_self, url=None):
+            self.refresh(client, lambda: original_login(url))
+
+        def extend_login(_self):
+            self.refresh(client, original_extend_login)
+
+        client.login = types.MethodType(login, client)
+        client.extend_login = types.MethodType(extend_login, client)
@@ -0,0 +1,290 @@
+""" HTTP Transport for the Prisma Cloud API Library """
+
+import email.utils
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# pylint: disable=import-error,no-name-in-module
+import prismacloud.api.cspm.cspm as api_cspm
+import prismacloud.api.cwpp.cwpp as api_cwpp
+import prismacloud.api.pccs.pccs as api_pccs
+
+# Requests per second, per API family, before adapting to throttling.
+RATE_LIMITS = {"cspm": 20, "cwpp": 30, "code": 20}
+
+# Retry these responses, and connection errors of idempotent requests, with exponential backoff and jitter.
+RETRY_STATUS_CODES = [425, 429, 500, 502, 503, 504]
+IDEMPOTENT_METHODS = ["GET", "HEAD", "OPTIONS", "PUT", "DELETE"]
+MAX_RETRIES = 6
+BACKOFF_BASE = 1
+BACKOFF_MAX = 60
+
+# Throttled responses within this many seconds of the last reduction count as one, as they were probably already in flight.
+# Successful requests before the concurrency of a throttled API family increases again.
+THROTTLE_COOLDOWN = 2
+RECOVERY_REQUESTS = 10
+
+
+class TokenBucket:
+    """Limit the rate of requests, halving the rate when throttled and recovering it gradually"""
+
+    def __init__(self, rate):
+        self.max_rate = rate
+        self.min_rate = max(1, rate / 8)
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Wait for a token"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def throttled(self):
+        """Halve the rate"""
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, self.rate)
+
+    def recovered(self):
+        """Increase the rate towards its maximum"""
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate * 1.05)
+
+
+class AdaptiveLimiter:
+    """Limit the number of requests in flight, halving the limit when throttled and increasing it again on success"""
+
+    def __init__(self, limit):
+        self.max_limit = limit
+        self.limit = limit
+        self.in_flight = 0
+        self.successes = 0
+        self.reduced = 0
+        self.condition = threading.Condition()
+
+    def __enter__(self):
+        with self.condition:
+            while self.in_flight >= self.limit:
+                self.condition.wait()
+            self.in_flight += 1
+
+    def __exit__(self, *args):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify()
+
+    def throttled(self):
+        """Halve the limit, unless it was just reduced; return True if it was reduced"""
+        with self.condition:
+            self.successes = 0
+            if time.monotonic() - self.reduced < THROTTLE_COOLDOWN:
+                return False
+            self.limit = max(1, self.limit // 2)
+            self.reduced = time.monotonic()
+            return True
+
+    def succeeded(self):
+        """Count a success, and increase the limit after enough consecutive successes"""
+        with self.condition:
+            self.successes += 1
+            if self.successes >= RECOVERY_REQUESTS and self.limit < self.max_limit:
+                self.limit += 1
+                self.successes = 0
+                self.condition.notify()
+
+
+def get_retry_after(response):
+    """
+    Return the delay in seconds requested by a Retry-After response header, or None.
+    The delay is at most BACKOFF_MAX seconds, so a server cannot stall a request indefinitely.
+    """
+    if response is None or not response.headers.get("Retry-After"):
+        return None
+    retry_after = response.headers["Retry-After"]
+    try:
+        delay = max(0.0, float(retry_after))
+    except ValueError:
+        try:
+            delay = max(0.0, email.utils.parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+    if delay > BACKOFF_MAX:
+        logging.info("Retry-After of %.1f seconds (%s) reduced to %s seconds", delay, response.url, BACKOFF_MAX)
+        return float(BACKOFF_MAX)
+    return delay
+
+
+def get_backoff(attempt):
+    """Return the exponential backoff delay in seconds, with full jitter, for a retry attempt"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt))
+
+
+class SessionPool:
+    """
+    Give each thread its own requests.Session, with keep-alive connection pooling,
+    and limit the number of concurrent connections per host across all threads.
+    """
+
+    def __init__(self, max_connections_per_host=10):
+        self.max_connections_per_host = max_connections_per_host
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.host_slots = {}
+        self.api_hosts = {}
+        # The token bucket and the concurrency limiter of each API family.
+        self.rate_limits = {}
+        self.stats = {"requests": 0, "retries": 0, "throttled": 0, "throttle_time": 0.0}
+
+    def reset(self):
+        """Drop the sessions and limits inherited by a forked process, so it does not share connections with its parent"""
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.host_slots = {}
+        self.rate_limits = {}
+        self.stats = {"requests": 0, "retries": 0, "throttled": 0, "throttle_time": 0.0}
+
+    def session(self):
+        """Return the session of the current thread"""
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_connections_per_host)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            # The session is released, and its connections closed, when the thread ends.
+            self.local.session = session
+            logging.debug("Created HTTP session for thread: %s", threading.current_thread().name)
+        return session
+
+    def host_slot(self, url):
+        """Return the semaphore limiting the concurrent connections to the host of the url"""
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.host_slots:
+                self.host_slots[host] = threading.BoundedSemaphore(self.max_connections_per_host)
+            return self.host_slots[host]
+
+    def set_api_hosts(self, api, api_compute):
+        """Set the hosts of the CSPM and CWPP APIs, used to identify the API family of a request"""
+        self.api_hosts = {"cspm": api, "cwpp": api_compute}
+
+    def get_api_family(self, url):
+        """Return the API family (cspm, cwpp or code) of the url"""
+        parsed_url = urlparse(url)
+        if parsed_url.path.startswith("/code/"):
+            return "code"
+        if parsed_url.netloc == self.api_hosts.get("cwpp"):
+            if parsed_url.netloc != self.api_hosts.get("cspm") or parsed_url.path.startswith("/api/v1/"):
+                return "cwpp"
+        return "cspm"
+
+    def get_rate_limits(self, api_family):
+        """Return the token bucket and the concurrency limiter of an API family"""
+        with self.lock:
+            if api_family not in self.rate_limits:
+                self.rate_limits[api_family] = (
+                    TokenBucket(RATE_LIMITS[api_family]),
+                    AdaptiveLimiter(self.max_connections_per_host),
+                )
+            return self.rate_limits[api_family]
+
+    def count(self, key, value=1):
+        """Increment a counter"""
+        with self.lock:
+            self.stats[key] += value
+
+    def request(self, method, url, **kwargs):
+        """Send a request with the session of the current thread, retrying throttled and failed requests"""
+        api_family = self.get_api_family(url)
+        bucket, limiter = self.get_rate_limits(api_family)
+        for attempt in range(MAX_RETRIES + 1):
+            bucket.acquire()
+            response = None
+            with limiter, self.host_slot(url):
+                self.count("requests")
+                try:
+                    response = self.session().request(method, url, **kwargs)
+                except (requests.ConnectionError, requests.Timeout) as exc:
+                    if method.upper() not in IDEMPOTENT_METHODS or attempt == MAX_RETRIES:
+                        raise
+                    logging.debug("Request error (%s %s): %s", method, url, exc)
+            if response is not None and response.status_code not in RETRY_STATUS_CODES:
+                limiter.succeeded()
+                bucket.recovered()
+                return response
+            if attempt == MAX_RETRIES:
+                return response
+            delay = get_retry_after(response)
+            if delay is None:
+                delay = get_backoff(attempt)
+            if response is not None and response.status_code == 429:
+                if limiter.throttled():
+                    bucket.throttled()
+                    logging.debug(
+                        "API (%s) throttled, limits are now %s concurrent requests and %.1f requests per second",
+                        api_family,
+                        limiter.limit,
+                        bucket.rate,
+                    )
+                self.count("throttled")
+                self.count("throttle_time", delay)
+            self.count("retries")
+            logging.debug(
+                "Retrying request (%s %s) in %.1f seconds, attempt %s of %s, status: %s",
+                method,
+                url,
+                delay,
+                attempt + 1,
+                MAX_RETRIES,
+                response.status_code if response is not None else "connection error",
+            )
+            time.sleep(delay)
+        return response
+
+    def log_stats(self):
+        """Log the request, retry and throttling counters"""
+        if self.stats["requests"]:
+            logging.info(
+                "API requests: %s, retries: %s, throttled: %s, time spent throttled: %.1f seconds",
+                self.stats["requests"],
+                self.stats["retries"],
+                self.stats["throttled"],
+                self.stats["throttle_time"],
+            )
+
+
+class PooledRequests:
+    """Stand-in for the requests module in the API library, sending requests through a SessionPool"""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def request(self, method, url, **kwargs):
+        """Replaces requests.request()"""
+        return self.pool.request(method, url, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(requests, name)
+
+
+def install(pool, client):
+    """Route the requests of the API library through the pool, which takes over retrying requests"""
+    client.retry_waits = []
+    for module in [api_cspm, api_cwpp, api_pccs]:
+        module.requests = PooledRequests(pool)
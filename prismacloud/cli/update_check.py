@@ -0,0 +1,117 @@
+""" Cached Update Check, refreshed in the background """
+
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import prismacloud.cli.version as cli_version
+
+# Check for a new version of the CLI once a day, and retry a failed check after an hour.
+UPDATE_CHECK_TTL = 24 * 60 * 60
+UPDATE_CHECK_RETRY = 60 * 60
+
+# Set this environment variable (for example, in CI) to disable the update check.
+UPDATE_CHECK_DISABLE_VARIABLE = "PC_DISABLE_UPDATE_CHECK"
+
+PACKAGE_NAME = "prismacloud-cli"
+
+
+def get_update_check_file():
+    """Return the update check cache file"""
+    return os.path.join(str(Path.home()), ".prismacloud", ".update_check.json")
+
+
+def update_check_disabled():
+    """Return True if the update check is disabled via the environment"""
+    return os.environ.get(UPDATE_CHECK_DISABLE_VARIABLE, "").lower() not in ["", "0", "false", "no"]
+
+
+def read_update_check():
+    """Return the cached result of the last update check"""
+    try:
+        with open(get_update_check_file(), "r") as update_check_file:
+            return json.load(update_check_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_update_check(update_check):
+    """Write the result of an update check"""
+    update_check_file_name = get_update_check_file()
+    temporary_file_name = f"{update_check_file_name}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(update_check_file_name), exist_ok=True)
+        with open(temporary_file_name, "w") as update_check_file:
+            json.dump(update_check, update_check_file)
+        os.replace(temporary_file_name, update_check_file_name)
+    except OSError as exc:
+        logging.debug("Error writing update check file: %s", exc)
+
+
+def refresh_in_background(update_check):
+    """Start a detached process to check for a new version, unless one was started recently"""
+    if time.time() - update_check.get("attempted", 0) < UPDATE_CHECK_RETRY:
+        return
+    write_update_check(dict(update_check, attempted=time.time()))
+    try:
+        options = {}
+        if os.name == "nt":
+            options["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            options["start_new_session"] = True
+        subprocess.Popen(  # pylint:disable=consider-using-with
+            [sys.executable, "-m", "prismacloud.cli.update_check"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            close_fds=True,
+            **options,
+        )
+    except OSError as exc:
+        logging.debug("Error starting update check: %s", exc)
+
+
+def get_cached_available_version():
+    """
+    Return the newer version available, according to the cached update check, or None.
+    Refresh the cached update check in the background when it is older than a day.
+    """
+    if update_check_disabled():
+        return None
+    update_check = read_update_check()
+    # A check made by another version of the CLI (before an upgrade) is stale.
+    if (
+        time.time() - update_check.get("checked", 0) > UPDATE_CHECK_TTL
+        or update_check.get("version") != cli_version.version
+    ):
+        refresh_in_background(update_check)
+    if update_check.get("version") != cli_version.version:
+        return None
+    return update_check.get("available_version")
+
+
+def check_for_update():
+    """Check for a new version of the CLI, and cache the result"""
+    from update_checker import UpdateChecker  # pylint:disable=import-outside-toplevel
+
+    result = UpdateChecker().check(package_name=PACKAGE_NAME, package_version=cli_version.version)
+    update_check = read_update_check()
+    update_check.update(
+        {
+            "checked": time.time(),
+            "version": cli_version.version,
+            "available_version": result.available_version if result else None,
+        }
+    )
+    write_update_check(update_check)
+
+
+if __name__ == "__main__":
+    try:
+        check_for_update()
+    except Exception:  # pylint:disable=broad-except
+        pass
@@ -0,0 +1,355 @@
+""" Streaming Output Writers """
+
+import json
+import logging
+import pickle
+import sqlite3
+import sys
+import tempfile
+
+import click
+
+from prismacloud.cli.columnar import ROWS_PER_BATCH, ColumnarSchema, get_pyarrow
+from prismacloud.cli.database import SQLITE_OUTPUT_PREFIX, RecordTable, connect, get_table_name, parse_sqlite_output
+from prismacloud.cli.dedupe import SeenKeys, get_record_key
+from prismacloud.cli.records import flatten_record, get_columns_pattern, match_record, parse_filter, project_record
+from prismacloud.cli.timestamps import DEFAULT_TIME_FORMAT, normalize_record_timestamps
+
+# The number of rows serialized at a time when writing a whole data frame, which bounds the memory of the output.
+CHUNK_ROWS = 10000
+
+
+class StreamWriter:
+    """
+    Write output incrementally, a page of records at a time, instead of building the whole document first.
+    Output goes to the console, or to a (text) file, without color.
+    """
+
+    color = "green"
+
+    def __init__(self, params=None, file=None):
+        self.params = params or {}
+        self.file = file
+        self.rows = 0
+
+    def write(self, text):
+        """Write text to the console, or to the file"""
+        if self.file is not None:
+            self.file.write(text)
+        else:
+            click.secho(text, fg=self.color, nl=False)
+
+    def open(self):
+        """Write the start of the document"""
+
+    def write_frame(self, data_frame):
+        """Write a page of processed records"""
+
+    def close(self):
+        """Write the end of the document"""
+
+
+class JsonWriter(StreamWriter):
+    """Write a JSON array of records, as data_frame.to_json(orient="records") would"""
+
+    def open(self):
+        self.write("[")
+
+    def write_frame(self, data_frame):
+        if data_frame.shape[0] == 0:
+            return
+        records = data_frame.to_json(orient="records")[1:-1]
+        self.write(("," if self.rows else "") + records)
+        self.rows += data_frame.shape[0]
+
+    def close(self):
+        self.write("]\n")
+
+
+class CsvWriter(StreamWriter):
+    """
+    Write CSV, with the columns of all the pages. As a column can first appear in any page, pages are spooled
+    to a temporary file, and written when the last page has arrived, unless the columns are given in advance.
+    """
+
+    def __init__(self, params=None, file=None, columns=None):
+        super().__init__(params, file)
+        self.columns = columns
+        self.header_written = False
+        self.spool = None
+        self.spooled_pages = 0
+
+    def write_frame(self, data_frame):
+        if self.columns is not None and self.spool is None:
+            self.write_page(data_frame)
+            return
+        if self.spool is None:
+            self.spool = tempfile.TemporaryFile()
+            self.columns = list(data_frame.columns)
+        else:
+            self.columns += [column for column in data_frame.columns if column not in self.columns]
+        pickle.dump(data_frame, self.spool, protocol=pickle.HIGHEST_PROTOCOL)
+        self.spooled_pages += 1
+
+    def write_page(self, data_frame):
+        """Write a page of records, with the columns of the output, and the header before the first page"""
+        if data_frame.shape[0] == 0 and self.header_written:
+            return
+        if list(data_frame.columns) != self.columns:
+            data_frame = data_frame.reindex(columns=self.columns, fill_value="")
+        self.write(data_frame.to_csv(index=False, header=not self.header_written))
+        self.header_written = True
+        self.rows += data_frame.shape[0]
+
+    def close(self):
+        if self.spool is not None:
+            self.spool.seek(0)
+            for _page in range(self.spooled_pages):
+                self.write_page(pickle.load(self.spool))
+            self.spool.close()
+        self.write("\n")
+
+
+class CountWriter(StreamWriter):
+    """Write the number of records"""
+
+    def write_frame(self, data_frame):
+        self.rows += data_frame.shape[0]
+
+    def close(self):
+        click.secho(self.rows, fg="red")
+
+
+class RawWriter(StreamWriter):
+    """Write the unprocessed records as a JSON array, as json.dumps() would"""
+
+    color = None
+
+    def open(self):
+        self.write("[")
+
+    def write_records(self, records):
+        """Write a page of unprocessed records"""
+        if not records:
+            return
+        self.write((", " if self.rows else "") + ", ".join(json.dumps(record) for record in records))
+        self.rows += len(records)
+
+    def close(self):
+        self.write("]\n")
+
+
+class NdjsonWriter(StreamWriter):
+    """
+    Write one JSON record per line as the records arrive, without pandas.
+    Records are flattened, their timestamps formatted, filtered with a simple --filter, projected with --columns,
+    and duplicates (of the last records written) are removed.
+    """
+
+    def __init__(self, params=None, file=None):
+        super().__init__(params, file)
+        self.columns_pattern = None
+        self.filter = None
+        self.seen_keys = SeenKeys() if self.params.get("dedupe") else None
+        self.time_format = self.params.get("time_format") or DEFAULT_TIME_FORMAT
+        if self.params.get("columns"):
+            self.columns_pattern = get_columns_pattern(self.params["columns"].split(","))
+        if self.params.get("query_filter"):
+            try:
+                self.filter = parse_filter(self.params["query_filter"])
+            except ValueError as exc:
+                logging.error("Error applying query filter: %s", exc)
+                logging.error("With -o ndjson, a filter compares columns with values, e.g.: severity == 'high' and score > 7")
+                logging.error("The given filter has not been applied.")
+
+    def write_records(self, records):
+        """Write records, one per line"""
+        stream = self.file or sys.stdout
+        for record in records:
+            if isinstance(record, dict):
+                record = normalize_record_timestamps(flatten_record(record), self.time_format)
+                if self.filter and not match_record(record, self.filter):
+                    continue
+                if self.columns_pattern:
+                    record = project_record(record, self.columns_pattern)
+                if self.seen_keys is not None and self.seen_keys.add(get_record_key(record, self.params.get("dedupe_key"))):
+                    continue
+            stream.write(json.dumps(record) + "\n")
+            self.rows += 1
+        stream.flush()
+
+    def write_frame(self, data_frame):
+        """Write processed records (such as the result of a --sql query), one per line"""
+        if data_frame.shape[0]:
+            (self.file or sys.stdout).write(data_frame.to_json(orient="records", lines=True))
+            self.rows += data_frame.shape[0]
+
+
+class ColumnarWriter(StreamWriter):
+    """
+    Write typed columns to a binary file, a batch of records at a time. As the type of a column can change
+    (e.g. from int to float), and a column can first appear, in any page, pages are spooled to a temporary file,
+    and written when the last page has arrived, with the columns and types of all the pages.
+    Text columns with repeated values are dictionary encoded.
+    """
+
+    def __init__(self, params=None, file=None):
+        super().__init__(params, file)
+        self.schema = ColumnarSchema()
+        self.spool = None
+        self.spooled_pages = 0
+        self.writer = None
+        self.stream = None
+
+    def open(self):
+        if self.file is None and sys.stdout.isatty():
+            logging.error("The %s output format is binary, redirect the output to a file", self.params.get("output"))
+            sys.exit(1)
+        get_pyarrow()
+
+    def open_writer(self, stream, schema):
+        """Return the writer of the format, writing to a binary stream"""
+        raise NotImplementedError
+
+    def write_frame(self, data_frame):
+        if self.spool is None:
+            self.spool = tempfile.TemporaryFile()
+        self.schema.add(data_frame)
+        pickle.dump(data_frame, self.spool, protocol=pickle.HIGHEST_PROTOCOL)
+        self.spooled_pages += 1
+
+    def read_batches(self):
+        """Read the spooled pages, in batches of at least ROWS_PER_BATCH records (and at least one batch)"""
+        import pandas as pd  # pylint:disable=import-outside-toplevel
+
+        frames = []
+        buffered_rows = 0
+        batches = 0
+        if self.spool is not None:
+            self.spool.seek(0)
+            for _page in range(self.spooled_pages):
+                data_frame = pickle.load(self.spool)
+                frames.append(data_frame)
+                buffered_rows += data_frame.shape[0]
+                if buffered_rows >= ROWS_PER_BATCH:
+                    yield pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+                    frames = []
+                    buffered_rows = 0
+                    batches += 1
+            self.spool.close()
+        if frames or not batches:
+            yield pd.concat(frames, ignore_index=True) if len(frames) > 1 else (frames or [pd.DataFrame()])[0]
+
+    def close(self):
+        self.schema.build()
+        # Write to the binary stream under the text stream
+        text_stream = self.file or sys.stdout
+        text_stream.flush()
+        self.stream = text_stream.buffer
+        self.writer = self.open_writer(self.stream, self.schema)
+        for data_frame in self.read_batches():
+            try:
+                batch = self.schema.to_batch(data_frame)
+            except ValueError as exc:
+                logging.error("Error writing %s output: %s", self.params.get("output"), exc)
+                self.writer.close()
+                sys.exit(1)
+            self.writer.write_batch(batch)
+            self.rows += data_frame.shape[0]
+        self.writer.close()
+        self.stream.flush()
+
+
+class ParquetWriter(ColumnarWriter):
+    """Write Parquet, a row group per batch of records"""
+
+    def open_writer(self, stream, schema):
+        import pyarrow.parquet  # pylint:disable=import-outside-toplevel
+
+        return pyarrow.parquet.ParquetWriter(stream, schema.schema, use_dictionary=list(schema.dictionaries) or False)
+
+
+class FeatherWriter(ColumnarWriter):
+    """Write Feather (the Arrow IPC file format), compressed with LZ4 if available"""
+
+    def open_writer(self, stream, schema):
+        pa = get_pyarrow()
+        compression = "lz4" if pa.Codec.is_available("lz4") else None
+        options = pa.ipc.IpcWriteOptions(compression=compression, emit_dictionary_deltas=True)
+        return pa.ipc.new_file(stream, schema.schema, options=options)
+
+
+class ArrowWriter(ColumnarWriter):
+    """Write the Arrow IPC streaming format"""
+
+    def open_writer(self, stream, schema):
+        pa = get_pyarrow()
+        return pa.ipc.new_stream(stream, schema.schema, options=pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True))
+
+
+class SqliteWriter(StreamWriter):
+    """
+    Write records to a table of a SQLite database (sqlite:PATH[:TABLE], by default a table named after the command),
+    creating or extending the table, a page of records at a time
+    """
+
+    def __init__(self, params=None, file=None):
+        super().__init__(params, file)
+        self.path, self.table_name = parse_sqlite_output(self.params["output"])
+        if not self.table_name:
+            self.table_name = get_table_name(" ".join(click.get_current_context().command_path.split()[1:]))
+        self.connection = None
+        self.table = None
+
+    def open(self):
+        try:
+            self.connection = connect(self.path)
+            self.table = RecordTable(self.connection, self.table_name, self.params.get("upsert_key"))
+        except sqlite3.Error as exc:
+            logging.error("Error opening SQLite database %s: %s", self.path, exc)
+            sys.exit(1)
+
+    def write_frame(self, data_frame):
+        try:
+            self.table.insert(data_frame)
+        except sqlite3.Error as exc:
+            logging.error("Error writing to table %s of SQLite database %s: %s", self.table_name, self.path, exc)
+            sys.exit(1)
+        self.rows += data_frame.shape[0]
+
+    def close(self):
+        try:
+            self.table.close()
+        except sqlite3.Error as exc:
+            logging.error("Error writing to table %s of SQLite database %s: %s", self.table_name, self.path, exc)
+            sys.exit(1)
+        finally:
+            self.connection.close()
+        click.secho("%s records written to table %s of %s" % (self.rows, self.table_name, self.path), fg="green")
+
+
+def write_chunks(writer, data_frame, rows=CHUNK_ROWS):
+    """Write a data frame with a streaming writer, serializing a chunk of rows at a time instead of the whole frame"""
+    writer.open()
+    for start in range(0, max(data_frame.shape[0], 1), rows):
+        end = start + rows
+        writer.write_frame(data_frame.iloc[start:end])
+    writer.close()
+
+
+def get_output_format(output):
+    """Return the format of an output: sqlite for sqlite:PATH[:TABLE], otherwise the output itself"""
+    return "sqlite" if output.startswith(SQLITE_OUTPUT_PREFIX) else output
+
+
+STREAM_WRITERS = {
+    "json": JsonWriter,
+    "csv": CsvWriter,
+    "count": CountWriter,
+    "raw": RawWriter,
+    "ndjson": NdjsonWriter,
+    "parquet": ParquetWriter,
+    "feather": FeatherWriter,
+    "arrow": ArrowWriter,
+    "sqlite": SqliteWriter,
+}
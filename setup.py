@@ -21,7 +21,7 @@ spec.loader.exec_module(mod)  # type: ignore
 version = mod.version  # type: ignore
 
 setup(
-    extras_require={},
+    extras_require={"columnar": ["pyarrow"], "zstd": ["zstandard"]},
     install_requires=[
         "api-client",
         "click",
@@ -64,6 +64,6 @@ setup(
     ],
     entry_points="""
         [console_scripts]
-        pc=prismacloud.cli:cli
+        pc=prismacloud.cli.daemon:main
     """,
 )
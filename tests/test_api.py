@@ -0,0 +1,93 @@
+import sys
+import time
+
+import click
+import pytest
+
+from prismacloud.cli import api
+from prismacloud.cli.api import exit_on_errors, fan_out
+
+
+def get_item(item, delay=0.0):
+    time.sleep(delay)
+    if item == "error":
+        raise ValueError("request failed")
+    if item == "exit":
+        # The API library exits on API errors.
+        sys.exit(1)
+    return item.upper()
+
+
+def test_fan_out():
+    items = ["a", "error", "b", "exit", "c"]
+    # Later requests complete first, and the results are still in the order of the requests.
+    specs = [(get_item, {"item": item, "delay": 0.05 * (len(items) - index)}) for index, item in enumerate(items)]
+    results, errors = fan_out(specs, concurrency=len(items))
+    assert results == ["A", None, "B", None, "C"]
+    assert sorted(index for index, _exc in errors) == [1, 3]
+    assert {type(exc) for _index, exc in errors} == {ValueError, SystemExit}
+    assert fan_out([], concurrency=2) == ([], [])
+
+
+def test_exit_on_errors():
+    exit_on_errors([], [])
+    with pytest.raises(SystemExit) as exc_info:
+        exit_on_errors([], [(0, ValueError("request failed"))])
+    assert exc_info.value.code == 1
+
+
+def test_get_resolved_config(monkeypatch):
+    resolutions = []
+
+    def map_cli_config_to_api_config():
+        resolutions.append(click.get_current_context().params["configuration"])
+        return {"url": "api.example.com", "resolution": len(resolutions)}
+
+    monkeypatch.setattr(api, "map_cli_config_to_api_config", map_cli_config_to_api_config)
+    monkeypatch.setattr(api, "resolved_config", dict(api.resolved_config, key=None, settings=None, applied=None))
+    monkeypatch.delenv("PC_URL", raising=False)
+    command = click.Command("pc", params=[click.Option(["--configuration"])])
+
+    # Resolve the configuration once, for the same configuration and environment.
+    with click.Context(command) as context:
+        context.params["configuration"] = "tenant"
+        assert api.get_resolved_config() == {"url": "api.example.com", "resolution": 1}
+        assert api.get_resolved_config()["resolution"] == 1
+        assert api.resolved_config["configuration"] == "tenant"
+
+        # Resolve the configuration again, when the environment changes.
+        monkeypatch.setenv("PC_URL", "api2.example.com")
+        assert api.get_resolved_config()["resolution"] == 2
+        assert api.get_resolved_config()["resolution"] == 2
+
+    # Without a click context (in a worker thread), use the configuration last resolved.
+    assert api.get_resolved_config()["resolution"] == 2
+
+    # Resolve the configuration again, when another configuration is selected.
+    with click.Context(command) as context:
+        context.params["configuration"] = "other"
+        assert api.get_resolved_config()["resolution"] == 3
+        assert api.resolved_config["configuration"] == "other"
+    assert resolutions == ["tenant", "tenant", "other"]
+
+
+def test_iter_compute_records_limit(monkeypatch):
+    requested_pages = []
+
+    def iter_compute_pages(*_args):
+        try:
+            for offset in range(0, 500, 50):
+                requested_pages.append(offset)
+                yield list(range(offset, offset + 50))
+        finally:
+            requested_pages.append("closed")
+
+    monkeypatch.setattr(api, "setup_api", lambda: None)
+    monkeypatch.setattr(api, "iter_compute_pages", iter_compute_pages)
+    assert list(api.iter_compute_records("api/v1/images", limit=70)) == list(range(70))
+    assert requested_pages == [0, 50, "closed"]
+    requested_pages.clear()
+    assert list(api.iter_compute_records("api/v1/images", limit=50)) == list(range(50))
+    assert requested_pages == [0, "closed"]
+    requested_pages.clear()
+    assert len(list(api.iter_compute_records("api/v1/images"))) == 500
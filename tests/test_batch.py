@@ -0,0 +1,95 @@
+import io
+import threading
+
+import pytest
+
+from prismacloud.cli import cli
+from prismacloud.cli.batch import ThreadLocalStream, get_global_arguments, load_plan
+
+PLAN = """
+- name: policies
+  command: policy list
+  output: json
+- command: alert list --status open
+  output: csv
+  columns: id,status
+  filter: "status == 'open'"
+  file: reports/open-alerts.csv
+- stats dashboard
+"""
+
+
+def test_load_plan(tmp_path):
+    plan_file = tmp_path / "plan.yaml"
+    plan_file.write_text(PLAN)
+    entries = load_plan(str(plan_file), "out")
+    assert entries[0] == {
+        "name": "policies",
+        "command": "policy list",
+        "arguments": ["-o", "json", "policy", "list"],
+        "file": "out/policies.json",
+    }
+    assert entries[1]["arguments"] == [
+        "-o",
+        "csv",
+        "--columns",
+        "id,status",
+        "--filter",
+        "status == 'open'",
+        "alert",
+        "list",
+        "--status",
+        "open",
+    ]
+    assert entries[1]["file"] == "out/reports/open-alerts.csv"
+    assert entries[2]["name"] == "stats_dashboard"
+    assert entries[2]["file"] == "out/stats_dashboard.txt"
+
+
+@pytest.mark.parametrize(
+    "plan",
+    [
+        "{}",
+        "- command: nope",
+        "- command: serve",
+        "- command: policy list\n  outpt: json",
+        "- output: json",
+        "- command: policy list\n  output: raw",
+    ],
+)
+def test_load_plan_errors(tmp_path, plan):
+    plan_file = tmp_path / "plan.yaml"
+    plan_file.write_text(plan)
+    with pytest.raises(ValueError):
+        load_plan(str(plan_file))
+
+
+def test_global_arguments():
+    params = {
+        "configuration": "tenant2",
+        "output": "json",
+        "columns": "id",
+        "query_filter": None,
+        "cache_ttl": 60,
+        "no_cache": False,
+        "verbose": True,
+    }
+    assert get_global_arguments(cli, params) == ["-v", "-c", "tenant2", "--cache-ttl", "60"]
+
+
+def test_thread_local_stream():
+    default = io.StringIO()
+    redirected = io.StringIO()
+    stream = ThreadLocalStream(default)
+
+    def write():
+        stream.redirect(redirected)
+        stream.write("thread")
+        stream.redirect(None)
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    thread.join()
+    stream.write("main")
+    assert redirected.getvalue() == "thread"
+    assert default.getvalue() == "main"
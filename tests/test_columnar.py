@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+from prismacloud.cli.columnar import ColumnarSchema, infer_type
+
+pa = pytest.importorskip("pyarrow")
+
+
+def test_infer_type():
+    assert infer_type([1, "", 2]) == pa.int64()
+    assert infer_type([1, 2.5, None]) == pa.float64()
+    assert infer_type([True, False, ""]) == pa.bool_()
+    assert infer_type([1, "x"]) == pa.string()
+    assert infer_type(["", None]) == pa.string()
+
+
+def test_columnar_schema():
+    first = pd.DataFrame(
+        {"id": ["A-1", "A-2", "A-3"], "severity": ["high", "low", "high"], "score": [1, "", 3], "tags": [[1], [], [1]]}
+    )
+    schema = ColumnarSchema(first)
+    assert schema.schema.field("id").type == pa.string()
+    assert pa.types.is_dictionary(schema.schema.field("severity").type)
+    assert schema.schema.field("score").type == pa.int64()
+    batch = schema.to_batch(first)
+    assert batch.column(2).to_pylist() == [1, None, 3]
+    assert batch.column(3).to_pylist() == ["[1]", "[]", "[1]"]
+    # The dictionary grows with the following batches, and missing columns are empty.
+    batch = schema.to_batch(pd.DataFrame({"severity": ["medium", "high"], "id": ["A-4", "A-5"]}))
+    assert batch.column(1).to_pylist() == ["medium", "high"]
+    assert batch.column(1).dictionary.to_pylist() == ["high", "low", "medium"]
+    assert batch.column(2).to_pylist() == [None, None]
+    with pytest.raises(ValueError):
+        schema.to_batch(pd.DataFrame({"score": ["not a number"]}))
+
+
+def test_columnar_schema_of_all_batches():
+    schema = ColumnarSchema()
+    first = pd.DataFrame({"id": ["A-1", "A-2"], "cvss": [7, ""], "count": [1, 2], "name": ["", ""]})
+    second = pd.DataFrame({"id": ["A-3"], "cvss": [7.5], "count": ["many"], "name": ["x"], "region": ["us-east-1"]})
+    schema.add(first)
+    schema.add(second)
+    schema.build()
+    # Integers and decimals widen to decimals, numbers and text to text, and later columns are kept.
+    assert schema.schema.names == ["id", "cvss", "count", "name", "region"]
+    assert schema.schema.field("cvss").type == pa.float64()
+    assert schema.schema.field("count").type == pa.string()
+    assert schema.schema.field("name").type == pa.string()
+    assert schema.to_batch(first).column(1).to_pylist() == [7.0, None]
+    assert schema.to_batch(first).column(2).to_pylist() == ["1", "2"]
+    assert schema.to_batch(first).column(4).to_pylist() == [None, None]
+    assert schema.to_batch(second).column(1).to_pylist() == [7.5]
+
+
+def test_columnar_schema_timestamps():
+    times = pd.Series([1700000000000, 0]).where(pd.Series([True, False]))
+    data_frame = pd.DataFrame({"lastSeen": pd.to_datetime(times, unit="ms", utc=True).astype("datetime64[ms, UTC]")})
+    schema = ColumnarSchema(data_frame)
+    assert schema.schema.field("lastSeen").type == pa.timestamp("ms", tz="UTC")
+    values = schema.to_batch(data_frame).column(0).to_pylist()
+    assert values[0] == pd.Timestamp(1700000000000, unit="ms", tz="UTC") and values[1] is None
@@ -0,0 +1,66 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from prismacloud.cli.daemon import daemon_supported
+
+RUN_CLI = "import sys; sys.argv[0] = 'pc'; from prismacloud.cli.daemon import main; main()"
+
+
+@pytest.fixture(name="environment")
+def fixture_environment(tmp_path):
+    """A home directory with a configuration for an API that refuses connections, and a daemon socket"""
+    config_directory = tmp_path / ".prismacloud"
+    config_directory.mkdir()
+    (config_directory / ".community_supported_accepted").write_text("Yes")
+    (config_directory / "credentials.json").write_text(
+        json.dumps({"url": "127.0.0.1:9", "identity": "identity", "secret": "secret", "verify": False})
+    )
+    return dict(
+        os.environ,
+        HOME=str(tmp_path),
+        USERPROFILE=str(tmp_path),
+        PC_DISABLE_UPDATE_CHECK="1",
+        PC_DAEMON_SOCKET=str(tmp_path / "daemon.sock"),
+    )
+
+
+def run(environment, tmp_path, *args):
+    return subprocess.run(
+        [sys.executable, "-c", RUN_CLI, *args],
+        env=environment,
+        cwd=tmp_path,
+        capture_output=True,
+        text=True,
+        check=False,
+        timeout=60,
+    )
+
+
+@pytest.mark.skipif(not daemon_supported(), reason="The daemon needs Unix domain sockets and fork")
+def test_daemon_runs_forwarded_commands(environment, tmp_path):
+    expected = run(dict(environment, PC_NO_DAEMON="1"), tmp_path, "-o", "json", "cache", "stats")
+    daemon = subprocess.Popen(
+        [sys.executable, "-c", RUN_CLI, "serve"], env=environment, cwd=tmp_path, stdin=subprocess.DEVNULL
+    )
+    try:
+        for _ in range(300):
+            if (tmp_path / "daemon.sock").exists():
+                break
+            time.sleep(0.1)
+        assert (tmp_path / "daemon.sock").exists()
+        result = run(environment, tmp_path, "-o", "json", "cache", "stats")
+        assert result.returncode == 0, result.stderr
+        assert result.stdout == expected.stdout
+        assert run(environment, tmp_path, "no-such-command").returncode == 2
+        assert run(environment, tmp_path, "serve", "--stop").returncode == 0
+        assert daemon.wait(timeout=30) == 0
+    finally:
+        if daemon.poll() is None:
+            daemon.kill()
+    assert not (tmp_path / "daemon.sock").exists()
+    assert run(environment, tmp_path, "serve", "--stop").returncode == 1
@@ -0,0 +1,80 @@
+import sqlite3
+
+import pandas as pd
+
+from prismacloud.cli.database import RecordTable, get_reference_tables, parse_sqlite_output, run_query
+
+
+def test_parse_sqlite_output():
+    assert parse_sqlite_output("sqlite:pc.db") == ("pc.db", None)
+    assert parse_sqlite_output("sqlite:data/pc.db:alerts") == ("data/pc.db", "alerts")
+    assert parse_sqlite_output("sqlite:C:\\data\\pc.db") == ("C:\\data\\pc.db", None)
+
+
+def test_record_table():
+    connection = sqlite3.connect(":memory:")
+    table = RecordTable(connection, "alert_list", key="id")
+    table.insert(pd.DataFrame({"id": ["A-1", "A-2"], "status": ["open", "open"], "riskScore": [8, ""]}))
+    table.close()
+    # Records with the same key replace the existing ones, and new fields add columns.
+    table = RecordTable(connection, "alert_list", key="id")
+    table.insert(pd.DataFrame({"id": ["A-2", "A-3"], "status": ["resolved", "open"], "resource.accountId": ["1", "2"]}))
+    table.close()
+    rows = connection.execute('SELECT id, status, riskScore, "resource.accountId" FROM alert_list ORDER BY id').fetchall()
+    assert rows == [("A-1", "open", 8, None), ("A-2", "resolved", None, "1"), ("A-3", "open", None, "2")]
+    indexes = [row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+    assert sorted(indexes) == ["alert_list_id_key", "alert_list_resource.accountId"]
+
+
+def test_record_table_without_key():
+    # Rows of a compliance check share the ID of the check: without a key, records are appended.
+    connection = sqlite3.connect(":memory:")
+    table = RecordTable(connection, "hosts_compliances")
+    table.insert(pd.DataFrame({"hostname": ["h1", "h2", "h3"], "id": [6112, 6112, 6112]}))
+    table.close()
+    rows = connection.execute("SELECT hostname, id FROM hosts_compliances ORDER BY hostname").fetchall()
+    assert rows == [("h1", 6112), ("h2", 6112), ("h3", 6112)]
+
+
+def test_record_table_columns_differing_in_case():
+    # SQLite column names are case-insensitive: columns that differ only in case are one column.
+    connection = sqlite3.connect(":memory:")
+    table = RecordTable(connection, "images", key="ID")
+    table.insert(pd.DataFrame({"id": ["I-1", "I-2"], "name": ["a", ""], "Name": ["", "b"], "Score": [1, 2]}))
+    table.close()
+    table = RecordTable(connection, "images", key="id")
+    table.insert(pd.DataFrame({"ID": ["I-2", "I-3"], "NAME": ["c", "d"], "score": [3, 4], "Tags": ["x", "y"]}))
+    table.insert(pd.DataFrame({"id": ["I-4"], "tags": ["z"]}))
+    table.close()
+    assert [row[1] for row in connection.execute("PRAGMA table_info(images)")] == ["id", "name", "Score", "Tags"]
+    rows = connection.execute("SELECT id, name, score, tags FROM images ORDER BY id").fetchall()
+    assert rows == [("I-1", "a", 1, None), ("I-2", "c", 3, "x"), ("I-3", "d", 4, "y"), ("I-4", None, None, "z")]
+
+
+def test_query():
+    assert get_reference_tables('SELECT "resource.tags" FROM result JOIN Policies p ON p.policyId = result.policyId') == [
+        "policies"
+    ]
+    connection = sqlite3.connect(":memory:")
+    table = RecordTable(connection, "result")
+    table.insert(pd.DataFrame({"id": ["A-1", "A-2", "A-3"], "policy.severity": ["high", "low", "high"]}))
+    table.close()
+    result = run_query(connection, 'SELECT "policy.severity", count(*) AS alerts FROM result GROUP BY 1 ORDER BY 1')
+    assert result.to_dict(orient="records") == [
+        {"policy.severity": "high", "alerts": 2},
+        {"policy.severity": "low", "alerts": 1},
+    ]
+
+
+def test_query_without_records():
+    connection = sqlite3.connect(":memory:")
+    table = RecordTable(connection, "result")
+    table.insert(pd.DataFrame({"id": [], "policy.severity": []}))
+    table.create()
+    table.close()
+    table = RecordTable(connection, "policies")
+    table.create()
+    table.close()
+    assert run_query(connection, "SELECT count(*) AS alerts FROM result").to_dict(orient="records") == [{"alerts": 0}]
+    result = run_query(connection, 'SELECT r."policy.severity" FROM result r JOIN policies p ON p.id = r.id')
+    assert result.shape == (0, 1)
@@ -0,0 +1,42 @@
+import pandas as pd
+
+from prismacloud.cli.dedupe import SeenKeys, drop_duplicate_rows, get_record_key
+
+
+def test_drop_duplicate_rows_by_values():
+    data_frame = pd.DataFrame(
+        {"name": ["a", "a", "b", "a"], "score": [1, 1, 2, 3], "tags": [[{"k": 1}], [{"k": 1}], [], [{"k": 1}]]}
+    )
+    deduped = drop_duplicate_rows(data_frame)
+    assert deduped.index.tolist() == [0, 2, 3]
+    assert deduped["score"].dtype == data_frame["score"].dtype
+
+
+def test_drop_duplicate_rows_by_key():
+    data_frame = pd.DataFrame({"id": ["A-1", "A-2", "A-1"], "status": ["open", "open", "resolved"]})
+    assert drop_duplicate_rows(data_frame, key="id").index.tolist() == [0, 1]
+    # Without a key for every row, rows are compared by their values.
+    data_frame["id"] = ["A-1", "", "A-1"]
+    assert drop_duplicate_rows(data_frame, key="id").index.tolist() == [0, 1, 2]
+
+
+def test_keep_rows_sharing_an_id():
+    # Rows of a compliance check share the ID of the check, and differ by host.
+    data_frame = pd.DataFrame({"id": [6112, 6112, 6112, 6112], "hostname": ["h1", "h2", "h3", "h1"]})
+    assert drop_duplicate_rows(data_frame).index.tolist() == [0, 1, 2]
+    assert drop_duplicate_rows(data_frame, SeenKeys()).index.tolist() == [0, 1, 2]
+    assert get_record_key({"id": 6112, "hostname": "h1"}) != get_record_key({"id": 6112, "hostname": "h2"})
+
+
+def test_drop_duplicate_rows_across_pages():
+    seen_keys = SeenKeys(max_size=2)
+    assert drop_duplicate_rows(pd.DataFrame({"id": [1, 2, 2]}), seen_keys)["id"].tolist() == [1, 2]
+    assert drop_duplicate_rows(pd.DataFrame({"id": [2, 3]}), seen_keys)["id"].tolist() == [3]
+    # Only the last keys are remembered.
+    assert drop_duplicate_rows(pd.DataFrame({"id": [1]}), seen_keys)["id"].tolist() == [1]
+
+
+def test_get_record_key():
+    assert get_record_key({"rrn": "rrn:1", "name": "a"}, "rrn") == ("rrn", "rrn:1")
+    assert get_record_key({"name": "a", "score": 1}) == get_record_key({"score": 1, "name": "a"})
+    assert get_record_key({"name": "a", "score": 1}) != get_record_key({"name": "a", "score": 2})
@@ -0,0 +1,32 @@
+import gzip
+
+import pytest
+
+from prismacloud.cli.files import get_file_format, open_output_file
+
+
+def test_get_file_format():
+    assert get_file_format("alerts.csv") == "csv"
+    assert get_file_format("reports/alerts.JSONL.gz") == "ndjson"
+    assert get_file_format("alerts.parquet.zst") == "parquet"
+    assert get_file_format("alerts.out", "json") == "json"
+    assert get_file_format("alerts.gz") is None
+
+
+def test_open_output_file(tmp_path):
+    path = str(tmp_path / "reports" / "alerts.csv.gz")
+    output_file = open_output_file(path)
+    output_file.write("id,status\nA-1,open\n")
+    output_file.close()
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as input_file:
+        assert input_file.read() == "id,status\nA-1,open\n"
+
+
+def test_open_zstd_output_file(tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+    path = str(tmp_path / "alerts.ndjson.zst")
+    output_file = open_output_file(path)
+    output_file.write('{"id": "A-1"}\n')
+    output_file.close()
+    with open(path, "rb") as input_file:
+        assert zstandard.ZstdDecompressor().stream_reader(input_file).read() == b'{"id": "A-1"}\n'
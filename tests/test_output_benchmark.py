@@ -0,0 +1,106 @@
+import io
+import os
+import tracemalloc
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from prismacloud.cli.writers import CHUNK_ROWS, CsvWriter, JsonWriter, write_chunks
+
+# Benchmark 1M rows only with BENCHMARK_LARGE=1, as it takes a few minutes.
+ROWS = [
+    100000,
+    pytest.param(
+        1000000,
+        marks=pytest.mark.skipif(os.environ.get("BENCHMARK_LARGE") != "1", reason="Set BENCHMARK_LARGE=1 to run"),
+    ),
+]
+
+
+@lru_cache(maxsize=None)
+def get_data_frame(rows):
+    """Return a processed data frame of alerts, as show_output() receives it"""
+    index = np.arange(rows)
+    return pd.DataFrame(
+        {
+            "id": pd.Series(index).map("A-{}".format),
+            "status": np.where(index % 10 == 0, "resolved", "open"),
+            "policy.severity": np.array(["low", "medium", "high"])[index % 3],
+            "policy.name": pd.Series(index % 500).map("Policy {} with a longer name".format),
+            "resource.accountId": pd.Series(100000 + index % 40).astype(str),
+            "riskScore": index % 100,
+            "risk": (index % 7) / 3,
+            "lastSeen": pd.to_datetime(1700000000000 + index, unit="ms").astype(str),
+            "resource.tags": pd.Series(index % 3).map('[{{"key": "env", "value": "env-{}"}}]'.format),
+        }
+    )
+
+
+def write_document(writer, data_frame):
+    """The previous approach: serialize the whole data frame into one string, then write it"""
+    text = data_frame.to_csv(index=False) if isinstance(writer, CsvWriter) else data_frame.to_json(orient="records")
+    writer.write(text + "\n")
+
+
+def get_writer(writer_class, data_frame, output_file):
+    """Return a writer of the output of show_output(), with the columns of the data frame for CSV"""
+    if writer_class is CsvWriter:
+        return CsvWriter(file=output_file, columns=list(data_frame.columns))
+    return writer_class(file=output_file)
+
+
+def write_output(write, writer_class, data_frame, output_file):
+    """Write a data frame as a whole document, or in chunks of rows"""
+    write(get_writer(writer_class, data_frame, output_file), data_frame)
+
+
+@pytest.mark.parametrize(
+    "data_frame",
+    [
+        pd.DataFrame(),
+        pd.DataFrame({"a": []}),
+        pd.DataFrame({"a": [1, 2, 3], "b": [1.5, np.nan, 1e20], "c": ["x", "", None], "d": [[1], {"k": "v"}, 'q,"u"\n']}),
+        get_data_frame(100).iloc[::-1],
+    ],
+    ids=["empty", "no rows", "values", "alerts"],
+)
+@pytest.mark.parametrize("rows", [1, 7, CHUNK_ROWS])
+@pytest.mark.parametrize("writer_class", [CsvWriter, JsonWriter], ids=["csv", "json"])
+def test_write_chunks(writer_class, rows, data_frame):
+    """Writing in chunks of rows writes the same bytes as writing the whole document"""
+    document = io.StringIO()
+    write_output(write_document, writer_class, data_frame, document)
+    chunks = io.StringIO()
+    write_chunks(get_writer(writer_class, data_frame, chunks), data_frame, rows)
+    assert chunks.getvalue() == document.getvalue()
+
+
+@pytest.mark.parametrize("writer_class", [CsvWriter, JsonWriter], ids=["csv", "json"])
+def test_output_memory(writer_class):
+    """Writing in chunks of rows needs less memory than writing the whole document"""
+    data_frame = get_data_frame(100000)
+    peak_memory = {}
+    with open(os.devnull, "w", encoding="utf-8") as output_file:
+        for write in [write_document, write_chunks]:
+            tracemalloc.start()
+            write_output(write, writer_class, data_frame, output_file)
+            peak_memory[write] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    assert peak_memory[write_chunks] < peak_memory[write_document] / 2
+
+
+# With SKIP_BENCHMARK=1, write once without the benchmark fixture.
+@pytest.mark.filterwarnings("ignore:Benchmark fixture was not used")
+@pytest.mark.parametrize("rows", ROWS)
+@pytest.mark.parametrize("writer_class", [CsvWriter, JsonWriter], ids=["csv", "json"])
+@pytest.mark.parametrize("write", [write_document, write_chunks], ids=["document", "chunks"])
+def test_output_throughput(benchmark, write, writer_class, rows):
+    """Compare writing a large data frame at once, and in chunks of rows"""
+    data_frame = get_data_frame(rows)
+    with open(os.devnull, "w", encoding="utf-8") as output_file:
+        if os.environ.get("SKIP_BENCHMARK") == "1":
+            write_output(write, writer_class, data_frame, output_file)
+        else:
+            benchmark.pedantic(write_output, args=(write, writer_class, data_frame, output_file), rounds=3, iterations=1)
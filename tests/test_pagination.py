@@ -0,0 +1,133 @@
+""" Tests of the concurrent pagination of the Compute API """
+
+import json
+import logging
+import time
+from types import SimpleNamespace
+
+import click
+import pytest
+
+from prismacloud.cli.pagination import COMPUTE_PAGE_LIMIT, INCOMPLETE_OUTPUT, iter_compute_pages
+
+
+class StubClient:
+    """A stub of the API client, with a valid token"""
+
+    api = ""
+    api_compute = "compute.example.com"
+    user_agent = "prismacloud-cli"
+    verify = True
+    timeout = 10
+    token = "token"
+    token_limit = 540
+
+    def __init__(self):
+        self.token_timer = time.time()
+
+    @staticmethod
+    def error_and_exit(status_code, message):
+        raise SystemExit("%s %s" % (status_code, message))
+
+
+class StubRequest:
+    """A stub of the request function, that responds with the records of a range of offsets"""
+
+    def __init__(self, count, total_count=True, failed_offsets=(), paged=True):
+        self.count = count
+        self.total_count = total_count
+        self.failed_offsets = failed_offsets
+        self.paged = paged
+        self.offsets = []
+        self.in_flight = []
+        self.max_in_flight = 0
+
+    def __call__(self, method, url, *, headers, params, verify, timeout):
+        assert method == "GET" and url == "https://compute.example.com/api/v1/images"
+        assert headers["Authorization"] == "Bearer token" and params["limit"] == COMPUTE_PAGE_LIMIT
+        offset = params["offset"] if self.paged else 0
+        assert verify and timeout == 10
+        self.offsets.append(params["offset"])
+        self.in_flight.append(params["offset"])
+        self.max_in_flight = max(self.max_in_flight, len(self.in_flight))
+        # Respond to the later pages first, to check that the pages are yielded in order.
+        time.sleep(0.02 if offset % (2 * COMPUTE_PAGE_LIMIT) else 0.04)
+        self.in_flight.remove(params["offset"])
+        if offset in self.failed_offsets:
+            return SimpleNamespace(ok=False, status_code=500, text="error", content=b"", headers={})
+        page = list(range(offset, min(offset + COMPUTE_PAGE_LIMIT, self.count)))
+        headers = {"Total-Count": str(self.count)} if self.total_count else {}
+        return SimpleNamespace(ok=True, status_code=200, text="", content=json.dumps(page).encode(), headers=headers)
+
+
+def get_records(request, force=False, concurrency=2):
+    return [
+        record
+        for page in iter_compute_pages(StubClient(), request, "api/v1/images?", {"search": "a"}, force, concurrency)
+        for record in page
+    ]
+
+
+def test_total_count_window():
+    request = StubRequest(1020)
+    assert get_records(request) == list(range(1020))
+    assert sorted(request.offsets) == list(range(0, 1020, COMPUTE_PAGE_LIMIT))
+    assert request.offsets[0] == 0
+    assert 1 < request.max_in_flight <= 2
+
+    request = StubRequest(COMPUTE_PAGE_LIMIT)
+    assert get_records(request) == list(range(COMPUTE_PAGE_LIMIT))
+    assert request.offsets == [0]
+
+    request = StubRequest(0)
+    assert not get_records(request)
+    assert request.offsets == [0]
+
+
+def test_sequential_fallback():
+    # Without a Total-Count header, continue while the pages are full.
+    request = StubRequest(120, total_count=False)
+    assert get_records(request) == list(range(120))
+    assert request.offsets == [0, 50, 100]
+    assert request.max_in_flight == 1
+
+    request = StubRequest(100, total_count=False)
+    assert get_records(request) == list(range(100))
+    assert request.offsets == [0, 50, 100]
+
+    # Stop if the endpoint ignores the offset, and responds with the same page.
+    request = StubRequest(120, total_count=False, paged=False)
+    assert get_records(request) == list(range(COMPUTE_PAGE_LIMIT))
+    assert request.offsets == [0, 50]
+
+
+@pytest.mark.parametrize("total_count", [True, False])
+def test_truncation(total_count, caplog):
+    # Without force, exit at the first page that fails.
+    with pytest.raises(SystemExit, match="500"):
+        get_records(StubRequest(300, total_count, failed_offsets=[150]))
+
+    # With force, keep the pages before the first page that fails, log an error and mark the output as incomplete.
+    with click.Context(click.Command("pc")) as context:
+        with caplog.at_level(logging.ERROR):
+            assert get_records(StubRequest(300, total_count, failed_offsets=[150]), force=True) == list(range(150))
+        assert context.meta[INCOMPLETE_OUTPUT]
+    assert "the output is incomplete" in caplog.text
+
+    with click.Context(click.Command("pc")) as context:
+        assert not get_records(StubRequest(300, total_count, failed_offsets=[0]), force=True)
+        assert context.meta[INCOMPLETE_OUTPUT]
+
+    with click.Context(click.Command("pc")) as context:
+        assert get_records(StubRequest(300, total_count), force=True) == list(range(300))
+        assert INCOMPLETE_OUTPUT not in context.meta
+
+
+def test_stop_requesting_pages():
+    # When the caller stops (e.g. at a limit), the pages of the window that were not requested yet are cancelled.
+    request = StubRequest(5000)
+    pages = iter_compute_pages(StubClient(), request, "api/v1/images", None, False, 2)
+    assert next(pages) == list(range(COMPUTE_PAGE_LIMIT))
+    assert next(pages) == list(range(COMPUTE_PAGE_LIMIT, 2 * COMPUTE_PAGE_LIMIT))
+    pages.close()
+    assert len(request.offsets) <= 2 + 2
@@ -0,0 +1,73 @@
+import pytest
+
+from prismacloud.cli.records import (
+    flatten_record,
+    get_columns_pattern,
+    match_record,
+    parse_filter,
+    project_record,
+    project_records,
+)
+
+record = flatten_record(
+    {
+        "id": "A-1",
+        "status": "open",
+        "riskScore": 8,
+        "enabled": True,
+        "resource": {"name": "bucket", "cloud": {"type": "aws"}},
+        "tags": [{"key": "env"}],
+    }
+)
+
+
+def test_flatten_record():
+    assert record == {
+        "id": "A-1",
+        "status": "open",
+        "riskScore": 8,
+        "enabled": True,
+        "resource.name": "bucket",
+        "resource.cloud.type": "aws",
+        "tags": [{"key": "env"}],
+    }
+
+
+def test_project_record():
+    assert project_record(record, get_columns_pattern(["ID", "cloud"])) == {"id": "A-1", "resource.cloud.type": "aws"}
+
+
+def test_project_records():
+    records = [
+        {"resource": {"id": "r1", "data": {}}, "id": "A-1", "policy": {"severity": "high"}, "status": "open"},
+        {"id": "A-2", "resource": {"id": "r2"}},
+    ]
+    projected = project_records(records, get_columns_pattern(["ID"]), lambda key: key == "policy.severity")
+    # As json_normalize() does, the top level values come first.
+    assert projected == [{"id": "A-1", "resource.id": "r1", "policy.severity": "high"}, {"id": "A-2", "resource.id": "r2"}]
+    assert list(projected[0]) == ["id", "resource.id", "policy.severity"]
+    assert project_records({"id": "A-1", "status": "open"}, get_columns_pattern(["status"])) == [{"status": "open"}]
+    assert project_records(["A-1"], get_columns_pattern(["id"])) is None
+
+
+@pytest.mark.parametrize(
+    "query_filter, expected",
+    [
+        ("status == 'open'", True),
+        ('status != "open"', False),
+        ("riskScore > 7", True),
+        ("riskScore >= 9", False),
+        ("enabled == True", True),
+        ("`resource.cloud.type` == 'aws' and riskScore < 5", False),
+        ("status == 'closed' or resource.name == 'bucket'", True),
+        ("missing == 'x' | id == 'A-1'", True),
+    ],
+)
+def test_match_record(query_filter, expected):
+    assert match_record(record, parse_filter(query_filter)) is expected
+
+
+@pytest.mark.parametrize("query_filter", ["status = 'open'", "status == 'open' and", "riskScore > 7 xor id == 1"])
+def test_parse_filter_errors(query_filter):
+    with pytest.raises(ValueError):
+        parse_filter(query_filter)
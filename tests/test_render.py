@@ -0,0 +1,39 @@
+import pandas as pd
+
+from prismacloud.cli.render import render_frame, render_nested, render_value, wrap
+
+
+def test_render_nested():
+    assert render_nested({"a": 1, "b": {"c": [{"d": 2}, {"e": None}]}}) == "a: 1\nb:\n  c:\n    d: 2\n    e: None\n\n"
+    assert render_nested([{"a": 1}, {"b": 2}]) == "a: 1\n\nb: 2\n\n\n"
+    assert render_nested(["All"]) is None
+
+
+def test_render_value():
+    assert render_value("{'key': 'env', 'value': 'prod'}") == "key: env\nvalue: prod\n\n"
+    assert render_value('{"key": "env"}') == "key: env\n\n"
+    assert render_value({"key": "env"}) == "key: env\n\n"
+    assert render_value("['All']") == "['All']"
+    assert render_value(["All"]) == "['All']"
+    assert render_value("{not a dictionary") == "{not a dictionary"
+    assert render_value(1.5) == "1.5"
+
+
+def test_wrap():
+    assert wrap("short", 25, 10) == "short"
+    assert wrap("a b c d e f g h i j k l m n", 10, 2) == "a b c d e\nf g [...]"
+
+
+def test_render_frame():
+    data_frame = pd.DataFrame(
+        {
+            "name": ["a", "b", "a"],
+            "count": [1, 2, 1],
+            "labels": [[{"key": "env"}], [{"key": "env"}], None],
+        }
+    )
+    rendered = render_frame(data_frame, 25, 10)
+    assert list(rendered.columns) == ["name", "count", "labels"]
+    assert rendered["name"].tolist() == ["a", "b", "a"]
+    assert rendered["count"].tolist() == ["1", "2", "1"]
+    assert rendered["labels"].tolist() == ["key: env", "key: env", ""]
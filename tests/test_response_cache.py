@@ -0,0 +1,100 @@
+import os
+import time
+
+from prismacloud.cli import api
+from prismacloud.cli.response_cache import RequestMemo, ResponseCache, is_cacheable
+
+
+def test_request_memo():
+    memo = RequestMemo(max_size=200, max_response_size=100)
+    response = [{"id": 1}]
+    # The first caller gets the response, the following callers a copy.
+    assert memo.call("a", lambda: response) is response
+    shared = memo.call("a", lambda: None)
+    assert shared == response and shared is not response
+    shared.append({"id": 2})
+    assert memo.call("a", lambda: None) == [{"id": 1}]
+    assert memo.hits == 2
+    # Large responses are not shared, and the least recently used responses are evicted.
+    memo.call("large", lambda: "x" * 200)
+    assert "large" not in memo.responses
+    for key in ["b", "c", "d", "e"]:
+        memo.call(key, lambda: "y" * 80)
+    assert list(memo.responses) == ["d", "e"] and memo.size <= 200
+
+
+def test_is_cacheable():
+    assert is_cacheable("get", "cloud")
+    assert is_cacheable("POST", "/v2/alert")
+    assert is_cacheable("POST", "code/api/v2/errors/branch_scan/resources/abc/policies")
+    assert not is_cacheable("POST", "v2/alert/dismiss")
+    assert not is_cacheable("POST", "cloud")
+    for action in ["PUT", "PATCH", "DELETE"]:
+        assert not is_cacheable(action, "cloud")
+
+
+def test_response_cache_key():
+    key = ResponseCache.key("tenant", "cspm", "/alert/", "post", {"a": 1, "b": None}, {"x": [1], "y": 2})
+    assert key == ResponseCache.key("tenant", "cspm", "alert", "POST", {"a": 1}, {"y": 2, "x": [1]})
+    assert key.startswith("cspm-")
+    assert key != ResponseCache.key("other", "cspm", "alert", "POST", {"a": 1}, {"y": 2, "x": [1]})
+    # A paginated request (all the pages) and a request of the first page do not share a response.
+    assert ResponseCache.key("t", "cwpp", "images", "GET") != ResponseCache.key("t", "cwpp", "images", "GET", paginated=True)
+    # Headers that change the response change the key, authentication headers do not.
+    key = ResponseCache.key("t", "code", "repositories", "GET", headers={"Authorization": "one"})
+    assert key == ResponseCache.key("t", "code", "repositories", "GET", headers={"authorization": "two"})
+    assert key != ResponseCache.key("t", "code", "repositories", "GET", headers={"Accept": "text/csv"})
+
+
+def test_response_cache_ttl(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path))
+    assert cache.get("cspm-a", 60) == (False, None)
+    cache.put("cspm-a", "get", "cloud", [{"id": 1}])
+    assert cache.get("cspm-a", 60) == (True, [{"id": 1}])
+    assert oct(os.stat(cache.file_name("cspm-a")).st_mode & 0o777) == "0o600"
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    assert cache.get("cspm-a", 60) == (False, None)
+    assert (cache.hits, cache.misses) == (1, 2)
+    # A corrupt cache file is a miss.
+    with open(cache.file_name("cspm-b"), "wb") as cache_file:
+        cache_file.write(b"not compressed")
+    assert cache.get("cspm-b", 60) == (False, None)
+
+
+def test_response_cache_eviction(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    for index, key in enumerate(["cspm-a", "cspm-b", "cwpp-c"]):
+        cache.put(key, "GET", "endpoint", "x" * 1000)
+        os.utime(cache.file_name(key), (1000 + index, 1000 + index))
+    # Using a response makes it the most recently used.
+    cache.get("cspm-a", 10**10)
+    cache.max_size = os.path.getsize(cache.file_name("cspm-a")) + os.path.getsize(cache.file_name("cwpp-c"))
+    cache.close()
+    assert sorted(os.listdir(str(tmp_path))) == [".lock", "cspm-a.json.z", "cwpp-c.json.z"]
+    assert [(stats["api"], stats["entries"]) for stats in sorted(cache.stats(), key=lambda stats: stats["api"])] == [
+        ("cspm", 1),
+        ("cwpp", 1),
+    ]
+    assert cache.clear("cwpp") == 1
+    assert cache.clear() == 1
+    assert not cache.stats()
+
+
+def test_cached_requests_by_pagination(tmp_path, monkeypatch):
+    monkeypatch.setattr(api, "response_cache", ResponseCache(str(tmp_path)))
+    monkeypatch.setattr(api, "request_memo", RequestMemo())
+    api.response_cache.ttl = 300
+    calls = []
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def execute(action, endpoint, query_params, body_params, request_headers, force, paginated):
+        calls.append(paginated)
+        return ["all pages"] if paginated else ["first page"]
+
+    cached_execute = api.cache_responses(execute, "cwpp")
+    assert cached_execute(None, "GET", "api/v1/images") == ["first page"]
+    assert cached_execute(None, "GET", "api/v1/images", paginated=True) == ["all pages"]
+    assert cached_execute(None, "GET", "api/v1/images", paginated=True) == ["all pages"]
+    assert cached_execute(None, "GET", "api/v1/images") == ["first page"]
+    assert calls == [False, True]
@@ -0,0 +1,85 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+# Maximum time, in seconds, for 'pc --help'. Override with PC_STARTUP_BUDGET on slow machines.
+STARTUP_BUDGET = float(os.environ.get("PC_STARTUP_BUDGET", "1.0"))
+
+HEAVY_MODULES = ["pandas", "tabulate", "pydantic_settings", "coloredlogs", "click_completion"]
+
+RUN_CLI = "import sys; sys.argv[0] = 'pc'; from prismacloud.cli import cli; cli()"
+
+
+@pytest.fixture(name="environment")
+def fixture_environment(tmp_path):
+    """A home directory with a configuration that does not need network access, and no update check"""
+    config_directory = tmp_path / ".prismacloud"
+    config_directory.mkdir()
+    (config_directory / ".community_supported_accepted").write_text("Yes")
+    (config_directory / "credentials.json").write_text(
+        json.dumps({"url": "console.example.com", "identity": "identity", "secret": "secret", "verify": False})
+    )
+    return dict(os.environ, HOME=str(tmp_path), USERPROFILE=str(tmp_path), PC_DISABLE_UPDATE_CHECK="1")
+
+
+def run(environment, tmp_path, script, *args):
+    return subprocess.run(
+        [sys.executable, "-c", script, *args],
+        env=environment,
+        cwd=tmp_path,
+        capture_output=True,
+        text=True,
+        check=False,
+        stdin=subprocess.DEVNULL,
+    )
+
+
+def test_import_does_not_load_heavy_dependencies(environment, tmp_path):
+    script = "import sys, prismacloud.cli; print([module for module in %r if module in sys.modules])" % HEAVY_MODULES
+    result = run(environment, tmp_path, script)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
+
+
+def test_help_startup_time(environment, tmp_path):
+    durations = []
+    # The first run compiles and caches bytecode, use the fastest of the others.
+    for _ in range(4):
+        start = time.perf_counter()
+        result = run(environment, tmp_path, RUN_CLI, "--help")
+        durations.append(time.perf_counter() - start)
+        assert result.returncode == 0, result.stderr
+        assert "Prisma Cloud CLI" in result.stdout
+    assert min(durations[1:]) < STARTUP_BUDGET, "pc --help took %.2f seconds" % min(durations[1:])
+
+
+def test_help_does_not_import_commands(environment, tmp_path):
+    script = (
+        "import sys; sys.argv = ['pc', '--help']; from prismacloud.cli import cli\n"
+        "try:\n    cli()\nexcept SystemExit:\n    pass\n"
+        "print([module for module in sys.modules if '.cmd_' in module or module == 'prismacloud.cli.api'])"
+    )
+    result = run(environment, tmp_path, script)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_command_manifest_is_up_to_date(environment, tmp_path):
+    script = "from prismacloud.cli.commands import COMMANDS, build_manifest; print(COMMANDS == build_manifest())"
+    result = run(environment, tmp_path, script)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "True", "Regenerate the manifest with: python -m prismacloud.cli.commands"
+
+
+def test_import_commands_without_credentials(tmp_path):
+    environment = {variable: value for variable, value in os.environ.items() if not variable.startswith("PC_")}
+    environment.update(HOME=str(tmp_path), USERPROFILE=str(tmp_path), PC_DISABLE_UPDATE_CHECK="1")
+    script = "from prismacloud.cli.commands import build_manifest; print(len(build_manifest()))"
+    result = run(environment, tmp_path, script)
+    assert result.returncode == 0, result.stderr
+    assert int(result.stdout.strip()) > 0
+    assert not (tmp_path / ".prismacloud").exists()
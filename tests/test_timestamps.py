@@ -0,0 +1,52 @@
+import pandas as pd
+
+from prismacloud.cli.timestamps import (
+    convert_timestamps,
+    get_timestamp_units,
+    is_timestamp_name,
+    normalize_record_timestamps,
+    normalize_timestamps,
+)
+
+
+def test_is_timestamp_name():
+    for name in ["time", "lastModified", "availableAsOf", "alertTime", "firstSeen", "policy.lastModifiedOn"]:
+        assert is_timestamp_name(name)
+    for name in ["timeRange", "accounts", "hosts", "lastModifiedBy", "riskScore", 7]:
+        assert not is_timestamp_name(name)
+
+
+def test_normalize_timestamps():
+    data_frame = pd.DataFrame(
+        {
+            "time": [1700000000000, 0],
+            "lastSeen": [1700000000, 1700000060],
+            "riskScore": [1700000000000, 1],
+            "scanTime": [1, 2],
+            "enabledOn": [True, False],
+        }
+    )
+    normalized = normalize_timestamps(data_frame.copy(), "iso")
+    assert normalized["time"].tolist() == ["2023-11-14T22:13:20Z", 0]
+    assert normalized["lastSeen"].tolist() == ["2023-11-14T22:13:20Z", "2023-11-14T22:14:20Z"]
+    for column in ["riskScore", "scanTime", "enabledOn"]:
+        assert normalized[column].tolist() == data_frame[column].tolist()
+    assert normalize_timestamps(data_frame.copy(), "epoch").equals(data_frame)
+
+
+def test_normalize_timestamps_as_records():
+    data_frame = pd.DataFrame({"lastSeen": [1700000000123, 1000000000000], "alertTime": [1700000000, 1300000000]})
+    for time_format in ["%Y-%m-%d %H:%M:%S", "%d/%m/%Y %H:%M:%S.%f", "iso"]:
+        records = [normalize_record_timestamps(record, time_format) for record in data_frame.to_dict("records")]
+        assert normalize_timestamps(data_frame.copy(), time_format).to_dict("records") == records
+
+
+def test_convert_timestamps():
+    data_frame = pd.DataFrame({"id": ["a", "b", "c"], "lastSeen": [1700000000000, 0, 1700000001000]})
+    epochs = {column: (data_frame[column], unit) for column, unit in get_timestamp_units(data_frame).items()}
+    data_frame = normalize_timestamps(data_frame)
+    # The rows left (e.g. by a filter) are converted from their epochs, unset timestamps are missing.
+    data_frame = convert_timestamps(data_frame.iloc[1:], epochs)
+    assert str(data_frame["lastSeen"].dtype) == "datetime64[ms, UTC]"
+    assert pd.isna(data_frame["lastSeen"].iloc[0])
+    assert data_frame["lastSeen"].iloc[1] == pd.Timestamp(1700000001000, unit="ms", tz="UTC")
@@ -0,0 +1,112 @@
+import itertools
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from prismacloud.cli.token_cache import TOKEN_LIFETIME, TokenCache
+
+fcntl = pytest.importorskip("fcntl")
+
+tokens = itertools.count(1)
+
+
+class StubClient:
+    """The token attributes and login methods of the API client"""
+
+    token_limit = 540
+
+    def __init__(self):
+        self.token = None
+        self.token_timer = 0
+        self.logins = 0
+
+    def login(self, url=None):
+        time.sleep(0.01)
+        self.logins += 1
+        self.token = "token-%s" % next(tokens)
+        self.token_timer = time.time()
+
+    def extend_login(self):
+        # As the API library does, without calling login().
+        StubClient.login(self)
+
+
+@pytest.fixture(name="token_cache")
+def fixture_token_cache(tmp_path):
+    token_cache = TokenCache(str(tmp_path / "tokens"))
+    token_cache.select("credentials", "https://api.prismacloud.io", "access-key")
+    return token_cache
+
+
+def test_login_and_load(token_cache):
+    client = StubClient()
+    token_cache.attach(client)
+    client.login()
+    assert client.logins == 1
+    assert oct(os.stat(token_cache.file_name).st_mode & 0o777) == "0o600"
+    # Another invocation loads the cached token, and does not log in.
+    other_client = StubClient()
+    assert token_cache.load(other_client)["token"] == client.token
+    assert other_client.token == client.token and other_client.logins == 0
+    # The client refreshes the token one minute before it expires.
+    assert other_client.token_timer + other_client.token_limit == pytest.approx(time.time() + TOKEN_LIFETIME - 60, abs=5)
+
+
+def test_adopt_token_refreshed_by_another_process(token_cache):
+    client = StubClient()
+    token_cache.attach(client)
+    client.token, client.token_timer = "expired", time.time() - 1000
+    token_cache.write("refreshed", time.time())
+    client.extend_login()
+    assert client.token == "refreshed" and client.logins == 0
+
+
+def test_refresh_once_for_concurrent_threads(token_cache):
+    client = StubClient()
+    token_cache.attach(client)
+    token_cache.write("expired", time.time() - TOKEN_LIFETIME)
+    client.token, client.token_timer = "expired", time.time() - 1000
+    threads = [threading.Thread(target=client.extend_login) for _index in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # The first thread logs in, the others adopt its token.
+    assert client.logins == 1
+    assert token_cache.read()["token"] == client.token
+
+
+def test_expired_missing_and_corrupt_entries(token_cache):
+    client = StubClient()
+    assert token_cache.read() is None
+    assert token_cache.load(client) is None
+    token_cache.write("expiring", time.time() - TOKEN_LIFETIME + 30)
+    assert token_cache.read() is None
+    with open(token_cache.file_name, "w") as cache_file:
+        cache_file.write("{not json")
+    assert token_cache.read() is None
+    with open(token_cache.file_name, "w") as cache_file:
+        json.dump({"token": "", "expires": time.time() + TOKEN_LIFETIME}, cache_file)
+    assert token_cache.read() is None
+    # Without a valid entry, a refresh logs in and caches the new token.
+    token_cache.attach(client)
+    client.extend_login()
+    assert client.logins == 1 and token_cache.read()["token"] == client.token
+
+
+def test_lock_across_processes(token_cache):
+    with token_cache.lock():
+        assert oct(os.stat(token_cache.file_name + ".lock").st_mode & 0o777) == "0o600"
+        # Another open file description (as in another process) cannot take the lock.
+        lock_file = os.open(token_cache.file_name + ".lock", os.O_RDWR)
+        try:
+            with pytest.raises(BlockingIOError):
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        finally:
+            os.close(lock_file)
+    lock_file = os.open(token_cache.file_name + ".lock", os.O_RDWR)
+    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    os.close(lock_file)
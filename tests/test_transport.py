@@ -0,0 +1,218 @@
+import email.utils
+import logging
+import os
+import threading
+import time
+import types
+
+import pytest
+import requests
+
+from prismacloud.cli import transport
+from prismacloud.cli.transport import (
+    BACKOFF_MAX,
+    MAX_RETRIES,
+    RECOVERY_REQUESTS,
+    THROTTLE_COOLDOWN,
+    AdaptiveLimiter,
+    PooledRequests,
+    SessionPool,
+    TokenBucket,
+    get_backoff,
+    get_retry_after,
+    install,
+)
+
+URL = "https://api.prismacloud.io/alert"
+
+
+def get_response(status_code, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.url = URL
+    response.headers.update(headers or {})
+    return response
+
+
+class StubSession:
+    """A session that returns (or raises) the given outcomes, one per request"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.requests = []
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, url, kwargs))
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return get_response(outcome) if isinstance(outcome, int) else outcome
+
+
+@pytest.fixture(name="sleeps")
+def fixture_sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    return sleeps
+
+
+def get_pool(outcomes):
+    pool = SessionPool()
+    session = StubSession(outcomes)
+    pool.session = lambda: session
+    return pool, session
+
+
+def test_retry_throttled_and_failed_requests(sleeps):
+    pool, session = get_pool([get_response(429, {"Retry-After": "3"}), 503, 200])
+    assert pool.request("GET", URL).status_code == 200
+    assert len(session.requests) == 3
+    assert sleeps[0] == 3
+    assert pool.stats["requests"] == 3 and pool.stats["retries"] == 2 and pool.stats["throttled"] == 1
+    assert pool.stats["throttle_time"] == 3
+
+
+def test_retry_up_to_max_retries(sleeps):
+    pool, session = get_pool([500])
+    assert pool.request("GET", URL).status_code == 500
+    assert len(session.requests) == MAX_RETRIES + 1
+    assert len(sleeps) == MAX_RETRIES
+    assert all(0 <= delay <= BACKOFF_MAX for delay in sleeps)
+
+
+def test_retry_connection_errors_of_idempotent_requests(sleeps):
+    pool, session = get_pool([requests.ConnectionError("reset"), 200])
+    assert pool.request("GET", URL).status_code == 200
+    assert len(session.requests) == 2 and len(sleeps) == 1
+    # A POST may have been processed before the connection failed: it is not retried.
+    pool, session = get_pool([requests.ConnectionError("reset"), 200])
+    with pytest.raises(requests.ConnectionError):
+        pool.request("POST", URL)
+    assert len(session.requests) == 1
+    # Responses of POST requests are retried.
+    pool, session = get_pool([502, 200])
+    assert pool.request("POST", URL).status_code == 200
+
+
+def test_get_retry_after(caplog):
+    assert get_retry_after(None) is None
+    assert get_retry_after(get_response(429)) is None
+    assert get_retry_after(get_response(429, {"Retry-After": "soon"})) is None
+    assert get_retry_after(get_response(429, {"Retry-After": "7"})) == 7
+    assert get_retry_after(get_response(429, {"Retry-After": "-7"})) == 0
+    retry_at = email.utils.formatdate(time.time() + 30, usegmt=True)
+    assert get_retry_after(get_response(429, {"Retry-After": retry_at})) == pytest.approx(30, abs=2)
+    # Longer delays are capped at the maximum backoff, and logged.
+    with caplog.at_level(logging.INFO):
+        assert get_retry_after(get_response(429, {"Retry-After": "86400"})) == BACKOFF_MAX
+    assert "reduced to %s seconds" % BACKOFF_MAX in caplog.text
+
+
+def test_get_backoff(monkeypatch):
+    monkeypatch.setattr(transport.random, "uniform", lambda low, high: high)
+    assert [get_backoff(attempt) for attempt in range(8)] == [1, 2, 4, 8, 16, 32, BACKOFF_MAX, BACKOFF_MAX]
+
+
+def test_adaptive_limiter(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    limiter = AdaptiveLimiter(8)
+    assert limiter.throttled() and limiter.limit == 4
+    # Throttled responses within the cooldown were probably already in flight: the limit is halved once.
+    assert not limiter.throttled() and limiter.limit == 4
+    now[0] += THROTTLE_COOLDOWN + 1
+    assert limiter.throttled() and limiter.limit == 2
+    for _index in range(3):
+        now[0] += THROTTLE_COOLDOWN + 1
+        limiter.throttled()
+    assert limiter.limit == 1
+    # The limit increases by one after enough consecutive successes, up to its maximum.
+    for _index in range(RECOVERY_REQUESTS - 1):
+        limiter.succeeded()
+    assert limiter.limit == 1
+    limiter.succeeded()
+    assert limiter.limit == 2
+    for _index in range(RECOVERY_REQUESTS * 10):
+        limiter.succeeded()
+    assert limiter.limit == 8
+
+
+def test_token_bucket():
+    bucket = TokenBucket(20)
+    bucket.throttled()
+    assert bucket.rate == 10
+    for _index in range(5):
+        bucket.throttled()
+    assert bucket.rate == bucket.min_rate == 2.5
+    bucket.recovered()
+    assert bucket.rate == pytest.approx(2.625)
+    for _index in range(100):
+        bucket.recovered()
+    assert bucket.rate == 20
+
+
+def test_session_per_thread():
+    pool = SessionPool()
+    sessions = []
+    threads = [threading.Thread(target=lambda: sessions.append(pool.session())) for _index in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert pool.session() is pool.session()
+    assert len({id(session) for session in sessions + [pool.session()]}) == 4
+
+
+def test_host_slots():
+    pool = SessionPool(max_connections_per_host=2)
+    slot = pool.host_slot("https://api.prismacloud.io/alert")
+    assert pool.host_slot("https://api.prismacloud.io/policy") is slot
+    assert pool.host_slot("https://us-east1.cloud.twistlock.com/api/v1/hosts") is not slot
+    assert slot.acquire(blocking=False) and slot.acquire(blocking=False)
+    assert not slot.acquire(blocking=False)
+    slot.release()
+    slot.release()
+
+
+def test_get_api_family():
+    pool = SessionPool()
+    pool.set_api_hosts("api.prismacloud.io", "us-east1.cloud.twistlock.com")
+    assert pool.get_api_family("https://api.prismacloud.io/v2/alert") == "cspm"
+    assert pool.get_api_family("https://api.prismacloud.io/code/api/v1/repositories") == "code"
+    assert pool.get_api_family("https://us-east1.cloud.twistlock.com/us-1-111/api/v1/hosts") == "cwpp"
+    # With the same host (e.g. a self-hosted Compute Console), the Compute API is under /api/v1/.
+    pool.set_api_hosts("console.example.com", "console.example.com")
+    assert pool.get_api_family("https://console.example.com/api/v1/images") == "cwpp"
+    assert pool.get_api_family("https://console.example.com/login") == "cspm"
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="Requires os.fork()")
+def test_reset_after_fork():
+    pool = SessionPool()
+    parent_session = pool.session()
+    pool.host_slot(URL)
+    pool.get_rate_limits("cspm")
+    pool.count("requests")
+    pid = os.fork()
+    if pid == 0:
+        # In the child process: report the result with the exit code, without running pytest's exit handlers.
+        pool.reset()
+        reset = pool.session() is not parent_session and not pool.host_slots and not pool.rate_limits
+        os._exit(0 if reset and pool.stats["requests"] == 0 else 1)
+    assert os.waitpid(pid, 0)[1] == 0
+    # The parent process keeps its session and limits.
+    assert pool.session() is parent_session and pool.stats["requests"] == 1
+
+
+def test_install(monkeypatch):
+    for module in [transport.api_cspm, transport.api_cwpp, transport.api_pccs]:
+        monkeypatch.setattr(module, "requests", module.requests)
+    pool, session = get_pool([200])
+    client = types.SimpleNamespace(retry_waits=[1, 2, 4])
+    install(pool, client)
+    # The pool takes over retrying requests from the API library.
+    assert client.retry_waits == []
+    assert isinstance(transport.api_cspm.requests, PooledRequests)
+    assert transport.api_cwpp.requests.request("GET", URL).status_code == 200
+    assert session.requests == [("GET", URL, {})]
+    assert transport.api_pccs.requests.exceptions is requests.exceptions
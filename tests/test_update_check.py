@@ -0,0 +1,118 @@
+""" Tests of the cached update check """
+
+import json
+import sys
+from types import ModuleType, SimpleNamespace
+
+import pytest
+
+import prismacloud.cli.version as cli_version
+from prismacloud.cli import update_check
+
+NOW = 1700000000.0
+
+
+@pytest.fixture(name="update_check_file")
+def fixture_update_check_file(tmp_path, monkeypatch):
+    """Use an update check file in a temporary directory, at a fixed time"""
+    update_check_file = tmp_path / ".prismacloud" / ".update_check.json"
+    monkeypatch.setattr(update_check, "get_update_check_file", lambda: str(update_check_file))
+    monkeypatch.setattr(update_check.time, "time", lambda: NOW)
+    monkeypatch.delenv(update_check.UPDATE_CHECK_DISABLE_VARIABLE, raising=False)
+    return update_check_file
+
+
+@pytest.fixture(name="background_checks")
+def fixture_background_checks(monkeypatch):
+    """Record the background checks, instead of starting them"""
+    background_checks = []
+    monkeypatch.setattr(update_check.subprocess, "Popen", lambda args, **options: background_checks.append(args))
+    return background_checks
+
+
+def write_update_check(update_check_file, **update_check_entry):
+    update_check_file.parent.mkdir(exist_ok=True)
+    update_check_file.write_text(json.dumps(update_check_entry))
+
+
+def test_background_check(update_check_file, background_checks):
+    # Without a cached result, start a background check, and do not start another one within the retry period.
+    assert update_check.get_cached_available_version() is None
+    assert background_checks == [[sys.executable, "-m", "prismacloud.cli.update_check"]]
+    assert json.loads(update_check_file.read_text()) == {"attempted": NOW}
+    assert update_check.get_cached_available_version() is None
+    assert len(background_checks) == 1
+
+    # Retry a check that did not complete after the retry period.
+    write_update_check(update_check_file, attempted=NOW - update_check.UPDATE_CHECK_RETRY - 1)
+    assert update_check.get_cached_available_version() is None
+    assert len(background_checks) == 2
+
+    # A corrupt cache file is ignored, and replaced.
+    update_check_file.write_text("{")
+    assert update_check.get_cached_available_version() is None
+    assert len(background_checks) == 3
+    assert json.loads(update_check_file.read_text()) == {"attempted": NOW}
+
+
+def test_daily_cached_result(update_check_file, background_checks):
+    # Use the result of a check made less than a day ago, without another check.
+    checked = NOW - update_check.UPDATE_CHECK_TTL + 60
+    write_update_check(update_check_file, checked=checked, version=cli_version.version, available_version="99.0.0")
+    assert update_check.get_cached_available_version() == "99.0.0"
+    write_update_check(update_check_file, checked=checked, version=cli_version.version, available_version=None)
+    assert update_check.get_cached_available_version() is None
+    assert not background_checks
+
+    # Use the result of a check made more than a day ago, and refresh it in the background.
+    checked = NOW - update_check.UPDATE_CHECK_TTL - 60
+    write_update_check(update_check_file, checked=checked, version=cli_version.version, available_version="99.0.0")
+    assert update_check.get_cached_available_version() == "99.0.0"
+    assert len(background_checks) == 1
+    assert json.loads(update_check_file.read_text())["attempted"] == NOW
+
+    # Ignore a check made by another version of the CLI, and refresh it in the background.
+    write_update_check(update_check_file, checked=NOW, version="0.0.1", available_version="99.0.0")
+    assert update_check.get_cached_available_version() is None
+    assert len(background_checks) == 2
+
+
+@pytest.mark.parametrize("value", ["1", "true", "yes"])
+def test_disable_switch(update_check_file, background_checks, monkeypatch, value):
+    monkeypatch.setenv(update_check.UPDATE_CHECK_DISABLE_VARIABLE, value)
+    write_update_check(update_check_file, checked=NOW, version=cli_version.version, available_version="99.0.0")
+    assert update_check.get_cached_available_version() is None
+    assert not background_checks
+    assert update_check.update_check_disabled()
+    for enabled_value in ["", "0", "false", "no"]:
+        monkeypatch.setenv(update_check.UPDATE_CHECK_DISABLE_VARIABLE, enabled_value)
+        assert not update_check.update_check_disabled()
+
+
+@pytest.mark.parametrize("available_version", ["99.0.0", None])
+def test_check_for_update(update_check_file, background_checks, monkeypatch, available_version):
+    checks = []
+
+    class UpdateChecker:  # pylint:disable=too-few-public-methods
+        """A stub of the PyPI update checker"""
+
+        @staticmethod
+        def check(package_name, package_version):
+            checks.append((package_name, package_version))
+            return SimpleNamespace(available_version=available_version) if available_version else None
+
+    update_checker = ModuleType("update_checker")
+    update_checker.UpdateChecker = UpdateChecker
+    monkeypatch.setitem(sys.modules, "update_checker", update_checker)
+
+    write_update_check(update_check_file, attempted=NOW)
+    update_check.check_for_update()
+    assert checks == [("prismacloud-cli", cli_version.version)]
+    assert json.loads(update_check_file.read_text()) == {
+        "attempted": NOW,
+        "checked": NOW,
+        "version": cli_version.version,
+        "available_version": available_version,
+    }
+    assert update_check.get_cached_available_version() == available_version
+    assert not background_checks
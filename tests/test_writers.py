@@ -0,0 +1,28 @@
+import io
+
+import pandas as pd
+
+from prismacloud.cli.writers import CsvWriter
+
+
+def test_csv_writer_columns_of_all_pages():
+    output_file = io.StringIO()
+    writer = CsvWriter(file=output_file)
+    writer.open()
+    writer.write_frame(pd.DataFrame({"id": [1, 2], "name": ["a", "b"]}))
+    # A column that first appears after the first page is written too.
+    writer.write_frame(pd.DataFrame({"name": ["c"], "id": [3], "cvss": [7.5]}))
+    writer.close()
+    assert output_file.getvalue() == "id,name,cvss\n1,a,\n2,b,\n3,c,7.5\n\n"
+    assert writer.rows == 3
+
+
+def test_csv_writer_with_columns():
+    output_file = io.StringIO()
+    writer = CsvWriter(file=output_file, columns=["id", "name"])
+    writer.open()
+    writer.write_frame(pd.DataFrame({"id": [1], "name": ["a"]}))
+    assert output_file.getvalue() == "id,name\n1,a\n"
+    writer.write_frame(pd.DataFrame({"id": [2], "name": ["b"]}))
+    writer.close()
+    assert output_file.getvalue() == "id,name\n1,a\n2,b\n\n"